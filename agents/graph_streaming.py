@@ -0,0 +1,93 @@
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+
+
+@dataclass
+class NodeRun:
+    node: str
+    started: float
+    first_token: Optional[float] = None
+    finished: Optional[float] = None
+    text: List[str] = field(default_factory=list)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return self.first_token - self.started if self.first_token is not None else None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.finished - self.started if self.finished is not None else None
+
+
+def chunk_text(chunk) -> str:
+    """Text carried by a message chunk: content tokens or structured-output argument fragments."""
+    text = chunk.content if isinstance(chunk.content, str) else ""
+    for tool_call_chunk in getattr(chunk, "tool_call_chunks", None) or []:
+        text += tool_call_chunk.get("args") or ""
+    function_call = chunk.additional_kwargs.get("function_call") if chunk.additional_kwargs else None
+    if function_call:
+        text += function_call.get("arguments") or ""
+    return text
+
+
+def _node_panel(run: NodeRun) -> Panel:
+    if run.finished is None:
+        title, border_style = f"⏳ {run.node}", "cyan"
+    else:
+        title, border_style = f"✅ {run.node} ({run.duration:.2f}s)", "green"
+    body = "".join(run.text)[-2000:] or "[dim]waiting for first token...[/dim]"
+    return Panel(body, title=title, border_style=border_style, expand=False)
+
+
+def stream_graph(graph, input_state: dict, console: Console):
+    """Run a compiled graph, rendering each node's tokens live and timing time-to-first-token.
+
+    Nodes still hand their parsed outputs to the next node as soon as they return;
+    streaming only changes what is shown while each node's LLM call is in flight.
+    Returns the final state and the list of node runs.
+    """
+    runs: List[NodeRun] = []
+    final_state = input_state
+    step_started = time.perf_counter()
+
+    def current_run(node: str) -> NodeRun:
+        if not runs or runs[-1].node != node or runs[-1].finished is not None:
+            runs.append(NodeRun(node=node, started=step_started))
+        return runs[-1]
+
+    with Live(Group(), console=console, refresh_per_second=12, vertical_overflow="visible") as live:
+        for mode, payload in graph.stream(input_state, stream_mode=["messages", "updates", "values"]):
+            now = time.perf_counter()
+            if mode == "messages":
+                chunk, metadata = payload
+                run = current_run(metadata.get("langgraph_node", "?"))
+                text = chunk_text(chunk)
+                if text:
+                    if run.first_token is None:
+                        run.first_token = now
+                    run.text.append(text)
+            elif mode == "updates":
+                for node in payload:
+                    run = current_run(node)
+                    run.finished = now
+                step_started = now
+            else:
+                final_state = payload
+            # Keep only the active node and the last few finished ones on screen.
+            live.update(Group(*(_node_panel(run) for run in runs[-3:])))
+
+    table = Table(title="⏱️ Time to first token per node", header_style="bold blue")
+    table.add_column("Node", style="cyan")
+    table.add_column("TTFT (s)", justify="right", style="green")
+    table.add_column("Total (s)", justify="right", style="yellow")
+    for run in runs:
+        table.add_row(run.node,
+                      f"{run.ttft:.2f}" if run.ttft is not None else "-",
+                      f"{run.duration:.2f}" if run.duration is not None else "-")
+    console.print(table)
+    return final_state, runs
@@ -1,28 +1,30 @@
+import os
+import time
+import argparse
+from functools import lru_cache
+from typing import List
 from langgraph.graph import StateGraph, MessagesState
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 from rich import print as rprint
+from agents.graph_streaming import stream_graph
+
+from common.llm_cache import cache_report
+from common.providers import get_chat_model, get_structured_model, latency_report
 
 load_dotenv()
 console = Console()
 
 
-def joke_writer(state: MessagesState):
-    messages = state["messages"]
-    response = model.invoke(messages + [HumanMessage(content="""
+WRITER_PROMPT = """
     Create a short, witty joke about coding or tech that engineering students will love. Use simple English, include an emoji, and keep it relatable for students in computer science or related fields.
-    """)])
-    console.print(Panel(f"💻 Student Coder's Draft:\n\n{response.content}", border_style="cyan"))
-    return {"messages": [response]}
-
+    """
 
-def joke_critic(state: MessagesState):
-    messages = state['messages']
-    joke = messages[-1].content
-    rewritten_joke = model.invoke(f"""
+CRITIC_PROMPT = """
     You're a cool Computer Science professor. Improve the following joke to make it funnier and more relatable for your engineering students:
 
     <joke>
@@ -30,28 +32,144 @@ def joke_critic(state: MessagesState):
     </joke>
 
     Make it snappier and add a tech-savvy twist if possible. Keep it short and sweet!
-    """)
+    """
+
+REQUEST = "Generate a hilarious coding joke that engineering students will love!"
+
+
+class RankedJoke(BaseModel):
+    index: int = Field(..., description="Number of the joke in the batch")
+    score: int = Field(..., description="How funny and relatable the joke is for engineering students, from 1 to 10")
+
+
+class JokeRanking(BaseModel):
+    ranking: List[RankedJoke] = Field(..., description="Every joke in the batch, best first")
+
+
+def joke_writer(state: MessagesState):
+    messages = state["messages"]
+    response = writer_model().invoke(messages + [HumanMessage(content=WRITER_PROMPT)])
+    console.print(Panel(f"💻 Student Coder's Draft:\n\n{response.content}", border_style="cyan"))
+    return {"messages": [response]}
+
+
+def joke_critic(state: MessagesState):
+    messages = state['messages']
+    joke = messages[-1].content
+    rewritten_joke = critic_model().invoke(CRITIC_PROMPT.format(joke=joke))
     console.print(Panel(f"🧑‍🏫 Prof's Punchline Polish:\n\n{rewritten_joke.content}", border_style="magenta"))
     return {"messages": [rewritten_joke]}
 
 
-model = ChatOpenAI(model="gpt-4o-mini", temperature=1.0, max_tokens=200)
+# Models and the graph are built on first use, so importing this module makes no clients.
+def writer_model():
+    return get_chat_model("joke_writer", temperature=1.0, max_tokens=200)
+
+
+def critic_model():
+    return get_chat_model("joke_critic", temperature=1.0, max_tokens=200)
+
+
+def ranker():
+    return get_structured_model("joke_ranker", JokeRanking, temperature=0.0)
+
+
+@lru_cache(maxsize=None)
+def get_graph():
+    graph_builder = StateGraph(MessagesState)
+    graph_builder.add_node("agent", joke_writer)
+    graph_builder.add_node("joke_critic", joke_critic)
+    graph_builder.add_edge("agent", "joke_critic")
+    graph_builder.set_entry_point("agent")
+    graph_builder.set_finish_point("joke_critic")
+    return graph_builder.compile()
+
+
+def ranking_prompt(jokes: List[str]) -> str:
+    numbered = "\n".join(f"{i}. {joke}" for i, joke in enumerate(jokes))
+    return f"""
+    You're a cool Computer Science professor judging a joke contest for your engineering students.
+    Score every joke below from 1 to 10 and rank them, best first. Refer to jokes by their number.
+
+    {numbered}
+    """
+
+
+def run_tournament(drafts: int = 20, keep: int = 5, concurrency: int = 8, rank_batch_size: int = 25):
+    """Write ``drafts`` jokes concurrently, polish them in parallel and keep the ``keep`` best.
+
+    The critic ranks each batch of up to ``rank_batch_size`` jokes in a single structured call.
+    """
+    config = {"max_concurrency": concurrency}
+    start = time.perf_counter()
+
+    with console.status(f"[bold cyan]Writing {drafts} drafts..."):
+        draft_messages = writer_model().batch(
+            [[HumanMessage(content=REQUEST), HumanMessage(content=WRITER_PROMPT)]] * drafts, config=config)
+    with console.status(f"[bold magenta]Polishing {drafts} drafts..."):
+        polished = critic_model().batch([CRITIC_PROMPT.format(joke=draft.content) for draft in draft_messages], config=config)
+    jokes = [joke.content for joke in polished]
+
+    batches = [jokes[i:i + rank_batch_size] for i in range(0, len(jokes), rank_batch_size)]
+    with console.status(f"[bold yellow]Ranking {len(jokes)} jokes in {len(batches)} call(s)..."):
+        rankings = ranker().batch([ranking_prompt(batch) for batch in batches], config=config)
+
+    scored = {}
+    for batch_number, (batch, ranking) in enumerate(zip(batches, rankings)):
+        for entry in ranking.ranking:
+            if 0 <= entry.index < len(batch):
+                scored[batch_number * rank_batch_size + entry.index] = entry.score
+    best = sorted(scored, key=scored.get, reverse=True)[:keep]
+    elapsed = time.perf_counter() - start
+
+    llm_calls = len(draft_messages) + len(polished) + len(batches)
+    table = Table(title="🏆 Tournament Winners", header_style="bold yellow")
+    table.add_column("Score", justify="right", style="green")
+    table.add_column("Joke", style="white")
+    for index in best:
+        table.add_row(str(scored[index]), jokes[index])
+    console.print(table)
+    console.print(Panel(
+        f"Drafts: {drafts} | Accepted: {len(best)} | Time: {elapsed:.1f}s\n"
+        f"Jokes per minute: {len(best) / elapsed * 60:.1f} | "
+        f"LLM calls per accepted joke: {llm_calls / max(len(best), 1):.1f}",
+        title="📊 Tournament Stats", border_style="cyan"))
+    latency_report()
+    cache_report()
+    return [jokes[index] for index in best]
+
+
+def run_single(stream: bool = False):
+    console.print(Panel("🚀 Engineering Humor Hub: Where Bugs Become Features!", style="bold green"))
+
+    input_state = {"messages": [HumanMessage(content=REQUEST)]}
+    if stream:
+        response, _ = stream_graph(get_graph(), input_state, console)
+    else:
+        response = get_graph().invoke(input_state)
+
+    console.print(Panel("🏆 Final Joke - Ready for the Lab", style="bold yellow"))
+    rprint(response["messages"][-1].content)
 
-graph_builder = StateGraph(MessagesState)
-graph_builder.add_node("agent", joke_writer)
-graph_builder.add_node("joke_critic", joke_critic)
-graph_builder.add_edge("agent", "joke_critic")
-graph_builder.set_entry_point("agent")
-graph_builder.set_finish_point("joke_critic")
+    console.print(Panel("🎉 Humor Compilation Successful!", style="bold green"))
+    latency_report()
+    cache_report()
 
-graph = graph_builder.compile()
 
-console.print(Panel("🚀 Engineering Humor Hub: Where Bugs Become Features!", style="bold green"))
+def main():
+    parser = argparse.ArgumentParser(description="Generate engineering jokes")
+    parser.add_argument("--tournament", action="store_true", help="Run a batch tournament instead of a single joke")
+    parser.add_argument("--drafts", type=int, default=20, help="Number of drafts in the tournament")
+    parser.add_argument("--keep", type=int, default=5, help="Number of jokes accepted from the tournament")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max concurrent LLM calls")
+    parser.add_argument("--stream", action="store_true", help="Stream tokens from each graph node live")
+    args = parser.parse_args()
 
-response = graph.invoke(
-    {"messages": [HumanMessage(content="Generate a hilarious coding joke that engineering students will love!")]})
+    if args.tournament:
+        run_tournament(args.drafts, args.keep, args.concurrency)
+    else:
+        run_single(args.stream)
 
-console.print(Panel("🏆 Final Joke - Ready for the Lab", style="bold yellow"))
-rprint(response["messages"][-1].content)
 
-console.print(Panel("🎉 Humor Compilation Successful!", style="bold green"))
+if __name__ == "__main__":
+    main()
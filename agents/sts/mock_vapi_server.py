@@ -0,0 +1,299 @@
+import json
+import math
+import time
+import uuid
+import array
+import argparse
+import threading
+import socketserver
+from collections import deque
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse
+
+# Wire format of the stand-in room, and of the virtual devices vapi_python creates: 16 kHz mono 16-bit PCM.
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+FRAME_BYTES = FRAME_SAMPLES * 2
+SILENCE = bytes(FRAME_BYTES)
+VOICE_RMS = 500  # frames louder than this count as speech
+
+
+def frame_rms(frame: bytes) -> float:
+    samples = array.array('h', frame)
+    return math.sqrt(sum(s * s for s in samples) / len(samples)) if samples else 0.0
+
+
+def tone(seconds: float, frequency: float = 220.0, amplitude: int = 8000) -> List[bytes]:
+    """A tone split into frames (the last one padded with silence)."""
+    samples = array.array('h', (int(amplitude * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+                                for i in range(int(seconds * SAMPLE_RATE))))
+    pcm = samples.tobytes()
+    return [pcm[i:i + FRAME_BYTES].ljust(FRAME_BYTES, b'\0') for i in range(0, len(pcm), FRAME_BYTES)]
+
+
+@dataclass
+class MockLatencies:
+    """Assumed server-side costs in milliseconds; override them to ask what-if questions."""
+    create_assistant: float = 250
+    create_call: float = 350
+    inline_config: float = 150  # validating and provisioning a transient assistant per call
+    join: float = 600  # room join until the bot's first message starts
+    recording_join: float = 100  # starting the recorder
+    endpointing: float = 300  # silence before the caller's turn counts as finished
+    transcribe: float = 100
+    llm_first_token: float = 450
+    tts_first_audio: float = 200
+    recording_turn: float = 30
+    interruption: float = 120  # from detected barge-in to the bot going quiet
+    min_speech: float = 60  # speech needed before it counts as a barge-in
+    reply: float = 2000  # length of every spoken reply
+
+
+class RoomSession:
+    """One bot in one call: speaks the first message, replies after each caller turn, can be interrupted."""
+
+    def __init__(self, config: dict, latencies: MockLatencies, connection):
+        self.config = config
+        self.latencies = latencies
+        self.connection = connection
+        self.outgoing: deque = deque()
+        self.generation = 0  # bumped to cancel replies that are still being "generated"
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+
+    @property
+    def recording(self) -> bool:
+        return bool(self.config.get('recordingEnabled'))
+
+    def speak_after(self, delay_ms: float, frames: List[bytes]) -> None:
+        with self.lock:
+            generation = self.generation
+
+        def speak():
+            with self.lock:
+                if generation == self.generation:
+                    self.outgoing.extend(frames)
+        threading.Timer(delay_ms / 1000, speak).start()
+
+    def cancel_pending(self) -> None:
+        with self.lock:
+            self.generation += 1
+
+    def interrupt(self) -> None:
+        self.cancel_pending()
+
+        def stop():
+            with self.lock:
+                self.outgoing.clear()
+        threading.Timer(self.latencies.interruption / 1000, stop).start()
+
+    def speaking(self) -> bool:
+        with self.lock:
+            return bool(self.outgoing)
+
+    def write_loop(self) -> None:
+        """Send a frame every FRAME_MS, like a speaker track: the reply if there is one, silence otherwise."""
+        next_at = time.monotonic()
+        while not self.closed.is_set():
+            with self.lock:
+                frame = self.outgoing.popleft() if self.outgoing else SILENCE
+            try:
+                self.connection.sendall(frame)
+            except OSError:
+                break
+            next_at += FRAME_MS / 1000
+            time.sleep(max(0.0, next_at - time.monotonic()))
+        self.closed.set()
+
+    def run(self, reader) -> None:
+        latencies = self.latencies
+        threading.Thread(target=self.write_loop, daemon=True).start()
+        first_words = len(str(self.config.get('firstMessage', '')).split())
+        self.speak_after(latencies.join + (latencies.recording_join if self.recording else 0),
+                         tone(max(0.5, first_words * 0.4)))
+
+        voiced_ms = silent_ms = 0
+        in_turn = ignored = False
+        reply_ms = latencies.transcribe + latencies.llm_first_token + latencies.tts_first_audio + \
+            (latencies.recording_turn if self.recording else 0)
+        while not self.closed.is_set():
+            frame = reader.read(FRAME_BYTES)
+            if len(frame) < FRAME_BYTES:
+                break
+            if frame_rms(frame) > VOICE_RMS:
+                voiced_ms, silent_ms = voiced_ms + FRAME_MS, 0
+                if not in_turn and voiced_ms >= latencies.min_speech:
+                    in_turn = True
+                    if not self.speaking():
+                        ignored = False
+                        self.cancel_pending()  # the caller kept talking: drop the pending reply
+                    elif self.config.get('interruptionsEnabled'):
+                        ignored = False
+                        self.interrupt()
+                    else:
+                        ignored = True  # talked over the bot, which doesn't listen while speaking
+            else:
+                voiced_ms, silent_ms = 0, silent_ms + FRAME_MS
+                if in_turn and silent_ms >= latencies.endpointing:
+                    in_turn = False
+                    if not ignored:
+                        self.speak_after(reply_ms, tone(latencies.reply / 1000))
+        self.closed.set()
+
+
+class MockVapi:
+    """Stand-in for the Vapi REST API (assistants, web calls) and for the Daily room the call runs in."""
+
+    def __init__(self, latencies: MockLatencies):
+        self.latencies = latencies
+        self.assistants: Dict[str, dict] = {}
+        self.calls: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.stats = {'assistants_created': 0, 'calls_inline': 0, 'calls_by_id': 0, 'sessions': 0}
+        self.http_server = None
+        self.room_server = None
+
+    @property
+    def api_url(self) -> str:
+        return f'http://127.0.0.1:{self.http_server.server_address[1]}'
+
+    def create_assistant(self, config: dict) -> dict:
+        time.sleep(self.latencies.create_assistant / 1000)
+        assistant_id = str(uuid.uuid4())
+        with self.lock:
+            self.assistants[assistant_id] = config
+            self.stats['assistants_created'] += 1
+        return {'id': assistant_id, **config}
+
+    def create_call(self, payload: dict) -> dict:
+        overrides = payload.get('assistantOverrides') or {}
+        if payload.get('assistantId'):
+            with self.lock:
+                config = self.assistants.get(payload['assistantId'])
+                self.stats['calls_by_id'] += 1
+            if config is None:
+                raise LookupError(f"Couldn't find assistant {payload['assistantId']}")
+            delay = self.latencies.create_call
+        else:
+            config = payload.get('assistant') or {}
+            with self.lock:
+                self.stats['calls_inline'] += 1
+            delay = self.latencies.create_call + self.latencies.inline_config
+        time.sleep(delay / 1000)
+        call_id = str(uuid.uuid4())
+        with self.lock:
+            self.calls[call_id] = {**config, **overrides}
+        host, port = self.room_server.server_address
+        return {'id': call_id, 'webCallUrl': f'tcp://{host}:{port}/{call_id}'}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+    def shutdown(self) -> None:
+        for server in (self.http_server, self.room_server):
+            server.shutdown()
+            server.server_close()
+
+
+class MockVapiHandler(BaseHTTPRequestHandler):
+    vapi: MockVapi = None
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(self.vapi.snapshot())
+        else:
+            self._send_json({'message': 'not found'}, 404)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        path = self.path.rstrip('/')
+        if path == '/assistant':
+            self._send_json(self.vapi.create_assistant(payload), 201)
+        elif path == '/call/web':
+            try:
+                self._send_json(self.vapi.create_call(payload), 201)
+            except LookupError as e:
+                self._send_json({'message': e.args[0]}, 404)
+        else:
+            self._send_json({'message': 'not found'}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RoomHandler(socketserver.StreamRequestHandler):
+    """``JOIN <call id>\\n``, then raw PCM frames both ways until the caller hangs up."""
+    vapi: MockVapi = None
+
+    def handle(self):
+        call_id = self.rfile.readline().decode('utf-8').strip().partition(' ')[2]
+        with self.vapi.lock:
+            config = self.vapi.calls.get(call_id)
+            if config is not None:
+                self.vapi.stats['sessions'] += 1
+        if config is None:
+            return
+        RoomSession(config, self.vapi.latencies, self.connection).run(self.rfile)
+
+
+class _RoomServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_mock_vapi(port: int = 8770, latencies: MockLatencies = None) -> MockVapi:
+    """Start the REST API on ``port`` and the room on ``port + 1`` in background threads."""
+    vapi = MockVapi(latencies or MockLatencies())
+    vapi.http_server = ThreadingHTTPServer(('127.0.0.1', port),
+                                           type('BoundMockVapiHandler', (MockVapiHandler,), {'vapi': vapi}))
+    vapi.room_server = _RoomServer(('127.0.0.1', port + 1 if port else 0),
+                                   type('BoundRoomHandler', (RoomHandler,), {'vapi': vapi}))
+    for server in (vapi.http_server, vapi.room_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return vapi
+
+
+def parse_room_url(url: str):
+    """``tcp://host:port/<call id>`` -> (host, port, call id)."""
+    parsed = urlparse(url)
+    return parsed.hostname, parsed.port, parsed.path.lstrip('/')
+
+
+def latency_overrides(pairs: List[str]) -> MockLatencies:
+    """``["llm_first_token=800", ...]`` -> MockLatencies with those fields changed."""
+    names = {field.name for field in fields(MockLatencies)}
+    values = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        if name not in names:
+            raise ValueError(f"Unknown latency '{name}' (one of: {', '.join(sorted(names))})")
+        values[name] = float(value)
+    return MockLatencies(**values)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the Vapi API and call room')
+    parser.add_argument('--port', type=int, default=8770, help='REST port; the room listens on the next one')
+    parser.add_argument('--latency', action='append', metavar='NAME=MS',
+                        help='Override an assumed latency, e.g. llm_first_token=800 (repeatable)')
+    args = parser.parse_args()
+
+    server = start_mock_vapi(args.port, latency_overrides(args.latency))
+    print(f'Mock Vapi listening on {server.api_url} '
+          f'(python benchmarks/voice_latency.py --api-url {server.api_url})')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
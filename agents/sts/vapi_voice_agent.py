@@ -1,11 +1,16 @@
-from vapi_python import Vapi
-from dotenv import load_dotenv
 import os
+import json
+import hashlib
+import argparse
+from typing import Optional, Tuple
+from dotenv import load_dotenv
 
 load_dotenv()
 
-api_key = os.getenv('VAPI_API_KEY')
-vapi = Vapi(api_key=api_key)
+VAPI_API_URL = os.getenv('VAPI_API_URL', 'https://api.vapi.ai')
+# Ids of pre-created assistants, keyed by API URL and config fingerprint.
+ASSISTANT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.vapi_assistants.json')
+
 assistant = {
     'firstMessage': 'Hey, how are you?',
     'context': 'Role Play My cute wife kalai, she is tamil girl, lovely, sexy',
@@ -15,4 +20,75 @@ assistant = {
     "interruptionsEnabled": True
 }
 
-vapi.start(assistant=assistant)
+
+def _headers(api_key: str) -> dict:
+    return {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
+
+
+def assistant_fingerprint(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def create_assistant(config: dict, api_key: str, api_url: str = VAPI_API_URL) -> str:
+    """Create a persistent assistant from an inline config and return its id."""
+    import httpx
+
+    response = httpx.post(f'{api_url}/assistant', headers=_headers(api_key), json=config, timeout=30)
+    response.raise_for_status()
+    return response.json()['id']
+
+
+def get_assistant_id(config: dict, api_key: str, api_url: str = VAPI_API_URL,
+                     store_path: str = ASSISTANT_STORE) -> str:
+    """Id of a pre-created assistant with exactly this config; created and remembered on first use."""
+    key = f'{api_url} {assistant_fingerprint(config)}'
+    store = {}
+    if os.path.exists(store_path):
+        with open(store_path, 'r') as f:
+            store = json.load(f)
+    if key not in store:
+        store[key] = create_assistant(config, api_key, api_url)
+        tmp_path = f'{store_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(store, f, indent=2)
+        os.replace(tmp_path, store_path)
+    return store[key]
+
+
+def call_payload(config: Optional[dict] = None, assistant_id: Optional[str] = None,
+                 overrides: Optional[dict] = None) -> dict:
+    """Body of ``POST /call/web``, as ``Vapi.start`` builds it: an inline config or a pre-created assistant."""
+    if assistant_id:
+        return {'assistantId': assistant_id, 'assistantOverrides': overrides}
+    return {'assistant': config, 'assistantOverrides': overrides}
+
+
+def create_web_call(payload: dict, api_key: str, api_url: str = VAPI_API_URL) -> Tuple[str, str]:
+    """Start a web call and return its id and the room URL to join."""
+    import httpx
+
+    response = httpx.post(f'{api_url}/call/web', headers=_headers(api_key), json=payload, timeout=30)
+    data = response.json()
+    if response.status_code != 201:
+        raise RuntimeError(f"Error: {data.get('message', data)}")
+    return data['id'], data['webCallUrl']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Talk to the Vapi voice assistant')
+    parser.add_argument('--reuse-assistant', action='store_true',
+                        help='Start from a pre-created assistant instead of sending the config inline')
+    args = parser.parse_args()
+
+    from vapi_python import Vapi
+
+    api_key = os.getenv('VAPI_API_KEY')
+    vapi = Vapi(api_key=api_key, api_url=VAPI_API_URL)
+    if args.reuse_assistant:
+        vapi.start(assistant_id=get_assistant_id(assistant, api_key))
+    else:
+        vapi.start(assistant=assistant)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,19 @@
 import json
 import os
+import argparse
+from functools import lru_cache
 from typing import TypedDict, Annotated, List
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, add_messages
-from deepgram import DeepgramClient, PrerecordedOptions, FileSource
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from openai import OpenAI
-import numpy as np
-from moviepy.editor import *
 import traceback
-import httpx
 from rich.console import Console
 from rich.panel import Panel
 from rich import print as rprint
+from agents.graph_streaming import stream_graph
+from common.llm_cache import cache_report
+from common.providers import get_structured_model, latency_report
 
 load_dotenv()
 
@@ -22,10 +21,22 @@ console = Console()
 
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# One ledger of used inspiration sources for every run, whatever its output_dir.
+GENERATED_VIDEOS_FILE = os.getenv("GENERATED_VIDEOS_FILE", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generated_videos.json"))
 
-# Initialize clients
-deepgram = DeepgramClient(DEEPGRAM_API_KEY)
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+# Clients are created on first use, so importing this module stays cheap.
+@lru_cache(maxsize=None)
+def deepgram_client():
+    from deepgram import DeepgramClient
+    return DeepgramClient(DEEPGRAM_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
 
 
 # Define our state
@@ -38,12 +49,9 @@ class AgentState(TypedDict):
     audio_filename: str
     inspiration_source: str
     video_filename: str
+    output_dir: str
 
 
-# Initialize our graph and model
-graph = StateGraph(AgentState)
-model = ChatOpenAI(model="gpt-4o-mini")
-
 
 # Define structured output schemas
 class PlanSchema(BaseModel):
@@ -79,21 +87,19 @@ class ProofreadSchema(BaseModel):
 
 
 # Helper functions
-def get_schema(schema_class):
-    if hasattr(schema_class, 'model_json_schema'):
-        schema = schema_class.model_json_schema()
-    elif hasattr(schema_class, 'schema'):
-        schema = schema_class.schema()
-    else:
-        raise AttributeError(f"{schema_class.__name__} has neither 'model_json_schema' nor 'schema' method")
-    return {
-        "name": schema_class.__name__,
-        "description": f"Schema for {schema_class.__name__}",
-        "parameters": schema
-    }
+def invoke_structured(stage, schema_class, messages):
+    """Run a stage on its configured provider and return the raw reply and the parsed schema.
+
+    Output that doesn't match the schema moves on to the stage's fallback provider.
+    """
+    output = get_structured_model(stage, schema_class, include_raw=True).invoke(messages)
+    return output["raw"], output["parsed"]
 
 
 def create_gradient_background(size, duration, start_color, end_color):
+    import numpy as np
+    from moviepy.editor import VideoClip
+
     def make_frame(t):
         progress = t / duration
         r = int(start_color[0] + (end_color[0] - start_color[0]) * progress)
@@ -104,7 +110,16 @@ def create_gradient_background(size, duration, start_color, end_color):
     return VideoClip(make_frame, duration=duration)
 
 
+# Each clip holds its rendered frame, so only keep a video's worth of repeated words alive in the worker.
+@lru_cache(maxsize=32)
+def text_sprite(text, fontsize, color, font, size=None):
+    """Rendered text clip, cached across repeated words; ``set_*`` returns copies, so sharing is safe."""
+    from moviepy.editor import TextClip
+    return TextClip(text, fontsize=fontsize, color=color, font=font, size=size)
+
+
 def animate_word(word, font_size=120, color='white', font='Arial-Bold', start_time=0, duration=1):
+    from moviepy.editor import TextClip
     clip = TextClip(word, fontsize=font_size, color=color, font=font, method='label')
     return (clip
             .set_start(start_time)
@@ -116,6 +131,9 @@ def animate_word(word, font_size=120, color='white', font='Arial-Bold', start_ti
 
 
 def transcribe_audio_file(audio_path):
+    import httpx
+    from deepgram import FileSource, PrerecordedOptions
+
     console.print(Panel(f"Transcribing audio: {audio_path}", border_style="cyan"))
     try:
         with open(audio_path, "rb") as file:
@@ -134,7 +152,7 @@ def transcribe_audio_file(audio_path):
             diarize=True,
         )
 
-        response = (deepgram.listen
+        response = (deepgram_client().listen
                     .prerecorded.v("1")
                     .transcribe_file(payload, options, timeout=httpx.Timeout(300.0, connect=10.0)))
         return json.loads(response.to_json())
@@ -153,13 +171,8 @@ def get_word_timings(audio_file):
 
 def planner(state):
     messages = state["messages"]
-    response = model.invoke(
-        messages + [HumanMessage(
-            content="You are a planner for 10-second sigma lifestyle motivation YouTube shorts. Create a brief plan for a short, inspiring video about sigma lifestyle. Choose a core theme relevant to sigma mentality such as self-reliance, personal growth, or unconventional success. Select an inspiration source from history, movies, living legends, or other notable figures/characters that hasn't been used before. The content should be simple, direct, and impactful.")],
-        functions=[get_schema(PlanSchema)],
-        function_call={"name": PlanSchema.__name__}
-    )
-    result = PlanSchema.parse_raw(response.additional_kwargs["function_call"]["arguments"])
+    response, result = invoke_structured("planner", PlanSchema, messages + [HumanMessage(
+        content="You are a planner for 10-second sigma lifestyle motivation YouTube shorts. Create a brief plan for a short, inspiring video about sigma lifestyle. Choose a core theme relevant to sigma mentality such as self-reliance, personal growth, or unconventional success. Select an inspiration source from history, movies, living legends, or other notable figures/characters that hasn't been used before. The content should be simple, direct, and impactful.")])
     console.print(Panel(f"Planner output:\n{result.json()}", border_style="cyan"))
     return {
         "messages": [response],
@@ -172,8 +185,9 @@ def planner(state):
 
 def is_video_generated(state):
     inspiration_source = state["inspiration_source"]
-    data_file = "../generated_videos.json"
-    if os.path.exists(data_file):
+    data_file = GENERATED_VIDEOS_FILE
+    # A missing or empty ledger means nothing has been generated yet.
+    if os.path.exists(data_file) and os.path.getsize(data_file):
         with open(data_file, "r") as f:
             generated_videos = json.load(f)
     else:
@@ -192,39 +206,24 @@ def is_video_generated(state):
 
 def script_generator(state):
     messages = state["messages"]
-    response = model.invoke(
-        messages + [HumanMessage(
-            content="Write a concise, motivational script for a 10-second sigma lifestyle-focused YouTube short. The script should be simple, direct, and inspiring, focusing on a single key point related to sigma mentality. Use the chosen inspiration source to illustrate the point. Use short, impactful sentences.")],
-        functions=[get_schema(ScriptSchema)],
-        function_call={"name": ScriptSchema.__name__}
-    )
-    result = ScriptSchema.parse_raw(response.additional_kwargs["function_call"]["arguments"])
+    response, result = invoke_structured("script_generator", ScriptSchema, messages + [HumanMessage(
+        content="Write a concise, motivational script for a 10-second sigma lifestyle-focused YouTube short. The script should be simple, direct, and inspiring, focusing on a single key point related to sigma mentality. Use the chosen inspiration source to illustrate the point. Use short, impactful sentences.")])
     console.print(Panel(f"Script generator output:\n{result.json()}", border_style="magenta"))
     return {"messages": [response], "script": result.script}
 
 
 def validator(state):
     messages = state["messages"]
-    response = model.invoke(
-        messages + [HumanMessage(
-            content="Review the generated script. Is it concise, motivational, and suitable for a 10-second sigma lifestyle-focused YouTube short? Does it effectively use the inspiration source to deliver a clear, inspiring message aligned with sigma mentality? If not, what specific improvements are needed to make it more impactful and concise?")],
-        functions=[get_schema(ValidationSchema)],
-        function_call={"name": ValidationSchema.__name__}
-    )
-    result = ValidationSchema.parse_raw(response.additional_kwargs["function_call"]["arguments"])
+    response, result = invoke_structured("validator", ValidationSchema, messages + [HumanMessage(
+        content="Review the generated script. Is it concise, motivational, and suitable for a 10-second sigma lifestyle-focused YouTube short? Does it effectively use the inspiration source to deliver a clear, inspiring message aligned with sigma mentality? If not, what specific improvements are needed to make it more impactful and concise?")])
     console.print(Panel(f"Validator output:\n{result.json()}", border_style="blue"))
     return {"messages": [response]}
 
 
 def finalizer(state):
     messages = state["messages"]
-    response = model.invoke(
-        messages + [HumanMessage(
-            content="Provide the final version of the title and script for the 10-second sigma lifestyle motivation YouTube short. Ensure the script is simple, direct, and inspiring, focusing on a single key point related to sigma mentality and effectively using the chosen inspiration source. The script must be suitable for a 10-second video. The title should be in 4-5 words not more than that.")],
-        functions=[get_schema(FinalSchema)],
-        function_call={"name": FinalSchema.__name__}
-    )
-    result = FinalSchema.parse_raw(response.additional_kwargs["function_call"]["arguments"])
+    response, result = invoke_structured("finalizer", FinalSchema, messages + [HumanMessage(
+        content="Provide the final version of the title and script for the 10-second sigma lifestyle motivation YouTube short. Ensure the script is simple, direct, and inspiring, focusing on a single key point related to sigma mentality and effectively using the chosen inspiration source. The script must be suitable for a 10-second video. The title should be in 4-5 words not more than that.")])
     console.print(Panel(f"Finalizer output:\n{result.json()}", border_style="green"))
     return {
         "messages": [response],
@@ -236,8 +235,9 @@ def finalizer(state):
 
 def generate_audio(state):
     script = state['script']
-    audio_filename = f"output_audio_{state['inspiration_source'].replace(' ', '_')}.mp3"
-    response = client.audio.speech.create(model="tts-1", voice="alloy", input=script)
+    audio_filename = os.path.join(state.get("output_dir", "."),
+                                  f"output_audio_{state['inspiration_source'].replace(' ', '_')}.mp3")
+    response = openai_client().audio.speech.create(model="tts-1", voice="alloy", input=script)
     if response.content:
         with open(audio_filename, "wb") as audio_file:
             audio_file.write(response.content)
@@ -251,18 +251,15 @@ def generate_audio(state):
 def proofreader(state):
     messages = state["messages"]
     script = state["script"]
-    response = model.invoke(
-        messages + [HumanMessage(
-            content=f"Proofread and correct the following script, fixing any spelling or grammar issues. Make sure it remains concise and impactful for a 10-second video. Here's the script:\n\n{script}")],
-        functions=[get_schema(ProofreadSchema)],
-        function_call={"name": ProofreadSchema.__name__}
-    )
-    result = ProofreadSchema.parse_raw(response.additional_kwargs["function_call"]["arguments"])
+    response, result = invoke_structured("proofreader", ProofreadSchema, messages + [HumanMessage(
+        content=f"Proofread and correct the following script, fixing any spelling or grammar issues. Make sure it remains concise and impactful for a 10-second video. Here's the script:\n\n{script}")])
     console.print(Panel(f"Proofreader output:\n{result.json()}", border_style="yellow"))
     return {"messages": [response], "script": result.corrected_script}
 
 
 def generate_video(state):
+    from moviepy.editor import AudioFileClip, ColorClip, CompositeVideoClip
+
     audio_file = state['audio_filename']
     title = state['title']
     script = state['script']
@@ -272,7 +269,7 @@ def generate_video(state):
     background = ColorClip(size=(1080, 1920), color=(0, 0, 0), duration=duration)
 
     # Add title
-    title_clip = TextClip(title, fontsize=70, color='white', font='Arial', size=(1080, 100))
+    title_clip = text_sprite(title, 70, 'white', 'Arial', (1080, 100))
     title_clip = title_clip.set_position(('center', 100)).set_duration(duration)
 
     # Get word timings
@@ -286,7 +283,7 @@ def generate_video(state):
     max_width = 900  # Maximum width for text before wrapping
 
     for word, start, end in word_timings:
-        word_clip = TextClip(word, fontsize=50, color='white', font='Arial')
+        word_clip = text_sprite(word, 50, 'white', 'Arial')
         if line_width + word_clip.w > max_width:
             lines.append(current_line)
             current_line = []
@@ -314,7 +311,7 @@ def generate_video(state):
             word_clips.append(normal_clip)
 
             # Highlighted word
-            highlight_clip = TextClip(word, fontsize=50, color='yellow', font='Arial')
+            highlight_clip = text_sprite(word, 50, 'yellow', 'Arial')
             highlight_clip = highlight_clip.set_position((x_position, y_position))
             highlight_clip = highlight_clip.set_start(start).set_end(end)
             word_clips.append(highlight_clip)
@@ -330,52 +327,65 @@ def generate_video(state):
     final_video = video.set_audio(AudioFileClip(audio_file))
 
     # Write video file
-    output_filename = f"output_video_{state['inspiration_source'].replace(' ', '_')}.mp4"
+    output_filename = os.path.join(state.get("output_dir", "."),
+                                   f"output_video_{state['inspiration_source'].replace(' ', '_')}.mp4")
     final_video.write_videofile(output_filename, fps=24)
 
     console.print(Panel(f"Video generated: {output_filename}", border_style="green"))
     return {"video_filename": output_filename}
 
 
-# Set up the graph
-graph.add_node("planner", planner)
-graph.add_node("is_video_generated", is_video_generated)
-graph.add_node("script_generator", script_generator)
-graph.add_node("validator", validator)
-graph.add_node("proofreader", proofreader)
-graph.add_node("finalizer", finalizer)
-graph.add_node("audio_generator", generate_audio)
-graph.add_node("video_generator", generate_video)
-
-graph.add_edge("planner", "is_video_generated")
-graph.add_conditional_edges(
-    "is_video_generated",
-    lambda x: "planner" if "Please generate a new plan" in x["messages"][-1].content else "script_generator"
-)
-graph.add_edge("script_generator", "validator")
-graph.add_edge("validator", "proofreader")
-graph.add_edge("proofreader", "finalizer")
-graph.add_edge("finalizer", "audio_generator")
-graph.add_edge("audio_generator", "video_generator")
-
-graph.set_entry_point("planner")
-workflow = graph.compile()
-input_state = {
-    "messages": [HumanMessage(
-        content="Create a 10-second YouTube short with a simple, motivational message about sigma lifestyle, using a historical figure, movie character, or living legend as inspiration.")],
-    "title": "",
-    "script": "",
-    "category": "",
-    "sigma_topic": "",
-    "audio_filename": "",
-    "inspiration_source": "",
-    "video_filename": "",
-}
-
-
-def run_workflow():
+@lru_cache(maxsize=None)
+def get_workflow():
+    """Build and compile the graph on first use."""
+    graph = StateGraph(AgentState)
+    graph.add_node("planner", planner)
+    graph.add_node("is_video_generated", is_video_generated)
+    graph.add_node("script_generator", script_generator)
+    graph.add_node("validator", validator)
+    graph.add_node("proofreader", proofreader)
+    graph.add_node("finalizer", finalizer)
+    graph.add_node("audio_generator", generate_audio)
+    graph.add_node("video_generator", generate_video)
+
+    graph.add_edge("planner", "is_video_generated")
+    graph.add_conditional_edges(
+        "is_video_generated",
+        lambda x: "planner" if "Please generate a new plan" in x["messages"][-1].content else "script_generator"
+    )
+    graph.add_edge("script_generator", "validator")
+    graph.add_edge("validator", "proofreader")
+    graph.add_edge("proofreader", "finalizer")
+    graph.add_edge("finalizer", "audio_generator")
+    graph.add_edge("audio_generator", "video_generator")
+
+    graph.set_entry_point("planner")
+    return graph.compile()
+
+
+def initial_state(output_dir: str = "."):
+    """Graph input; audio and video files are written to ``output_dir``."""
+    return {
+        "messages": [HumanMessage(
+            content="Create a 10-second YouTube short with a simple, motivational message about sigma lifestyle, using a historical figure, movie character, or living legend as inspiration.")],
+        "title": "",
+        "script": "",
+        "category": "",
+        "sigma_topic": "",
+        "audio_filename": "",
+        "inspiration_source": "",
+        "video_filename": "",
+        "output_dir": output_dir,
+    }
+
+
+def run_workflow(stream: bool = False):
     try:
-        result = workflow.invoke(input_state)
+        workflow = get_workflow()
+        if stream:
+            result, _ = stream_graph(workflow, initial_state(), console)
+        else:
+            result = workflow.invoke(initial_state())
         console.print(Panel("Final Result", style="bold green"))
         rprint(f"[bold]Title:[/bold] {result['title']}")
         rprint(f"[bold]Category:[/bold] {result['category']}")
@@ -384,6 +394,8 @@ def run_workflow():
         rprint(f"[bold]Script:[/bold] {result['script']}")
         rprint(f"[bold]Audio Filename:[/bold] {result['audio_filename']}")
         rprint(f"[bold]Video Filename:[/bold] {result['video_filename']}")
+        latency_report()
+        cache_report()
     except Exception as e:
         console.print(Panel(f"An error occurred: {str(e)}", style="bold red"))
         console.print("Full traceback:")
@@ -395,7 +407,15 @@ def run_workflow():
             console.print("Result not available")
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Generate a sigma lifestyle motivation short")
+    parser.add_argument("--stream", action="store_true", help="Stream tokens from each graph node live")
+    args = parser.parse_args()
+
     console.print(Panel("🎬 Sigma Lifestyle Video Generator", style="bold cyan"))
-    run_workflow()
+    run_workflow(args.stream)
     console.print(Panel("🎉 Workflow Completed!", style="bold green"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import asyncio
+import base64
+import hashlib
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Union
+import httpx
+
+# Only what a replayed response needs; auth, cookies and org ids are never written to disk.
+KEPT_RESPONSE_HEADERS = {"content-type", "retry-after", "x-request-id"}
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+def request_key(request: httpx.Request) -> str:
+    """Method, URL and a digest of the body (JSON bodies canonicalized so key order doesn't matter)."""
+    body = request.content or b""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    return f"{request.method} {request.url} {hashlib.sha256(body).hexdigest()}"
+
+
+class Cassette:
+    """Recorded HTTP interactions for one pipeline, replayed in recording order per request key."""
+
+    def __init__(self, path: str, mode: str = "replay", latency: Union[None, str, float] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.latency = latency  # None: no delay, "recorded": the original round trip, or fixed seconds
+        self.interactions: List[dict] = []
+        self.served = 0
+        self._pending: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        if mode == "replay":
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No cassette at {path}; record it first")
+            with open(path, "r") as f:
+                self.interactions = json.load(f)["interactions"]
+            for interaction in self.interactions:
+                self._pending[interaction["key"]].append(interaction)
+
+    def record(self, request: httpx.Request, response: httpx.Response, elapsed: float) -> httpx.Response:
+        interaction = {
+            "key": request_key(request),
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() in KEPT_RESPONSE_HEADERS},
+            "body": base64.b64encode(response.content).decode("ascii"),
+            "elapsed": elapsed,
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+        return self._response(request, interaction)
+
+    def replay(self, request: httpx.Request) -> Tuple[httpx.Response, float]:
+        """The next recorded response for this request and how long to delay it."""
+        key = request_key(request)
+        with self._lock:
+            if not self._pending[key]:
+                raise CassetteMiss(f"No recorded response for {request.method} {request.url}")
+            interaction = self._pending[key].popleft()
+            self.served += 1
+        if self.latency is None:
+            delay = 0.0
+        else:
+            delay = interaction["elapsed"] if self.latency == "recorded" else float(self.latency)
+        return self._response(request, interaction), delay
+
+    @staticmethod
+    def _response(request: httpx.Request, interaction: dict) -> httpx.Response:
+        return httpx.Response(interaction["status"], headers=interaction["headers"],
+                              content=base64.b64decode(interaction["body"]), request=request)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "interactions": self.interactions}, f)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def requests(self) -> int:
+        return len(self.interactions) if self.mode == "record" else self.served
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay", latency: Union[None, str, float] = None):
+    """Patch ``httpx.Client.send``/``AsyncClient.send``, which the OpenAI, Ollama and Deepgram SDKs all use."""
+    cassette = Cassette(path, mode, latency)
+    original_send = httpx.Client.send
+    original_async_send = httpx.AsyncClient.send
+
+    def send(client, request, **kwargs):
+        if cassette.mode == "replay":
+            response, delay = cassette.replay(request)
+            time.sleep(delay)
+            return response
+        start = time.perf_counter()
+        response = original_send(client, request, **kwargs)
+        response.read()
+        return cassette.record(request, response, time.perf_counter() - start)
+
+    async def async_send(client, request, **kwargs):
+        if cassette.mode == "replay":
+            response, delay = cassette.replay(request)
+            await asyncio.sleep(delay)
+            return response
+        start = time.perf_counter()
+        response = await original_async_send(client, request, **kwargs)
+        await response.aread()
+        return cassette.record(request, response, time.perf_counter() - start)
+
+    httpx.Client.send = send
+    httpx.AsyncClient.send = async_send
+    try:
+        yield cassette
+    finally:
+        httpx.Client.send = original_send
+        httpx.AsyncClient.send = original_async_send
+        if mode == "record":
+            cassette.save()
+
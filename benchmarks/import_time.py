@@ -0,0 +1,104 @@
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy SDKs that the scripts need only once they actually do work.
+LLM_SDKS = ("openai", "instructor", "langchain_openai", "langchain_ollama")
+
+
+@dataclass
+class ImportBudget:
+    module: str  # imported from the repo root, as ``python -m`` runs it
+    budget_ms: float
+    forbidden: Tuple[str, ...] = ()  # top-level packages that must not be imported eagerly
+
+
+BUDGETS: List[ImportBudget] = [
+    ImportBudget("common.providers", 400, LLM_SDKS + ("langchain_core",)),
+    ImportBudget("agents.video_generator.video_generator_agent", 2000, LLM_SDKS + ("moviepy", "deepgram")),
+    ImportBudget("agents.joke_generator_agent", 1500, LLM_SDKS),
+    ImportBudget("generation.text_movie_plot_generator", 600, LLM_SDKS + ("langchain_core",)),
+    ImportBudget("generation.parallel_plot_generator", 600, LLM_SDKS + ("langchain_core",)),
+    ImportBudget("vision.12_marksheet_extraction", 600, LLM_SDKS + ("langchain_core", "pypdf", "pdf2image", "PIL")),
+    ImportBudget("vision.vision_chat_assistant", 600, LLM_SDKS + ("langchain_core", "PIL")),
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(entry: ImportBudget) -> dict:
+    """Import the module in a fresh interpreter with ``-X importtime``."""
+    # __import__ rather than importlib.import_module: only the C import path is timed.
+    code = f"import json, sys; __import__({entry.module!r}); print(json.dumps(sorted(sys.modules)))"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {completed.returncode}"}
+
+    cumulative: Dict[str, int] = {}
+    direct: List[Tuple[str, int]] = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, total_us, indent, name = match.groups()
+        cumulative[name] = int(total_us)
+        if len(indent) == 3:  # imported directly by a top-level import, i.e. by the script
+            direct.append((name, int(total_us)))
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "ms": cumulative.get(entry.module, 0) / 1000,
+        "slowest": sorted(direct, key=lambda item: item[1], reverse=True)[:3],
+        "eager": sorted({name.split(".")[0] for name in loaded} & set(entry.forbidden)),
+    }
+
+
+def run(entries: List[ImportBudget], runs: int, scale: float) -> bool:
+    table = Table(title=f"🚀 Import time (best of {runs}, fresh interpreter)", header_style="bold blue")
+    table.add_column("Module", style="cyan")
+    table.add_column("Import (ms)", justify="right", style="green")
+    table.add_column("Budget (ms)", justify="right", style="yellow")
+    table.add_column("Slowest direct imports (ms)", style="dim")
+    table.add_column("Eager heavy imports", style="red")
+    table.add_column("Status")
+
+    ok = True
+    for entry in entries:
+        results = [measure(entry) for _ in range(runs)]
+        result: Optional[dict] = next((r for r in results if "error" in r), None) or \
+            min(results, key=lambda r: r["ms"])
+        budget = entry.budget_ms * scale
+        if "error" in result:
+            ok = False
+            table.add_row(entry.module, "-", f"{budget:.0f}", result["error"], "", "[red]import failed[/red]")
+            continue
+        passed = result["ms"] <= budget and not result["eager"]
+        ok = ok and passed
+        slowest = ", ".join(f"{name} {us / 1000:.0f}" for name, us in result["slowest"])
+        table.add_row(entry.module, f"{result['ms']:.0f}", f"{budget:.0f}", slowest, ", ".join(result["eager"]),
+                      "[green]ok[/green]" if passed else "[red]over budget[/red]")
+    console.print(table)
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check script import times against a startup budget")
+    parser.add_argument("modules", nargs="*", help="Only these modules (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter runs per module; the best counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. 2 on a slow CI box")
+    args = parser.parse_args()
+
+    selected = [entry for entry in BUDGETS if not args.modules or entry.module in args.modules]
+    sys.exit(0 if run(selected, args.runs, args.scale) else 1)
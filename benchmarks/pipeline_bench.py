@@ -0,0 +1,318 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import importlib
+import subprocess
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASSETTE_DIR = os.path.join(REPO_ROOT, "benchmarks", "cassettes")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+class StageTimer:
+    """Wall time per stage, summed over calls, plus item counts (pages, images, frames) per stage."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.items: Dict[str, Tuple[str, int]] = {}  # item name -> (stage, count)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.seconds[stage] += seconds
+
+    def count(self, item: str, stage: str, n: int) -> None:
+        self.items[item] = (stage, self.items.get(item, (stage, 0))[1] + n)
+
+    def wrap(self, owner, name: str, stage: Optional[str] = None,
+             count: Optional[Tuple[str, Callable]] = None) -> None:
+        """Replace ``owner.name`` with a timed version; ``count=(item, fn)`` counts items in each result."""
+        original = getattr(owner, name)
+        stage = stage or name
+
+        def finish(start: float, result):
+            self.add(stage, time.perf_counter() - start)
+            if count is not None and result is not None:
+                self.count(count[0], stage, count[1](result))
+            return result
+
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                return finish(start, await original(*args, **kwargs))
+        else:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                return finish(start, original(*args, **kwargs))
+        setattr(owner, name, timed)
+
+    def throughput(self) -> Dict[str, float]:
+        return {f"{item}_per_second": n / self.seconds[stage]
+                for item, (stage, n) in self.items.items() if self.seconds.get(stage)}
+
+
+def bench_video(timer: StageTimer) -> None:
+    module = importlib.import_module("agents.video_generator.video_generator_agent")
+    timer.wrap(module, "get_word_timings", "transcription")
+    start = time.perf_counter()
+    workflow = module.get_workflow()
+    timer.add("graph_compile", time.perf_counter() - start)
+
+    # Nodes run one after another, so the time between updates is the node's time.
+    video_filename, last = None, time.perf_counter()
+    for update in workflow.stream(module.initial_state(), stream_mode="updates"):
+        now = time.perf_counter()
+        for node, values in update.items():
+            timer.add(node, now - last)
+            video_filename = (values or {}).get("video_filename", video_filename)
+        last = now
+
+    from moviepy.editor import VideoFileClip
+    with VideoFileClip(video_filename) as clip:
+        timer.count("frames", "video_generator", int(clip.duration * clip.fps))
+
+
+def bench_marksheet(timer: StageTimer) -> None:
+    module = importlib.import_module("vision.12_marksheet_extraction")
+    timer.wrap(module, "convert_pdf_to_images", "pdf_to_images", count=("pages", len))
+    timer.wrap(module, "extract_marksheet_details", "extraction")
+    if not module.process_files(os.path.join(REPO_ROOT, "vision", "marksheet_docs")):
+        raise RuntimeError("no marksheet was extracted")
+
+
+def bench_screenshots(timer: StageTimer) -> None:
+    module = importlib.import_module("vision.vision_chat_assistant")
+    timer.wrap(module, "preprocess_directory", "preprocess", count=("images", len))
+    timer.wrap(module, "request_replies", "replies")
+    if not module.process_screenshots(os.path.join(REPO_ROOT, "vision", "screenshots")):
+        raise RuntimeError("no screenshot was processed")
+
+
+def bench_plot(timer: StageTimer) -> None:
+    module = importlib.import_module("generation.parallel_plot_generator")
+    timer.wrap(module, "generate_tamil_movie_plot", "single_call")
+    timer.wrap(module, "generate_skeleton", "skeleton")
+    timer.wrap(module, "generate_scene", "scenes_summed", count=("scenes", lambda _: 1))
+    if module.generate_tamil_movie_plot(module.DEFAULT_PROMPT) is None \
+            or module.generate_plot(module.DEFAULT_PROMPT) is None:
+        raise RuntimeError("plot generation failed")
+
+
+def bench_ollama_tools(timer: StageTimer) -> None:
+    module = importlib.import_module("ollama_local_models.ollama_local_llm_extraction")
+    registry = module.registry
+    timer.wrap(registry, "execute", "tool_execution", count=("tool_calls", len))
+    start = time.perf_counter()
+    tools, _ = module.route_tools(module.USER_PROMPT, registry.schemas)
+    timer.add("routing", time.perf_counter() - start)
+
+    # The same path the script takes: a preloaded warm runtime driven call by call from one loop.
+    timer.wrap(module.OllamaRuntime, "preload", "preload")
+    timer.wrap(module.OllamaRuntime, "chat", "chat")
+    loop = asyncio.new_event_loop()
+    runtime = module.OllamaRuntime(module.MODEL)
+    try:
+        loop.run_until_complete(runtime.preload())
+
+        def chat(model, messages, **kwargs):
+            return loop.run_until_complete(runtime.chat(messages, **kwargs))
+
+        module.run_tool_conversation(chat, module.MODEL, [{"role": "user", "content": module.USER_PROMPT}],
+                                     registry, tools=tools)
+    finally:
+        loop.close()
+
+
+PIPELINES: Dict[str, Callable[[StageTimer], None]] = {
+    "video": bench_video,
+    "marksheet": bench_marksheet,
+    "screenshots": bench_screenshots,
+    "plot": bench_plot,
+    "ollama_tools": bench_ollama_tools,
+}
+
+
+def _peak_rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def run_one(name: str, mode: str, latency) -> dict:
+    """Run one pipeline in this process (the suite gives each its own, so peak RSS is per pipeline)."""
+    # Every call must reach the cassette: no disk cache, no client-side rate limiting.
+    os.environ["LLM_CACHE"] = "off"
+    os.environ["LLM_GATEWAY_RPM"] = "0"
+    # The video agent's dedupe ledger changes which plan it picks, so each run starts from an empty one.
+    os.environ["GENERATED_VIDEOS_FILE"] = os.path.abspath("generated_videos.json")
+    if mode == "replay":
+        for key in ("OPENAI_API_KEY", "DEEPGRAM_API"):
+            os.environ.setdefault(key, "replay")
+    from benchmarks.cassettes import use_cassette
+
+    timer = StageTimer()
+    result = {"error": None}
+    cassette = None
+    start = time.perf_counter()
+    try:
+        with use_cassette(os.path.join(CASSETTE_DIR, f"{name}.json"), mode, latency) as cassette:
+            PIPELINES[name](timer)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result.update({
+        "wall_seconds": time.perf_counter() - start,
+        "stages": dict(timer.seconds),
+        "items": {item: n for item, (_, n) in timer.items.items()},
+        "throughput": timer.throughput(),
+        "requests": cassette.requests if cassette is not None else 0,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "children_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    })
+    return result
+
+
+def run_suite(names, mode: str, latency, output: str, verbose: bool) -> dict:
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": mode,
+        "latency": latency,
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "pipelines": {},
+    }
+    for name in names:
+        # A scratch working directory per run: scripts write images, audio, video and
+        # the video ledger relative to where they run.
+        with tempfile.TemporaryDirectory() as scratch, console.status(f"[bold green]{mode.capitalize()}ing {name}..."):
+            workdir = os.path.join(scratch, "run")
+            os.makedirs(workdir)
+            result_path = os.path.join(scratch, "result.json")
+            command = [sys.executable, "-m", "benchmarks.pipeline_bench", "run-one", name, "--mode", mode,
+                       "--result", result_path] + (["--latency", str(latency)] if latency is not None else [])
+            # Run from the scratch directory, with the repo importable as when run from its root.
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+            completed = subprocess.run(command, cwd=workdir, env=env, stdout=None if verbose else subprocess.DEVNULL,
+                                       stderr=None if verbose else subprocess.PIPE, text=True)
+            if os.path.exists(result_path):
+                with open(result_path, "r") as f:
+                    report["pipelines"][name] = json.load(f)
+            else:
+                lines = (completed.stderr or "").strip().splitlines()
+                report["pipelines"][name] = {"error": lines[-1] if lines else f"exit code {completed.returncode}"}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    console.print(f"Results written to {output}", style="dim")
+    return report
+
+
+def print_report(report: dict) -> None:
+    table = Table(title=f"⏱️ Pipeline benchmark ({report['mode']}, latency={report['latency']})",
+                  header_style="bold blue")
+    table.add_column("Pipeline", style="cyan")
+    table.add_column("Wall (s)", justify="right", style="green")
+    table.add_column("Stages (s)")
+    table.add_column("Throughput")
+    table.add_column("Requests", justify="right")
+    table.add_column("Peak RSS (MB)", justify="right", style="yellow")
+    for name, result in report["pipelines"].items():
+        if result.get("error") and "wall_seconds" not in result:
+            table.add_row(name, "-", f"[red]{result['error']}[/red]", "", "", "")
+            continue
+        stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in result["stages"].items())
+        if result["error"]:
+            stages += f"\n[red]{result['error']}[/red]"
+        throughput = ", ".join(f"{key} {value:.1f}" for key, value in result["throughput"].items())
+        rss = f"{result['peak_rss_mb']:.0f}"
+        if result["children_peak_rss_mb"]:
+            rss += f" (+{result['children_peak_rss_mb']:.0f})"
+        table.add_row(name, f"{result['wall_seconds']:.2f}", stages, throughput, str(result["requests"]), rss)
+    console.print(table)
+
+
+def _metrics(result: dict) -> Dict[str, float]:
+    metrics = {"wall_seconds": result.get("wall_seconds"), "peak_rss_mb": result.get("peak_rss_mb")}
+    metrics.update({f"stage:{stage}": seconds for stage, seconds in (result.get("stages") or {}).items()})
+    return {key: value for key, value in metrics.items() if value is not None}
+
+
+def compare(baseline_path: str, candidate_path: str, threshold: float) -> bool:
+    """Print per-metric changes; returns False if anything got slower or bigger by more than ``threshold``."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    with open(candidate_path, "r") as f:
+        candidate = json.load(f)
+
+    table = Table(title=f"📊 {os.path.basename(baseline_path)} → {os.path.basename(candidate_path)}",
+                  header_style="bold blue")
+    for column in ("Pipeline", "Metric", "Baseline", "Candidate", "Change"):
+        table.add_column(column, justify="right" if column in ("Baseline", "Candidate", "Change") else "left")
+    ok = True
+    for name in sorted(set(baseline["pipelines"]) & set(candidate["pipelines"])):
+        before, after = _metrics(baseline["pipelines"][name]), _metrics(candidate["pipelines"][name])
+        for metric in sorted(set(before) & set(after)):
+            if not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            regressed = change > threshold
+            ok = ok and not regressed
+            style = "red" if regressed else ("green" if change < -threshold else "white")
+            table.add_row(name, metric, f"{before[metric]:.2f}", f"{after[metric]:.2f}",
+                          f"[{style}]{change:+.1%}[/{style}]")
+    console.print(table)
+    return ok
+
+
+def _latency(value: Optional[str]):
+    if value in (None, "none"):
+        return None
+    return value if value == "recorded" else float(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record API responses once, then benchmark every pipeline offline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command in ("record", "replay"):
+        sub = commands.add_parser(command, help=f"{command.capitalize()} the pipelines' HTTP traffic")
+        sub.add_argument("pipelines", nargs="*", help=f"Pipelines to run (default: all of {', '.join(PIPELINES)})")
+        sub.add_argument("--latency", default=None,
+                         help="Replay delay per request: 'recorded', seconds, or none (default)")
+        sub.add_argument("--output", default=None, help="Results JSON (default: benchmarks/results/<time>.json)")
+        sub.add_argument("--verbose", action="store_true", help="Show the pipelines' own output")
+
+    one = commands.add_parser("run-one", help=argparse.SUPPRESS)
+    one.add_argument("pipeline", choices=list(PIPELINES))
+    one.add_argument("--mode", choices=("record", "replay"), required=True)
+    one.add_argument("--latency", default=None)
+    one.add_argument("--result", required=True)
+
+    diff = commands.add_parser("compare", help="Compare two results files")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument("--threshold", type=float, default=0.10, help="Relative change that counts as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run-one":
+        outcome = run_one(args.pipeline, args.mode, _latency(args.latency))
+        with open(args.result, "w") as f:
+            json.dump(outcome, f)
+    elif args.command == "compare":
+        sys.exit(0 if compare(args.baseline, args.candidate, args.threshold) else 1)
+    else:
+        unknown = set(args.pipelines) - set(PIPELINES)
+        if unknown:
+            parser.error(f"unknown pipeline(s): {', '.join(sorted(unknown))}")
+        output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{args.command}.json")
+        run_suite(args.pipelines or list(PIPELINES), args.command, _latency(args.latency), output, args.verbose)
@@ -0,0 +1,442 @@
+import os
+import json
+import math
+import time
+import wave
+import socket
+import tempfile
+import argparse
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+from rich.console import Console
+from rich.table import Table
+
+from agents.sts.mock_vapi_server import (FRAME_BYTES, FRAME_MS, FRAME_SAMPLES, SAMPLE_RATE, SILENCE, VOICE_RMS,
+                                         frame_rms, latency_overrides, parse_room_url, start_mock_vapi, tone)
+from agents.sts.vapi_voice_agent import (ASSISTANT_STORE, VAPI_API_URL, assistant, call_payload, create_web_call,
+                                         get_assistant_id)
+
+console = Console()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+PAUSE_BEFORE_TURN = 0.4  # a caller doesn't answer the instant the bot stops
+
+
+class LocalRoomTransport:
+    """Caller side of the mock room: raw PCM frames both ways over TCP."""
+
+    def join(self, url: str) -> None:
+        host, port, call_id = parse_room_url(url)
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(f"JOIN {call_id}\n".encode("utf-8"))
+        self.reader = self.sock.makefile("rb")
+
+    def write(self, frame: bytes) -> None:
+        self.sock.sendall(frame)
+
+    def read(self) -> bytes:
+        return self.reader.read(FRAME_BYTES)
+
+    def leave(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+@lru_cache(maxsize=None)
+def _daily_devices():
+    """Daily can only be initialised once per process, and device names must be unique."""
+    import daily
+
+    daily.Daily.init()
+    mic = daily.Daily.create_microphone_device("harness-mic", sample_rate=SAMPLE_RATE, channels=1)
+    speaker = daily.Daily.create_speaker_device("harness-speaker", sample_rate=SAMPLE_RATE, channels=1)
+    daily.Daily.select_speaker_device("harness-speaker")
+    return daily, mic, speaker
+
+
+class DailyTransport:
+    """Caller side of a real Vapi call: virtual Daily mic and speaker, set up the way vapi_python does."""
+
+    def join(self, url: str) -> None:
+        daily, self.mic, self.speaker = _daily_devices()
+        transport = self
+
+        class Handler(daily.EventHandler):
+            def on_participant_updated(self, participant):
+                # The bot only starts talking once we say its track is playable.
+                microphone = participant.get("media", {}).get("microphone", {})
+                if participant.get("info", {}).get("userName") == "Vapi Speaker" \
+                        and microphone.get("subscribed") == "subscribed" and microphone.get("state") == "playable":
+                    transport.client.send_app_message("playable")
+
+        joined = threading.Event()
+        errors = []
+
+        def on_joined(data, error):
+            errors.append(error)
+            joined.set()
+
+        self.client = daily.CallClient(event_handler=Handler())
+        self.client.update_inputs({"camera": False,
+                                   "microphone": {"isEnabled": True, "settings": {"deviceId": "harness-mic"}}})
+        self.client.update_subscription_profiles({"base": {"camera": "unsubscribed", "microphone": "subscribed"}})
+        self.client.join(url, completion=on_joined)
+        if not joined.wait(30) or errors[0]:
+            raise RuntimeError(f"Could not join the call: {errors[0] if errors else 'timed out'}")
+
+    def write(self, frame: bytes) -> None:
+        self.mic.write_frames(frame)
+
+    def read(self) -> bytes:
+        return self.speaker.read_frames(FRAME_SAMPLES)
+
+    def leave(self) -> None:
+        left = threading.Event()
+        self.client.leave(completion=lambda error: left.set())
+        left.wait(10)
+        self.client.release()
+
+
+class Utterance:
+    def __init__(self, frames: List[bytes]):
+        self.frames = deque(frames)
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.began = threading.Event()
+        self.done = threading.Event()
+
+
+class CallAudio:
+    """Feeds the caller's mic in real time and turns the bot's audio into speech start/stop events."""
+
+    def __init__(self, transport, hangover_ms: float):
+        self.transport = transport
+        self.hangover_ms = hangover_ms
+        self.current: Optional[Utterance] = None
+        self.events: List[tuple] = []  # ("start" | "stop", monotonic time)
+        self.changed = threading.Condition()
+        self.running = True
+
+    def start(self) -> None:
+        threading.Thread(target=self._mic_loop, daemon=True).start()
+        threading.Thread(target=self._speaker_loop, daemon=True).start()
+
+    def say(self, frames: List[bytes]) -> Utterance:
+        utterance = Utterance(frames)
+        self.current = utterance
+        return utterance
+
+    def _mic_loop(self) -> None:
+        # A mic never stops sending: silence between utterances, paced at real time.
+        next_at = time.monotonic()
+        while self.running:
+            utterance = self.current
+            frame = SILENCE
+            if utterance is not None and utterance.frames:
+                frame = utterance.frames.popleft()
+                if utterance.started is None:
+                    utterance.started = time.monotonic()
+                    utterance.began.set()
+            try:
+                self.transport.write(frame)
+            except OSError:
+                break
+            if utterance is not None and not utterance.frames and utterance.finished is None:
+                utterance.finished = time.monotonic()
+                utterance.done.set()
+                self.current = None
+            next_at += FRAME_MS / 1000
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+    def _speaker_loop(self) -> None:
+        speaking, silent_ms, silence_started = False, 0, 0.0
+        while self.running:
+            try:
+                frame = self.transport.read()
+            except OSError:
+                break
+            if not frame:
+                break
+            now = time.monotonic()
+            if frame_rms(frame) > VOICE_RMS:
+                silent_ms = 0
+                if not speaking:
+                    speaking = True
+                    self._record("start", now)
+            elif speaking:
+                if silent_ms == 0:
+                    silence_started = now
+                silent_ms += FRAME_MS
+                if silent_ms >= self.hangover_ms:
+                    speaking = False
+                    self._record("stop", silence_started)  # when it went quiet, not when we were sure
+
+    def _record(self, kind: str, at: float) -> None:
+        with self.changed:
+            self.events.append((kind, at))
+            self.changed.notify_all()
+
+    def wait_for(self, kind: str, after: float, timeout: float) -> Optional[float]:
+        """Time of the first ``kind`` event at or after ``after``; None on timeout."""
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            while True:
+                found = next((at for event, at in self.events if event == kind and at >= after), None)
+                remaining = deadline - time.monotonic()
+                if found is not None or remaining <= 0:
+                    return found
+                self.changed.wait(remaining)
+
+    def close(self) -> None:
+        self.running = False
+        self.transport.leave()
+
+
+@dataclass
+class Variant:
+    reuse: bool
+    recording: bool
+    interruptions: bool
+
+    @property
+    def name(self) -> str:
+        return (f"{'reused' if self.reuse else 'inline'} · rec {'on' if self.recording else 'off'} · "
+                f"interrupt {'on' if self.interruptions else 'off'}")
+
+    def config(self) -> dict:
+        return dict(assistant, recordingEnabled=self.recording, interruptionsEnabled=self.interruptions)
+
+
+def load_turn(path: str) -> List[bytes]:
+    """A WAV file as 16 kHz mono frames, trimmed to its speech so turn latency starts at the last word."""
+    import numpy as np
+
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        rate, channels = f.getframerate(), f.getnchannels()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        samples = np.interp(np.arange(0, len(samples), rate / SAMPLE_RATE), np.arange(len(samples)), samples)
+    pcm = samples.astype(np.int16).tobytes()
+    frames = [pcm[i:i + FRAME_BYTES].ljust(FRAME_BYTES, b"\0") for i in range(0, len(pcm), FRAME_BYTES)]
+    voiced = [i for i, frame in enumerate(frames) if frame_rms(frame) > VOICE_RMS]
+    if not voiced:
+        raise ValueError(f"{path}: no speech above the voice threshold")
+    return frames[voiced[0]:voiced[-1] + 1]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def run_session(payload: dict, api_key: str, api_url: str, transport, turns: List[List[bytes]],
+                barge_in_ms: Optional[float], interruptions: bool, hangover_ms: float, timeout: float) -> dict:
+    """One call: start it, wait for the first message, then speak each turn and time the replies."""
+    result = {"turn_ms": [], "interruption_ms": [], "timeouts": 0}
+    start = time.monotonic()
+    _, url = create_web_call(payload, api_key, api_url)
+    created = time.monotonic()
+    transport.join(url)
+    result.update({"create_call_ms": _ms(created - start), "join_ms": _ms(time.monotonic() - created)})
+    audio = CallAudio(transport, hangover_ms)
+    audio.start()
+    try:
+        first = audio.wait_for("start", start, timeout)
+        if first is None:
+            result["timeouts"] += 1
+            return result
+        result["first_message_ms"] = _ms(first - start)
+        audio.wait_for("stop", first, timeout)
+
+        for frames in turns:
+            time.sleep(PAUSE_BEFORE_TURN)
+            utterance = audio.say(frames)
+            utterance.done.wait()
+            reply = audio.wait_for("start", utterance.finished, timeout)
+            if reply is None:
+                result["timeouts"] += 1
+                continue
+            result["turn_ms"].append(_ms(reply - utterance.finished))
+            if barge_in_ms is None:
+                audio.wait_for("stop", reply, timeout)
+                continue
+
+            # Talk over the reply and time how long the bot keeps going.
+            time.sleep(max(0.0, reply + barge_in_ms / 1000 - time.monotonic()))
+            barge = audio.say(turns[0])
+            barge.began.wait()
+            stopped = audio.wait_for("stop", barge.started, timeout)
+            if stopped is None:
+                result["timeouts"] += 1
+                continue
+            result["interruption_ms"].append(_ms(stopped - barge.started))
+            barge.done.wait()
+            if interruptions:  # otherwise the bot never heard it
+                answer = audio.wait_for("start", barge.finished, timeout)
+                if answer is not None:
+                    audio.wait_for("stop", answer, timeout)
+    finally:
+        audio.close()
+    return result
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low, high = math.floor(position), math.ceil(position)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(values: List[float]) -> dict:
+    return {"n": len(values), "p50": percentile(values, 0.5), "p90": percentile(values, 0.9),
+            "p99": percentile(values, 0.99)}
+
+
+def run_variant(variant: Variant, sessions: int, api_key: str, api_url: str, store_path: str, transport_factory,
+                turns: List[List[bytes]], barge_in_ms: Optional[float], hangover_ms: float, timeout: float) -> dict:
+    report = {"assistant_setup_ms": None, "errors": [], "timeouts": 0}
+    samples: Dict[str, List[float]] = {key: [] for key in
+                                       ("create_call_ms", "join_ms", "first_message_ms", "turn_ms", "interruption_ms")}
+    config = variant.config()
+    if variant.reuse:
+        # One-off, outside the per-session numbers: that is the point of reusing it.
+        start = time.monotonic()
+        payload = call_payload(assistant_id=get_assistant_id(config, api_key, api_url, store_path))
+        report["assistant_setup_ms"] = _ms(time.monotonic() - start)
+    else:
+        payload = call_payload(config)
+
+    for _ in range(sessions):
+        try:
+            result = run_session(payload, api_key, api_url, transport_factory(), turns, barge_in_ms,
+                                 variant.interruptions, hangover_ms, timeout)
+        except Exception as e:
+            report["errors"].append(f"{type(e).__name__}: {e}")
+            continue
+        report["timeouts"] += result["timeouts"]
+        for key in ("create_call_ms", "join_ms", "first_message_ms"):
+            if key in result:
+                samples[key].append(result[key])
+        samples["turn_ms"] += result["turn_ms"]
+        samples["interruption_ms"] += result["interruption_ms"]
+
+    report.update({key: summarize(values) for key, values in samples.items()})
+    report["samples"] = samples
+    return report
+
+
+def print_report(report: dict) -> None:
+    def cell(summary: dict, quantiles=("p50", "p90")) -> str:
+        if not summary["n"]:
+            return "-"
+        return " / ".join(f"{summary[q]:.0f}" for q in quantiles)
+
+    table = Table(title=f"🎙️ Vapi turn latency ({report['target']}, ms)", header_style="bold blue")
+    table.add_column("Variant", style="cyan")
+    table.add_column("Assistant setup", justify="right")
+    table.add_column("Create call p50/p90", justify="right")
+    table.add_column("Join p50/p90", justify="right")
+    table.add_column("First message p50/p90", justify="right", style="yellow")
+    table.add_column("Turn p50/p90/p99", justify="right", style="green")
+    table.add_column("Interruption p50/p90", justify="right", style="magenta")
+    table.add_column("Timeouts / errors", justify="right")
+    for name, result in report["variants"].items():
+        setup = result["assistant_setup_ms"]
+        table.add_row(name, "-" if setup is None else f"{setup:.0f}", cell(result["create_call_ms"]),
+                      cell(result["join_ms"]), cell(result["first_message_ms"]),
+                      cell(result["turn_ms"], ("p50", "p90", "p99")), cell(result["interruption_ms"]),
+                      f"{result['timeouts']} / {len(result['errors'])}")
+    console.print(table)
+    for name, result in report["variants"].items():
+        for error in result["errors"][:3]:
+            console.print(f"[red]{name}: {error}[/red]")
+
+
+def _switch(value: str) -> List[bool]:
+    return {"on": [True], "off": [False], "both": [True, False]}[value]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure Vapi session-start, turn and interruption latencies")
+    parser.add_argument("--target", choices=("local", "vapi"), default="local",
+                        help="local: the mock in agents/sts/mock_vapi_server.py; vapi: the real API over Daily")
+    parser.add_argument("--api-url", default=None,
+                        help="API to call (default: a mock started in-process, or VAPI_API_URL for --target vapi)")
+    parser.add_argument("--audio", nargs="*", default=[], help="Caller turns as WAV files (16-bit), used in order")
+    parser.add_argument("--turns", type=int, default=3, help="Caller turns per session (audio files are cycled)")
+    parser.add_argument("--sessions", type=int, default=5, help="Calls per variant")
+    parser.add_argument("--assistant", choices=("inline", "reused", "both"), default="both",
+                        help="Send the config with every call, or start calls from a pre-created assistant")
+    parser.add_argument("--recording", choices=("on", "off", "both"), default=None,
+                        help="recordingEnabled (default: as configured in vapi_voice_agent.py)")
+    parser.add_argument("--interruptions", choices=("on", "off", "both"), default=None,
+                        help="interruptionsEnabled (default: as configured in vapi_voice_agent.py)")
+    parser.add_argument("--barge-in-ms", type=float, default=None,
+                        help="Talk over each reply this long after it starts and time the interruption")
+    parser.add_argument("--hangover-ms", type=float, default=700,
+                        help="Bot silence that counts as the end of its turn")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the bot")
+    parser.add_argument("--latency", action="append", metavar="NAME=MS",
+                        help="Override an assumed mock latency, e.g. llm_first_token=800 (repeatable)")
+    parser.add_argument("--output", default=None, help="Results JSON (default: benchmarks/results/<time>-voice.json)")
+    args = parser.parse_args()
+
+    if args.target == "vapi" and not args.audio:
+        parser.error("--target vapi needs --audio: the real speech-to-text won't hear words in a synthetic tone")
+    try:
+        latencies = latency_overrides(args.latency)
+    except ValueError as e:
+        parser.error(e.args[0])
+
+    mock = None
+    if args.target == "local":
+        if args.api_url is None:
+            mock = start_mock_vapi(0, latencies)
+        api_url, api_key, transport_factory = args.api_url or mock.api_url, "mock", LocalRoomTransport
+        store_path = os.path.join(tempfile.mkdtemp(), "assistants.json")  # mock ids die with the mock
+    else:
+        api_url, api_key, transport_factory = args.api_url or VAPI_API_URL, os.getenv("VAPI_API_KEY"), DailyTransport
+        store_path = ASSISTANT_STORE
+
+    sources = [load_turn(path) for path in args.audio] or [tone(1.2, frequency=440.0)]
+    turns = list(itertools.islice(itertools.cycle(sources), args.turns))
+    modes = {"inline": [False], "reused": [True], "both": [False, True]}[args.assistant]
+    recording = _switch(args.recording) if args.recording else [bool(assistant.get("recordingEnabled"))]
+    interruptions = _switch(args.interruptions) if args.interruptions \
+        else [bool(assistant.get("interruptionsEnabled"))]
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "target": args.target, "api_url": api_url,
+              "sessions": args.sessions, "turns": args.turns, "barge_in_ms": args.barge_in_ms,
+              "audio": args.audio, "mock_latencies": vars(latencies) if mock else None, "variants": {}}
+    try:
+        for reuse, rec, interrupt in itertools.product(modes, recording, interruptions):
+            variant = Variant(reuse, rec, interrupt)
+            with console.status(f"[bold green]{variant.name}: {args.sessions} session(s)..."):
+                report["variants"][variant.name] = run_variant(
+                    variant, args.sessions, api_key, api_url, store_path, transport_factory, turns,
+                    args.barge_in_ms, args.hangover_ms, args.timeout)
+    finally:
+        if mock is not None:
+            mock.shutdown()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-voice.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    console.print(f"Results written to {output}", style="dim")
@@ -0,0 +1 @@
+"""Shared LLM plumbing used by every pipeline in this repository."""
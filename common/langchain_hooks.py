@@ -0,0 +1,115 @@
+import json
+import time
+import asyncio
+from typing import Any, Dict, Optional
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from common.llm_cache import cache_key
+from common.llm_gateway import get_gateway
+from common.providers import record_latency
+
+
+class StageLatencyCallback(BaseCallbackHandler):
+    """Records LangChain chat model call latency under a stage and provider label."""
+
+    def __init__(self, stage: str, label: str):
+        self.stage = stage
+        self.label = label
+        self._starts: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if run_id in self._starts:
+            record_latency(self.stage, self.label, time.perf_counter() - self._starts.pop(run_id))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+        record_latency(self.stage, self.label, None)
+
+
+class UpstreamStatusError(Exception):
+    """A 429 or 5xx answer, raised inside the gateway so it retries it like any SDK error."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.status_code = response.status_code
+        self.response = response
+
+
+# A buffered body is already decoded, so the original framing headers no longer describe it.
+_FRAMING_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _buffered(response: httpx.Response, request: httpx.Request) -> httpx.Response:
+    headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in _FRAMING_HEADERS]
+    return httpx.Response(response.status_code, headers=headers, content=response.content, request=request)
+
+
+def _coalesce_key(label: str, request: httpx.Request) -> Optional[str]:
+    """Identical non-streaming temperature-0 requests to one model may share a single upstream call."""
+    try:
+        body = json.loads(request.content or b"null")
+    except ValueError:
+        return None
+    if not isinstance(body, dict) or body.get("stream", request.url.path.endswith("/api/chat")):
+        return None  # Ollama's native API streams unless told not to
+    if body.get("temperature", (body.get("options") or {}).get("temperature")) != 0:
+        return None
+    return cache_key(label, json.dumps(body, sort_keys=True))
+
+
+class GatewayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """httpx transport that sends a LangChain model's HTTP requests through the shared gateway.
+
+    The requests then share the model's concurrency limit, rate budget, in-flight coalescing and
+    429/5xx retries with the instructor calls, so give the SDK ``max_retries=0``. A streamed reply
+    holds its concurrency slot only until its headers arrive. Async requests are sent with a
+    blocking transport on the gateway's threads and their bodies are buffered, so they don't stream.
+    """
+
+    def __init__(self, label: str, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.label = label
+        self.limits = limits
+        self.transport = httpx.HTTPTransport()
+
+    def _send(self, request: httpx.Request, buffer: bool) -> httpx.Response:
+        response = self.transport.handle_request(request)
+        retry = response.status_code == 429 or response.status_code >= 500
+        if retry or buffer:
+            response.read()
+            response.close()
+        if retry:
+            raise UpstreamStatusError(response)
+        return response
+
+    @staticmethod
+    def _reply(response: httpx.Response, request: httpx.Request) -> httpx.Response:
+        # Buffered bodies may be shared by coalesced callers, so each gets its own copy.
+        return _buffered(response, request) if response.is_stream_consumed else response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = _coalesce_key(self.label, request)
+        try:
+            response = get_gateway(self.limits).call(self.label, lambda: self._send(request, key is not None), key=key)
+        except UpstreamStatusError as e:
+            response = e.response  # out of retries: let the SDK raise its own error for it
+        return self._reply(response, request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        blocking = httpx.Request(request.method, request.url, headers=request.headers, content=content,
+                                 extensions=request.extensions)
+        try:
+            response = await get_gateway(self.limits).acall(self.label, lambda: self._send(blocking, True),
+                                                            key=_coalesce_key(self.label, blocking))
+        except UpstreamStatusError as e:
+            response = e.response
+        return self._reply(response, request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+    async def aclose(self) -> None:
+        self.transport.close()
@@ -0,0 +1,198 @@
+import os
+import json
+import atexit
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH",
+                       os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache.sqlite"))
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Hits are written back as a batch once this many are pending or this many seconds have passed.
+TOUCH_BATCH = 64
+TOUCH_SECONDS = 30.0
+
+# "auto": only cache calls with temperature 0, where a rerun should give the same answer anyway.
+# "always": cache everything (handy while iterating on prompts downstream). "off": never cache.
+CACHE_POLICY = os.getenv("LLM_CACHE", "auto").lower()
+# Print every lookup as it happens; otherwise only cache_report() shows the per-stage totals.
+CACHE_DEBUG = os.getenv("LLM_CACHE_DEBUG", "").lower() in ("1", "true", "yes")
+
+
+def is_cacheable(temperature: Optional[float]) -> bool:
+    if CACHE_POLICY == "off":
+        return False
+    if CACHE_POLICY == "always":
+        return True
+    return temperature is not None and float(temperature) == 0.0
+
+
+def _hash_images(value: Any) -> Any:
+    """Replace base64 data URLs with their digest so keys stay small and stable."""
+    if isinstance(value, str) and value.startswith("data:") and ";base64," in value:
+        return "sha256:" + hashlib.sha256(value.encode("ascii", "ignore")).hexdigest()
+    if isinstance(value, dict):
+        return {key: _hash_images(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_hash_images(item) for item in value]
+    return value
+
+
+def cache_key(model: str, messages: Any, temperature: Optional[float] = None, seed: Optional[int] = None,
+              schema: Optional[dict] = None, **extra) -> str:
+    """Content address of a request: everything that can change the model's answer."""
+    payload = {
+        "model": model,
+        "messages": _hash_images(messages),
+        "temperature": temperature,
+        "seed": seed,
+        "schema": schema,
+        "extra": extra,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite key-value store for model responses with size-based LRU eviction.
+
+    The total size is tracked in memory and only re-summed from disk once it passes the limit
+    (other processes may share the file). Hits update ``last_access`` in batches, so readers
+    don't take the write lock on every lookup.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._total = self._stored_bytes()
+        self._touched: Dict[str, float] = {}  # key -> last hit, not yet written
+        self._touched_flushed = time.monotonic()
+
+    def _stored_bytes(self) -> int:
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._touched_flushed >= TOUCH_SECONDS:
+                with self._connection:
+                    self._flush_touched()
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock, self._connection:
+            previous = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._touched.pop(key, None)
+            self._total += size - (previous[0] if previous else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self._touched.clear()
+            self._total = 0
+
+    def flush(self) -> None:
+        """Write pending ``last_access`` updates."""
+        with self._lock, self._connection:
+            self._flush_touched()
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._connection.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                         [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+        self._touched_flushed = time.monotonic()
+
+    def _evict(self) -> None:
+        self._flush_touched()  # so recent hits count as recent
+        self._total = self._stored_bytes()
+        if self._total <= self.max_bytes:
+            return
+        for key, size in self._connection.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total -= size
+            if self._total <= self.max_bytes:
+                break
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMCache()
+        atexit.register(_cache.flush)
+    return _cache
+
+
+# Per-stage telemetry: {stage: {"hit": n, "miss": n, "bypass": n}}
+STATS: Dict[str, Dict[str, float]] = {}
+
+
+def record(stage: str, outcome: str, key: Optional[str] = None) -> None:
+    stats = STATS.setdefault(stage, {"hit": 0, "miss": 0, "bypass": 0})
+    stats[outcome] += 1
+    if CACHE_DEBUG and outcome != "bypass":
+        console.print(f"[dim]💾 cache {outcome} · {stage} · {key[:12]}[/dim]")
+
+
+def cache_report() -> None:
+    if not STATS:
+        return
+    table = Table(title="💾 LLM response cache", header_style="bold blue")
+    table.add_column("Stage", style="cyan")
+    for column in ("Hits", "Misses", "Not cacheable", "Hit rate"):
+        table.add_column(column, justify="right", style="green")
+    for stage, stats in sorted(STATS.items()):
+        lookups = stats["hit"] + stats["miss"]
+        table.add_row(stage, str(stats["hit"]), str(stats["miss"]), str(stats["bypass"]),
+                      f"{stats['hit'] / lookups:.0%}" if lookups else "-")
+    console.print(table)
+
+
+def langchain_cache(stage: str, temperature: Optional[float]):
+    """A LangChain ``BaseCache`` on the shared store for this stage, or None if caching isn't safe."""
+    if not is_cacheable(temperature):
+        return None
+    from langchain_core.caches import BaseCache
+    from langchain_core.load import dumps, loads
+
+    class StageCache(BaseCache):
+        def lookup(self, prompt: str, llm_string: str):
+            key = cache_key(llm_string, prompt)
+            value = get_cache().get(key)
+            record(stage, "hit" if value is not None else "miss", key)
+            return [loads(generation) for generation in json.loads(value)] if value is not None else None
+
+        def update(self, prompt: str, llm_string: str, return_val) -> None:
+            get_cache().put(cache_key(llm_string, prompt), json.dumps([dumps(generation) for generation in return_val]))
+
+        def clear(self, **kwargs) -> None:
+            get_cache().clear()
+
+    return StageCache()
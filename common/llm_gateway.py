@@ -0,0 +1,307 @@
+import os
+import time
+import asyncio
+import argparse
+import threading
+import statistics
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Per-provider budgets for one process; override per model under "limits" in llm_providers.json.
+DEFAULT_LIMITS: Dict[str, Dict[str, int]] = {
+    "openai": {"concurrency": 8, "rpm": 500},
+    "ollama": {"concurrency": int(os.getenv("OLLAMA_NUM_PARALLEL", "4")), "rpm": 0},
+}
+DEFAULT_MAX_RETRIES = 4
+
+# Overrides every model's rpm when set; 0 disables rate limiting (e.g. for replayed benchmarks).
+RPM_OVERRIDE = os.getenv("LLM_GATEWAY_RPM")
+
+
+class RateLimiter:
+    """Spaces requests evenly to stay under a requests-per-minute budget (0 means unlimited)."""
+
+    def __init__(self, rpm: int):
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+            return start - now
+
+    def cooldown(self, seconds: float) -> None:
+        """Hold every caller back, e.g. after the provider answered 429."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+@dataclass
+class ModelBudget:
+    concurrency: int
+    limiter: RateLimiter
+    semaphore: Optional[asyncio.Semaphore] = None  # created on the gateway loop
+    requests: int = 0
+    coalesced: int = 0
+    upstream_calls: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+
+def _causes(error: BaseException):
+    """The error and whatever it wraps: instructor re-raises upstream errors as ``InstructorRetryException``."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for cause in _causes(error):
+        status = getattr(cause, "status_code", None) or getattr(cause, "code", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = _status_code(error)
+    return status == 429 or (status is not None and 500 <= status < 600) or \
+        any(type(cause).__name__ in ("APITimeoutError", "APIConnectionError") for cause in _causes(error))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    for cause in _causes(error):
+        response = getattr(cause, "response", None)
+        headers = getattr(response, "headers", None) or getattr(cause, "headers", None)
+        if not headers:
+            continue
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers.get("retry-after-ms")) / 1000
+            if headers.get("retry-after"):
+                return float(headers.get("retry-after"))
+        except ValueError:
+            return None
+    return None
+
+
+class LLMGateway:
+    """Process-wide front door for LLM calls.
+
+    Every call names its model; calls to the same model share one concurrency limit and one
+    rate budget no matter which thread or event loop they come from. Calls submitted with the
+    same ``key`` while one is already in flight wait for that call instead of sending their own.
+    Rate-limit and server errors are retried here, once, for everyone, with a shared cooldown.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 workers: int = 32):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.budgets: Dict[str, ModelBudget] = {}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-gateway")
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True, name="llm-gateway-loop").start()
+
+    def budget(self, model: str) -> ModelBudget:
+        """Budget for a ``provider:model`` label."""
+        with self._lock:
+            if model not in self.budgets:
+                limits = dict(DEFAULT_LIMITS.get(model.partition(":")[0], DEFAULT_LIMITS["openai"]))
+                limits.update(self.limits.get(model, {}))
+                if RPM_OVERRIDE is not None:
+                    limits["rpm"] = int(RPM_OVERRIDE)
+                self.budgets[model] = ModelBudget(limits["concurrency"], RateLimiter(limits["rpm"]))
+            return self.budgets[model]
+
+    def submit(self, model: str, call: Callable[[], Any], key: Optional[str] = None) -> Future:
+        """Schedule a blocking ``call`` against ``model``; returns a ``concurrent.futures.Future``."""
+        return asyncio.run_coroutine_threadsafe(self._dispatch(model, call, key), self._loop)
+
+    def call(self, model: str, call: Callable[[], Any], key: Optional[str] = None):
+        return self.submit(model, call, key).result()
+
+    async def acall(self, model: str, call: Callable[[], Any], key: Optional[str] = None):
+        return await asyncio.wrap_future(self.submit(model, call, key))
+
+    async def _dispatch(self, model: str, call: Callable[[], Any], key: Optional[str]):
+        budget = self.budget(model)
+        budget.requests += 1
+        if key is None:
+            return await self._upstream(budget, call)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._loop.create_task(self._upstream(budget, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            budget.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _upstream(self, budget: ModelBudget, call: Callable[[], Any]):
+        if budget.semaphore is None:
+            budget.semaphore = asyncio.Semaphore(budget.concurrency)
+        async with budget.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await asyncio.sleep(budget.limiter.reserve())
+                budget.upstream_calls += 1
+                start = time.perf_counter()
+                try:
+                    result = await self._loop.run_in_executor(self._executor, call)
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        budget.errors += 1
+                        raise
+                    budget.rate_limited += 1
+                    budget.limiter.cooldown(retry_after(e) or 0.5 * 2 ** attempt)
+                    continue
+                budget.latencies.append(time.perf_counter() - start)
+                return result
+
+    def report(self, title: str = "LLM gateway") -> None:
+        used = {model: budget for model, budget in self.budgets.items() if budget.requests}
+        if not used:
+            return
+        table = Table(title=f"🚦 {title}", header_style="bold blue")
+        table.add_column("Model", style="cyan")
+        for column in ("Requests", "Coalesced", "Upstream calls", "Retried", "Errors", "Mean upstream (s)"):
+            table.add_column(column, justify="right", style="green")
+        for model, budget in sorted(used.items()):
+            mean = f"{statistics.mean(budget.latencies):.2f}" if budget.latencies else "-"
+            table.add_row(model, str(budget.requests), str(budget.coalesced), str(budget.upstream_calls),
+                          str(budget.rate_limited), str(budget.errors), mean)
+        console.print(table)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway(limits: Optional[Dict[str, Dict[str, int]]] = None) -> LLMGateway:
+    """The process-wide gateway; ``limits`` only apply to the call that creates it."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(limits)
+        return _gateway
+
+
+def gateway_report() -> None:
+    if _gateway is not None:
+        _gateway.report()
+
+
+def load_test(base_url: str, requests: int, distinct: int, rpm: int, concurrency: int) -> None:
+    """Same burst of chat requests sent directly (each caller retrying on its own) and through the gateway."""
+    import json
+    import urllib.error
+    import urllib.request
+
+    def post(path: str, payload: Optional[dict] = None) -> dict:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(f"{base_url}{path}", data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.loads(response.read())
+
+    def chat(prompt: str) -> Callable[[], dict]:
+        return lambda: post("/chat/completions", {"model": "gpt-4o-mini", "temperature": 0,
+                                                  "messages": [{"role": "user", "content": prompt}]})
+
+    def naive(call: Callable[[], dict]) -> dict:
+        for attempt in range(DEFAULT_MAX_RETRIES + 1):
+            try:
+                return call()
+            except urllib.error.HTTPError as e:
+                if e.code != 429 or attempt == DEFAULT_MAX_RETRIES:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+
+    prompts = [f"Extract the marks from sheet {i % distinct}" for i in range(requests)]
+    table = Table(title=f"🚦 {requests} requests, {distinct} distinct prompts", header_style="bold blue")
+    table.add_column("Client", style="cyan")
+    for column in ("Wall (s)", "Req/s", "Upstream requests", "429s", "Failed"):
+        table.add_column(column, justify="right", style="green")
+
+    for name in ("direct", "gateway"):
+        post("/stats/reset", {})
+        start = time.perf_counter()
+        if name == "direct":
+            with ThreadPoolExecutor(max_workers=requests) as pool:
+                futures = [pool.submit(naive, chat(prompt)) for prompt in prompts]
+        else:
+            gateway = LLMGateway({"openai:gpt-4o-mini": {"concurrency": concurrency, "rpm": rpm}})
+            futures = [gateway.submit("openai:gpt-4o-mini", chat(prompt), key=prompt) for prompt in prompts]
+        failed = sum(1 for future in futures if future.exception() is not None)
+        elapsed = time.perf_counter() - start
+        stats = post("/stats")
+        table.add_row(name, f"{elapsed:.2f}", f"{requests / elapsed:.1f}", str(stats["requests"]),
+                      str(stats["rate_limited"]), str(failed))
+    console.print(table)
+
+
+def instructor_retry_check(base_url: str, retry_after_seconds: float = 0.3) -> bool:
+    """Send one instructor call through the gateway while the mock answers 429 once.
+
+    instructor wraps upstream errors in its own exception, so this makes sure the gateway still
+    sees the 429 underneath, waits for ``Retry-After`` and retries.
+    """
+    import json
+    import urllib.request
+    from pydantic import BaseModel
+    from common.providers import ProviderSpec, _instructor_client
+
+    class Probe(BaseModel):
+        name: str
+
+    os.environ["OPENAI_BASE_URL"], os.environ["OPENAI_API_KEY"] = base_url, "mock"
+    for path, payload in (("/stats/reset", {}), ("/inject", {"status": 429, "retry_after": retry_after_seconds})):
+        urllib.request.urlopen(urllib.request.Request(f"{base_url}{path}", data=json.dumps(payload).encode("utf-8"),
+                                                      headers={"Content-Type": "application/json"}), timeout=10)
+    client = _instructor_client(ProviderSpec("openai", "gpt-4o-mini"))
+    gateway = LLMGateway()
+    start = time.perf_counter()
+    try:
+        gateway.call("openai:gpt-4o-mini", lambda: client.chat.completions.create(
+            model="gpt-4o-mini", response_model=Probe, messages=[{"role": "user", "content": "ping"}]))
+        error = None
+    except Exception as e:
+        error = e
+    elapsed = time.perf_counter() - start
+    budget = gateway.budget("openai:gpt-4o-mini")
+    ok = error is None and budget.rate_limited == 1 and elapsed >= retry_after_seconds
+    status = "[green]retried after Retry-After[/green]" if ok else f"[red]not retried: {error!r}[/red]"
+    console.print(f"🔁 instructor call with an injected 429: {status} "
+                  f"({budget.upstream_calls} upstream calls, {elapsed:.2f}s)")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the LLM gateway against the local mock upstream")
+    parser.add_argument("--requests", type=int, default=120, help="Requests in the burst")
+    parser.add_argument("--distinct", type=int, default=40, help="How many of them are different prompts")
+    parser.add_argument("--rpm", type=int, default=600, help="Upstream requests-per-minute limit")
+    parser.add_argument("--concurrency", type=int, default=8, help="Gateway concurrency for the model")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    from common.mock_llm_server import start_mock_server
+    server = start_mock_server(args.port, latency=0.2, rpm=args.rpm)
+    load_test(f"http://127.0.0.1:{args.port}/v1", args.requests, args.distinct, args.rpm, args.concurrency)
+    retried = instructor_retry_check(f"http://127.0.0.1:{args.port}/v1")
+    server.shutdown()
+    if not retried:
+        raise SystemExit(1)
@@ -0,0 +1,210 @@
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Roughly gpt-4o-mini over the network: fixed overhead plus output tokens.
+DEFAULT_LATENCY_SECONDS = 0.4
+DEFAULT_TOKENS_PER_SECOND = 80.0
+DEFAULT_RPM = 600
+DEFAULT_CONCURRENCY = 16
+
+
+def fake_from_schema(schema: dict, defs: dict = None):
+    """Smallest value that validates against a JSON schema (enough for instructor/pydantic to parse)."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_from_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            return fake_from_schema(schema[combinator][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {name: fake_from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_from_schema(schema.get("items", {}), defs) for _ in range(schema.get("minItems", 1))]
+    if kind == "integer":
+        return int(schema.get("minimum", 1))
+    if kind == "number":
+        return float(schema.get("minimum", 1.0))
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return "mock"
+
+
+class MockUpstream:
+    """Simulated provider: per-request latency, a concurrency cap and a requests-per-minute limit."""
+
+    def __init__(self, latency: float, tokens_per_second: float, rpm: int, concurrency: int):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.rate = rpm / 60.0 if rpm else 0.0
+        self.slots = threading.Semaphore(concurrency)
+        self.lock = threading.Lock()
+        # Token bucket holding at most one second of requests.
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.refilled = time.monotonic()
+        self.stats = {"requests": 0, "served": 0, "rate_limited": 0, "injected": 0}
+        self.injected: deque = deque()  # (status, retry_after) errors to answer the next requests with
+
+    def inject(self, status: int, count: int = 1, retry_after: float = None) -> None:
+        with self.lock:
+            self.injected.extend([(status, retry_after)] * count)
+
+    def take_injected(self):
+        with self.lock:
+            if not self.injected:
+                return None
+            self.stats["requests"] += 1
+            self.stats["injected"] += 1
+            return self.injected.popleft()
+
+    def admit(self) -> bool:
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.rate:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.refilled) * self.rate)
+                self.refilled = now
+                if self.tokens < 1:
+                    self.stats["rate_limited"] += 1
+                    return False
+                self.tokens -= 1
+            return True
+
+    def complete(self, request: dict) -> dict:
+        message = {"role": "assistant", "content": None}
+        tools = request.get("tools") or []
+        response_format = request.get("response_format") or {}
+        if tools:
+            function = tools[0]["function"]
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": function["name"],
+                             "arguments": json.dumps(fake_from_schema(function.get("parameters", {})))},
+            }]
+        elif response_format.get("type") == "json_schema":
+            message["content"] = json.dumps(fake_from_schema(response_format["json_schema"].get("schema", {})))
+        elif response_format.get("type") == "json_object":
+            message["content"] = "{}"
+        else:
+            message["content"] = f"(mock) answered {len(request.get('messages') or [])} message(s)."
+
+        completion_tokens = max(1, len(json.dumps(message)) // 4)
+        with self.slots:
+            time.sleep(self.latency + completion_tokens / self.tokens_per_second)
+        with self.lock:
+            self.stats["served"] += 1
+        prompt_tokens = max(1, len(json.dumps(request.get("messages") or [])) // 4)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": message,
+                         "finish_reason": "tool_calls" if tools else "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats = {key: 0 for key in self.stats}
+            self.tokens = self.capacity
+            self.injected.clear()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    upstream: MockUpstream = None
+
+    def _send_json(self, payload: dict, status: int = 200, headers: dict = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.endswith("/stats"):
+            self._send_json(self.upstream.snapshot())
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.endswith("/stats/reset"):
+            self.upstream.reset()
+            self._send_json({})
+        elif self.path.endswith("/inject"):
+            # {"status": 429, "count": 1, "retry_after": 0.2}: fail the next requests on purpose.
+            self.upstream.inject(request.get("status", 429), request.get("count", 1), request.get("retry_after"))
+            self._send_json({})
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            injected = self.upstream.take_injected()
+            if injected is not None:
+                status, retry_after = injected
+                self._send_json({"error": {"message": f"Injected {status}", "type": "injected",
+                                           "code": "rate_limit_exceeded" if status == 429 else "server_error"}},
+                                status, {"Retry-After": f"{retry_after:.3f}"} if retry_after is not None else None)
+                return
+            if not self.upstream.admit():
+                retry_after = 1.0 / self.upstream.rate
+                self._send_json({"error": {"message": "Rate limit reached", "type": "requests",
+                                           "code": "rate_limit_exceeded"}},
+                                429, {"Retry-After": f"{retry_after:.3f}"})
+                return
+            self._send_json(self.upstream.complete(request))
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(port: int = 8765, latency: float = DEFAULT_LATENCY_SECONDS,
+                      tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND, rpm: int = DEFAULT_RPM,
+                      concurrency: int = DEFAULT_CONCURRENCY) -> ThreadingHTTPServer:
+    """Start the mock in a background thread and return the server (call ``shutdown()`` to stop)."""
+    handler = type("BoundMockHandler", (MockHandler,), {
+        "upstream": MockUpstream(latency, tokens_per_second, rpm, concurrency),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock with latency and rate limits")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_SECONDS, help="Fixed seconds per request")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Requests per minute before 429s (0: no limit)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    server = start_mock_server(args.port, args.latency, rpm=args.rpm, concurrency=args.concurrency)
+    print(f"Mock LLM server listening on http://127.0.0.1:{args.port}/v1 "
+          f"(use OPENAI_BASE_URL=http://127.0.0.1:{args.port}/v1 OPENAI_API_KEY=mock)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
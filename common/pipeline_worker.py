@@ -0,0 +1,395 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import argparse
+import importlib
+import threading
+import multiprocessing
+import statistics
+import subprocess
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PORT = 8777
+DEFAULT_KEEP_JOBS = 1000  # finished jobs kept for GET /jobs/<id>
+DEFAULT_JOB_TTL = 3600.0  # seconds a finished job stays retrievable
+STATS_WINDOW = 1000  # recent runs per pipeline behind the latency stats
+
+
+def _jsonable(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
+@dataclass
+class Pipeline:
+    """A one-shot script the worker keeps imported: where its paths resolve from and how to run a job with it."""
+    directory: str  # relative to the repo root; job paths resolve from here
+    module: str  # dotted, as ``python -m`` runs it from the repo root
+    run: Callable[[Any, "Pipeline", dict], Any]
+    exclusive: bool = False  # one job at a time (CPU-heavy or writes fixed output files)
+    loaded: Any = None
+    error: Optional[str] = None
+    import_seconds: Optional[float] = None
+    cold_run_seconds: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def path(self, relative: str) -> str:
+        """Resolve a job's path the way the script would when run from its own directory."""
+        return relative if os.path.isabs(relative) else os.path.join(REPO_ROOT, self.directory, relative)
+
+
+# Jobs share the process, so output locations and verbosity are passed to each run rather than
+# set through the working directory or a module-level console.
+def _run_marksheet(module, pipeline: Pipeline, params: dict):
+    results = module.process_files(pipeline.path(params.get("directory", "./marksheet_docs")), params.get("files"),
+                                   quiet=params.get("quiet", False),
+                                   image_root=pipeline.path(params.get("image_dir", "marksheet_docs_image")))
+    return [{"file": entry["file"], "result": entry["result"]} for entry in results]
+
+
+def _run_screenshot_replies(module, pipeline: Pipeline, params: dict):
+    if "image" in params:
+        return module.generate_reply(pipeline.path(params["image"]))
+    directory = pipeline.path(params.get("directory", "./screenshots"))
+    cache = module.ReplyCache(pipeline.path(params["cache"])) if params.get("cache") else None
+    try:
+        # Spawned, not forked: forking this multithreaded server can copy a lock another thread holds.
+        return {"processed": module.process_screenshots(directory, workers=params.get("workers"), cache=cache,
+                                                        files=params.get("files"),
+                                                        mp_context=multiprocessing.get_context("spawn"))}
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _run_plot(module, pipeline: Pipeline, params: dict):
+    prompt = params.get("prompt", module.DEFAULT_PROMPT)
+    if params.get("parallel"):
+        movie_plot = module.generate_plot(prompt, params.get("scenes", 8), params.get("concurrency", 4))
+    else:
+        movie_plot = module.generate_tamil_movie_plot(prompt)
+    if movie_plot is None:
+        raise RuntimeError("plot generation failed (see worker log)")
+    return movie_plot
+
+
+def _run_video(module, pipeline: Pipeline, params: dict):
+    result = module.get_workflow().invoke(module.initial_state(pipeline.path(params.get("output_dir", "."))))
+    return {key: value for key, value in result.items() if key != "messages"}
+
+
+PIPELINES: Dict[str, Pipeline] = {
+    "marksheet": Pipeline("vision", "vision.12_marksheet_extraction", _run_marksheet),
+    "screenshot_replies": Pipeline("vision", "vision.vision_chat_assistant", _run_screenshot_replies),
+    "plot": Pipeline("generation", "generation.parallel_plot_generator", _run_plot),
+    "video": Pipeline(os.path.join("agents", "video_generator"), "agents.video_generator.video_generator_agent",
+                      _run_video, exclusive=True),
+}
+
+
+def load_pipeline(pipeline: Pipeline) -> None:
+    """Import once; clients, compiled graphs and caches are built by the first job and stay warm."""
+    start = time.perf_counter()
+    try:
+        pipeline.loaded = importlib.import_module(pipeline.module)
+    except Exception as e:
+        pipeline.error = f"{type(e).__name__}: {e}"
+        return
+    pipeline.import_seconds = time.perf_counter() - start
+
+
+def run_once(kind: str, params: dict) -> None:
+    """Run one job in this process and exit, the way a one-shot script run would."""
+    pipeline = PIPELINES[kind]
+    load_pipeline(pipeline)
+    if pipeline.loaded is None:
+        raise SystemExit(f"{kind} failed to load: {pipeline.error}")
+    pipeline.run(pipeline.loaded, pipeline, params)
+
+
+def measure_cold_run(kind: str, pipeline: Pipeline, params: Optional[dict] = None) -> Optional[float]:
+    """Time one job with default parameters in a fresh interpreter.
+
+    That covers everything a one-shot run pays: interpreter start, SDK imports, client
+    construction, model load and the job itself. It makes real API calls.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "common.pipeline_worker", "run-once", kind, json.dumps(params or {})],
+        cwd=REPO_ROOT, capture_output=True,
+    )
+    pipeline.cold_run_seconds = time.perf_counter() - start if completed.returncode == 0 else None
+    return pipeline.cold_run_seconds
+
+
+@dataclass
+class Job:
+    kind: str
+    params: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "queued"
+    result: Any = None
+    error: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id, "kind": self.kind, "status": self.status, "result": self.result, "error": self.error,
+            "queued_seconds": (self.started or time.time()) - self.submitted,
+            "run_seconds": (self.finished - self.started) if self.finished and self.started else None,
+        }
+
+
+class PipelineWorker:
+    """Keeps the pipelines imported and runs submitted jobs from a queue on a few threads.
+
+    Finished jobs are forgotten after ``job_ttl`` seconds or once more than ``keep_jobs`` have
+    finished; the latency stats keep their own bounded window of timings.
+    """
+
+    def __init__(self, kinds: List[str], threads: int = 2, keep_jobs: int = DEFAULT_KEEP_JOBS,
+                 job_ttl: float = DEFAULT_JOB_TTL):
+        self.pipelines = {kind: PIPELINES[kind] for kind in kinds}
+        self.jobs: Dict[str, Job] = {}
+        self.queue: "queue.Queue[Job]" = queue.Queue()
+        self.threads = threads
+        self.keep_jobs = keep_jobs
+        self.job_ttl = job_ttl
+        self.lock = threading.Lock()
+        self.finished: Dict[str, int] = {kind: 0 for kind in kinds}
+        self.failed: Dict[str, int] = {kind: 0 for kind in kinds}
+        # (queue seconds, run seconds or None if the job failed) of recent jobs per pipeline
+        self.timings: Dict[str, deque] = {kind: deque(maxlen=STATS_WINDOW) for kind in kinds}
+
+    def start(self, measure_cold: bool = False) -> None:
+        for kind, pipeline in self.pipelines.items():
+            with console.status(f"[bold green]Loading {kind}..."):
+                load_pipeline(pipeline)
+            if measure_cold and pipeline.loaded is not None:
+                with console.status(f"[bold green]Timing a cold {kind} run..."):
+                    measure_cold_run(kind, pipeline)
+            if pipeline.error:
+                console.print(f"[red]❌ {kind} unavailable: {pipeline.error}[/red]")
+            else:
+                console.print(f"[green]✅ {kind} warm[/green] [dim](import {pipeline.import_seconds:.2f}s)[/dim]")
+        for _ in range(self.threads):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, kind: str, params: dict) -> Job:
+        pipeline = self.pipelines.get(kind)
+        if pipeline is None:
+            raise KeyError(f"Unknown job kind '{kind}' (available: {', '.join(self.pipelines)})")
+        if pipeline.loaded is None:
+            raise RuntimeError(f"Pipeline '{kind}' failed to load: {pipeline.error}")
+        job = Job(kind, params)
+        with self.lock:
+            self._expire()
+            self.jobs[job.id] = job
+        self.queue.put(job)
+        return job
+
+    def _expire(self) -> None:
+        """Drop finished jobs that are too old or beyond ``keep_jobs``; call with ``self.lock`` held."""
+        now = time.time()
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished)
+        excess = len(finished) - self.keep_jobs
+        for index, job in enumerate(finished):
+            if index < excess or now - job.finished > self.job_ttl:
+                del self.jobs[job.id]
+
+    def _work(self) -> None:
+        while True:
+            job = self.queue.get()
+            pipeline = self.pipelines[job.kind]
+            job.status, job.started = "running", time.time()
+            try:
+                if pipeline.exclusive:
+                    with pipeline.lock:
+                        result = pipeline.run(pipeline.loaded, pipeline, job.params)
+                else:
+                    result = pipeline.run(pipeline.loaded, pipeline, job.params)
+                job.result, job.status = _jsonable(result), "done"
+            except Exception as e:
+                job.error, job.status = f"{type(e).__name__}: {e}", "failed"
+            job.finished = time.time()
+            with self.lock:
+                self.finished[job.kind] += 1
+                self.failed[job.kind] += job.status == "failed"
+                self.timings[job.kind].append((job.started - job.submitted,
+                                               job.finished - job.started if job.status == "done" else None))
+                self._expire()
+            job.done.set()
+            console.print(f"[dim]{job.kind} {job.id} {job.status} in {job.finished - job.started:.2f}s[/dim]")
+
+    def stats(self) -> dict:
+        stats = {}
+        for kind, pipeline in self.pipelines.items():
+            with self.lock:
+                timings = list(self.timings[kind])
+            runs = [run for _, run in timings if run is not None]
+            warm = statistics.mean(runs) if runs else None
+            stats[kind] = {
+                "loaded": pipeline.loaded is not None,
+                "error": pipeline.error,
+                "jobs": self.finished[kind],
+                "failed": self.failed[kind],
+                "mean_queue_seconds": statistics.mean(queued for queued, _ in timings) if timings else None,
+                "mean_warm_seconds": warm,
+                "p50_warm_seconds": statistics.median(runs) if runs else None,
+                "import_seconds": pipeline.import_seconds,
+                "cold_run_seconds": pipeline.cold_run_seconds,
+            }
+        return stats
+
+
+class WorkerHandler(BaseHTTPRequestHandler):
+    worker: PipelineWorker = None
+
+    def _send_json(self, payload, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"pipelines": {kind: pipeline.loaded is not None
+                                           for kind, pipeline in self.worker.pipelines.items()},
+                             "queued": self.worker.queue.qsize()})
+        elif self.path == "/stats":
+            self._send_json(self.worker.stats())
+        elif self.path.startswith("/jobs/"):
+            job = self.worker.jobs.get(self.path[len("/jobs/"):])
+            self._send_json(job.as_dict() if job else {"error": "unknown job"}, 200 if job else 404)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json({"error": "not found"}, 404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        try:
+            job = self.worker.submit(request.get("kind"), request.get("params") or {})
+        except (KeyError, RuntimeError) as e:
+            self._send_json({"error": e.args[0]}, 400)
+            return
+        if request.get("wait"):
+            job.done.wait()
+            self._send_json(job.as_dict())
+        else:
+            self._send_json(job.as_dict(), 202)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(kinds: List[str], port: int = DEFAULT_PORT, threads: int = 2, measure_cold: bool = False,
+          keep_jobs: int = DEFAULT_KEEP_JOBS, job_ttl: float = DEFAULT_JOB_TTL) -> None:
+    worker = PipelineWorker(kinds, threads, keep_jobs, job_ttl)
+    worker.start(measure_cold)
+    handler = type("BoundWorkerHandler", (WorkerHandler,), {"worker": worker})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    console.print(f"[bold]Pipeline worker listening on http://127.0.0.1:{port}[/bold]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+def _request(url: str, payload: Optional[dict] = None) -> dict:
+    import urllib.error
+    import urllib.request
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def print_stats(stats: dict) -> None:
+    def seconds(value):
+        return f"{value:.2f}" if value is not None else "-"
+
+    table = Table(title="⏱️ Warm worker vs cold script runs", header_style="bold blue")
+    table.add_column("Pipeline", style="cyan")
+    for column in ("Jobs", "Failed", "Queue (s)", "Warm mean (s)", "Warm p50 (s)", "Cold run (s)", "Speedup"):
+        table.add_column(column, justify="right", style="green")
+    for kind, row in stats.items():
+        if not row["loaded"]:
+            table.add_row(kind, "-", "-", "-", "-", "-", "-", "[red]not loaded[/red]")
+            continue
+        # Only comparable when the warm jobs use the default parameters the cold run used.
+        speedup = row["cold_run_seconds"] / row["mean_warm_seconds"] \
+            if row["cold_run_seconds"] and row["mean_warm_seconds"] else None
+        table.add_row(kind, str(row["jobs"]), str(row["failed"]), seconds(row["mean_queue_seconds"]),
+                      seconds(row["mean_warm_seconds"]), seconds(row["p50_warm_seconds"]),
+                      seconds(row["cold_run_seconds"]), f"{speedup:.1f}x" if speedup else "-")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running worker that keeps the pipelines warm")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}", help="Worker URL for client commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Start the worker")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--threads", type=int, default=2, help="Jobs run at once")
+    serve_parser.add_argument("--pipelines", default=",".join(PIPELINES), help="Comma-separated job kinds to load")
+    serve_parser.add_argument("--measure-cold", action="store_true",
+                              help="Time one default job per pipeline in a fresh interpreter (makes API calls)")
+    serve_parser.add_argument("--keep-jobs", type=int, default=DEFAULT_KEEP_JOBS,
+                              help="Finished jobs kept for GET /jobs/<id>")
+    serve_parser.add_argument("--job-ttl", type=float, default=DEFAULT_JOB_TTL,
+                              help="Seconds a finished job stays retrievable")
+
+    submit_parser = commands.add_parser("submit", help="Submit a job and wait for it")
+    submit_parser.add_argument("kind", choices=list(PIPELINES))
+    submit_parser.add_argument("params", nargs="?", default="{}", help="Job parameters as JSON")
+    submit_parser.add_argument("--no-wait", action="store_true", help="Print the job id and return")
+
+    commands.add_parser("stats", help="Per-pipeline latency, warm vs cold")
+
+    run_once_parser = commands.add_parser("run-once", help="Run one job in this process (used by --measure-cold)")
+    run_once_parser.add_argument("kind", choices=list(PIPELINES))
+    run_once_parser.add_argument("params", nargs="?", default="{}", help="Job parameters as JSON")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve([kind.strip() for kind in args.pipelines.split(",") if kind.strip()], args.port, args.threads,
+              args.measure_cold, args.keep_jobs, args.job_ttl)
+    elif args.command == "submit":
+        start = time.perf_counter()
+        job = _request(f"{args.url}/jobs", {"kind": args.kind, "params": json.loads(args.params),
+                                            "wait": not args.no_wait})
+        console.print_json(data=job)
+        if not args.no_wait:
+            console.print(f"⏱️ Round trip: {time.perf_counter() - start:.2f}s", style="dim")
+    elif args.command == "run-once":
+        run_once(args.kind, json.loads(args.params))
+    else:
+        print_stats(_request(f"{args.url}/stats"))
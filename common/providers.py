@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import asyncio
+import statistics
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from rich.console import Console
+from rich.table import Table
+from common.llm_cache import cache_key, get_cache, is_cacheable, langchain_cache, record as record_cache
+from common.llm_gateway import get_gateway
+
+console = Console()
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+CONFIG_PATH = os.getenv("LLM_PROVIDERS_CONFIG",
+                        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "llm_providers.json"))
+
+
+@dataclass
+class ProviderSpec:
+    provider: str  # "openai" or "ollama"
+    model: str
+    fallback: Optional["ProviderSpec"] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    @classmethod
+    def parse(cls, value) -> "ProviderSpec":
+        """From ``"ollama:llama3.1"`` or ``{"provider": ..., "model": ..., "fallback": ...}``."""
+        if isinstance(value, str):
+            provider, separator, model = value.partition(":")
+            if not separator or not provider or not model:
+                raise ValueError(f"Provider spec '{value}' must look like 'provider:model', e.g. 'ollama:llama3.1'")
+            return cls(provider=provider, model=model)
+        fallback = value.get("fallback")
+        return cls(provider=value["provider"], model=value["model"],
+                   fallback=cls.parse(fallback) if fallback else None)
+
+
+OPENAI_MINI = ProviderSpec("openai", "gpt-4o-mini")
+
+# Everything runs on OpenAI unless the config file or LLM_STAGE_* opts a stage into Ollama, so a
+# machine without an Ollama server never pays a failed connection before the real call.
+DEFAULT_STAGES: Dict[str, ProviderSpec] = {
+    "default": OPENAI_MINI,
+    "marksheet": ProviderSpec("openai", "gpt-4o"),
+}
+
+
+def _load_config_file(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_stage_config(path: str = CONFIG_PATH) -> Dict[str, ProviderSpec]:
+    """Defaults, overridden by the JSON config file, overridden by ``LLM_STAGE_<NAME>`` env vars."""
+    stages = dict(DEFAULT_STAGES)
+    stages.update({stage: ProviderSpec.parse(value)
+                   for stage, value in _load_config_file(path).items() if stage != "limits"})
+    for key, value in os.environ.items():
+        if key.startswith("LLM_STAGE_") and value:
+            stages[key[len("LLM_STAGE_"):].lower()] = ProviderSpec.parse(value)
+    return stages
+
+
+def load_limits(path: str = CONFIG_PATH) -> Dict[str, Dict[str, int]]:
+    """Per-model gateway budgets, e.g. ``"limits": {"openai:gpt-4o": {"concurrency": 4, "rpm": 60}}``."""
+    return _load_config_file(path).get("limits", {})
+
+
+# Read on first use rather than at import, like the SDK clients.
+@lru_cache(maxsize=None)
+def stages() -> Dict[str, ProviderSpec]:
+    return load_stage_config()
+
+
+@lru_cache(maxsize=None)
+def limits() -> Dict[str, Dict[str, int]]:
+    return load_limits()
+
+
+def stage_spec(stage: str) -> ProviderSpec:
+    return stages().get(stage, stages()["default"])
+
+
+# Per-stage latency samples in seconds: {stage: {provider label: [seconds, ...]}}
+LATENCIES: Dict[str, Dict[str, List[float]]] = {}
+FAILURES: Dict[str, Dict[str, int]] = {}
+
+
+def record_latency(stage: str, label: str, seconds: Optional[float]) -> None:
+    if seconds is None:
+        FAILURES.setdefault(stage, {}).setdefault(label, 0)
+        FAILURES[stage][label] += 1
+    else:
+        LATENCIES.setdefault(stage, {}).setdefault(label, []).append(seconds)
+
+
+def _chain(spec: ProviderSpec) -> List[ProviderSpec]:
+    specs = []
+    while spec is not None:
+        specs.append(spec)
+        spec = spec.fallback
+    return specs
+
+
+def _langchain_model(spec: ProviderSpec, stage: str, temperature: Optional[float], max_tokens: Optional[int],
+                     cached: bool = True):
+    # LangChain is only imported by the stages that use it; instructor-only scripts start faster.
+    import httpx
+    from common.langchain_hooks import GatewayTransport, StageLatencyCallback
+    callbacks = [StageLatencyCallback(stage, spec.label)]
+    # Every HTTP request goes through the gateway, which also owns retries.
+    transport = GatewayTransport(spec.label, limits())
+    # cache=False (not None) so a global LangChain cache can't sneak in either.
+    cache = (langchain_cache(stage, temperature) or False) if cached else False
+    if spec.provider == "ollama":
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=spec.model, base_url=OLLAMA_HOST, temperature=temperature,
+                          num_predict=max_tokens, callbacks=callbacks, cache=cache,
+                          client_kwargs={"transport": transport})
+    if spec.provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=spec.model, temperature=temperature, max_tokens=max_tokens, callbacks=callbacks,
+                          cache=cache, max_retries=0, http_client=httpx.Client(transport=transport),
+                          http_async_client=httpx.AsyncClient(transport=transport))
+    raise ValueError(f"Unknown provider '{spec.provider}' for stage '{stage}'")
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(stage: str, temperature: Optional[float] = None, max_tokens: Optional[int] = None):
+    """LangChain chat model for a pipeline stage, with the configured fallbacks attached."""
+    primary, *fallbacks = [_langchain_model(spec, stage, temperature, max_tokens) for spec in _chain(stage_spec(stage))]
+    return primary.with_fallbacks(fallbacks) if fallbacks else primary
+
+
+@lru_cache(maxsize=None)
+def get_structured_model(stage: str, schema, temperature: Optional[float] = None, include_raw: bool = False):
+    """Like ``get_chat_model`` but returning ``schema`` instances via JSON-schema structured output.
+
+    JSON-schema output (rather than tool calls) keeps the raw reply a plain assistant message,
+    so it can be appended to the conversation history for the next stage. With ``include_raw``
+    a reply that doesn't match ``schema`` still raises, so the next provider gets a turn.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def require_parsed(output: dict) -> dict:
+        if output["parsed"] is None:
+            raise ValueError(f"{stage} returned output that doesn't match {schema.__name__}: "
+                             f"{output.get('parsing_error')}")
+        return output
+
+    models = [_langchain_model(spec, stage, temperature, None).with_structured_output(
+        schema, method="json_schema", include_raw=include_raw) for spec in _chain(stage_spec(stage))]
+    primary, *fallbacks = [model | RunnableLambda(require_parsed) for model in models] if include_raw else models
+    return primary.with_fallbacks(fallbacks) if fallbacks else primary
+
+
+def _instructor_client(spec: ProviderSpec):
+    import instructor
+    from openai import OpenAI
+    # The gateway retries rate-limit and server errors for every caller at once.
+    if spec.provider == "ollama":
+        # Ollama's OpenAI-compatible endpoint; JSON mode works with every local model.
+        return instructor.from_openai(OpenAI(base_url=f"{OLLAMA_HOST}/v1", api_key="ollama", max_retries=0),
+                                      mode=instructor.Mode.JSON)
+    if spec.provider == "openai":
+        return instructor.from_openai(OpenAI(max_retries=0))
+    raise ValueError(f"Unknown provider '{spec.provider}'")
+
+
+def _request_kwargs(spec: ProviderSpec, kwargs: dict) -> dict:
+    kwargs = dict(kwargs, model=spec.model)
+    if spec.provider == "ollama":
+        kwargs.pop("tool_choice", None)
+    return kwargs
+
+
+def _response_cache_key(spec: ProviderSpec, kwargs: dict) -> str:
+    """Every request kwarg counts (max_tokens, tools, tool_choice, top_p, stop, ...); the response
+    model, which isn't serializable, counts through its JSON schema."""
+    response_model = kwargs.get("response_model")
+    extra = {name: value for name, value in kwargs.items()
+             if name not in ("response_model", "messages", "temperature", "seed", "model")}
+    return cache_key(
+        spec.label,
+        kwargs.get("messages"),
+        temperature=kwargs.get("temperature"),
+        seed=kwargs.get("seed"),
+        schema=response_model.model_json_schema() if response_model is not None else None,
+        **extra,
+    )
+
+
+@dataclass
+class InstructorStage:
+    """instructor client for a pipeline stage: the model comes from config, failures fall back.
+
+    Calls go through the shared gateway; with ``asynchronous=True`` ``create`` returns a coroutine.
+    """
+    stage: str
+    asynchronous: bool = False
+    _clients: Dict[str, Any] = field(default_factory=dict)
+
+    def _client(self, spec: ProviderSpec):
+        if spec.label not in self._clients:
+            self._clients[spec.label] = _instructor_client(spec)
+        return self._clients[spec.label]
+
+    def _submit(self, spec: ProviderSpec, kwargs: dict):
+        """Send one request through the gateway; identical deterministic requests in flight share it."""
+        client = self._client(spec)
+        key = _response_cache_key(spec, kwargs) if kwargs.get("temperature") == 0 else None
+        return get_gateway(limits()).submit(
+            spec.label, lambda: client.chat.completions.create(**_request_kwargs(spec, kwargs)), key=key)
+
+    def create(self, **kwargs):
+        if self.asynchronous:
+            return self._create_async(**kwargs)
+        error = None
+        for spec in _chain(stage_spec(self.stage)):
+            key = self._cache_lookup(spec, kwargs)
+            if isinstance(key, BaseModel):
+                return key
+            start = time.perf_counter()
+            try:
+                response = self._submit(spec, kwargs).result()
+            except Exception as e:
+                record_latency(self.stage, spec.label, None)
+                error = e
+                continue
+            record_latency(self.stage, spec.label, time.perf_counter() - start)
+            self._cache_store(key, response)
+            return response
+        raise error
+
+    def _cache_lookup(self, spec: ProviderSpec, kwargs: dict):
+        """The cached response if there is one, else the key to store the response under (None: don't cache)."""
+        if not is_cacheable(kwargs.get("temperature")) or kwargs.get("response_model") is None:
+            record_cache(self.stage, "bypass")
+            return None
+        key = _response_cache_key(spec, kwargs)
+        value = get_cache().get(key)
+        record_cache(self.stage, "hit" if value is not None else "miss", key)
+        return kwargs["response_model"].model_validate_json(value) if value is not None else key
+
+    @staticmethod
+    def _cache_store(key: Optional[str], response) -> None:
+        if key is not None:
+            get_cache().put(key, response.model_dump_json())
+
+    async def _create_async(self, **kwargs):
+        error = None
+        for spec in _chain(stage_spec(self.stage)):
+            key = self._cache_lookup(spec, kwargs)
+            if isinstance(key, BaseModel):
+                return key
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wrap_future(self._submit(spec, kwargs))
+            except Exception as e:
+                record_latency(self.stage, spec.label, None)
+                error = e
+                continue
+            record_latency(self.stage, spec.label, time.perf_counter() - start)
+            self._cache_store(key, response)
+            return response
+        raise error
+
+    def create_partial(self, **kwargs):
+        """Stream partial objects; falls back only if a provider fails before yielding anything.
+
+        Streaming calls are never cached or coalesced: their point is to show output while it is
+        produced. They still take their turn in the model's rate budget.
+        """
+        error = None
+        for spec in _chain(stage_spec(self.stage)):
+            time.sleep(get_gateway(limits()).budget(spec.label).limiter.reserve())
+            start = time.perf_counter()
+            yielded = False
+            try:
+                for partial in self._client(spec).chat.completions.create_partial(**_request_kwargs(spec, kwargs)):
+                    yielded = True
+                    yield partial
+            except Exception as e:
+                record_latency(self.stage, spec.label, None)
+                if yielded:
+                    raise
+                error = e
+                continue
+            record_latency(self.stage, spec.label, time.perf_counter() - start)
+            return
+        raise error
+
+
+def get_instructor_client(stage: str, asynchronous: bool = False) -> InstructorStage:
+    return InstructorStage(stage, asynchronous)
+
+
+def latency_report(title: str = "Per-stage latency by provider") -> None:
+    """Print mean/p50/max latency for every stage and provider used in this process."""
+    table = Table(title=f"⏱️ {title}", header_style="bold blue")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Provider", style="magenta")
+    for column in ("Calls", "Failures", "Mean (s)", "p50 (s)", "Max (s)"):
+        table.add_column(column, justify="right", style="green")
+    for stage in sorted(set(LATENCIES) | set(FAILURES)):
+        labels = set(LATENCIES.get(stage, {})) | set(FAILURES.get(stage, {}))
+        for label in sorted(labels):
+            samples = LATENCIES.get(stage, {}).get(label, [])
+            failures = FAILURES.get(stage, {}).get(label, 0)
+            stats = (f"{statistics.mean(samples):.2f}", f"{statistics.median(samples):.2f}", f"{max(samples):.2f}") \
+                if samples else ("-", "-", "-")
+            table.add_row(stage, label, str(len(samples)), str(failures), *stats)
+    console.print(table)
+
+
+def compare_providers(stage: str, messages: List[dict], candidates: Optional[List[str]] = None, runs: int = 3) -> None:
+    """Run the same stage prompt on each candidate provider (no fallbacks) and print the latencies."""
+    candidates = candidates or [stage_spec(stage).label, "openai:gpt-4o-mini", "ollama:llama3.1"]
+    for label in dict.fromkeys(candidates):
+        spec = ProviderSpec.parse(label)
+        model = _langchain_model(spec, stage, temperature=0.0, max_tokens=None, cached=False)
+        for _ in range(runs):
+            try:
+                model.invoke(messages)
+            except Exception as e:
+                console.print(f"[red]{label} failed for {stage}: {e}[/red]")
+    latency_report(f"Provider comparison for '{stage}'")
+
+
+if __name__ == "__main__":
+    sample_script = "Be the storm, not the leaf. Like Marcus Aurelius, master your mind and the world bends."
+    compare_providers("validator", [{"role": "user", "content": "Is this script concise and motivational enough "
+                                                                "for a 10-second YouTube short? " + sample_script}])
+    compare_providers("proofreader", [{"role": "user", "content": "Proofread this script: " + sample_script}])
+    compare_providers("joke_critic", [{"role": "user", "content": "Make this joke snappier: "
+                                                                  "Why do programmers prefer dark mode? Light attracts bugs."}])
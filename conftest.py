@@ -0,0 +1,2 @@
+# Lets pytest import the scripts the way ``python -m`` does from the repository root
+# (``vision.image_pipeline``, ``common.llm_cache``, ...), without path setup in each test.
@@ -0,0 +1,201 @@
+import time
+import asyncio
+import argparse
+from functools import lru_cache
+from typing import List
+from pydantic import BaseModel, Field
+from rich.table import Table
+from generation.text_movie_plot_generator import (
+    DEFAULT_PROMPT,
+    Character,
+    TamilMoviePlot,
+    build_messages,
+    build_plot_view,
+    console,
+    generate_tamil_movie_plot,
+)
+from common.providers import get_instructor_client
+
+
+@lru_cache(maxsize=None)
+def skeleton_client():
+    return get_instructor_client("plot_skeleton", asynchronous=True)
+
+
+@lru_cache(maxsize=None)
+def scene_client():
+    return get_instructor_client("plot_scene", asynchronous=True)
+
+
+class SceneOutline(BaseModel):
+    heading: str = Field(..., description="Screenplay scene heading, e.g. 'EXT. MARINA BEACH - NIGHT'")
+    summary: str = Field(..., description="What happens in the scene and which characters appear, in 2-3 sentences")
+
+
+class MovieSkeleton(BaseModel):
+    title: str
+    tagline: str
+    hero: Character
+    heroine: Character
+    comedian: Character
+    villain: Character
+    setting: str
+    time_period: str
+    universe: str
+    main_theme: str
+    conflict: str
+    twist: str
+    climax: str
+    genre_emojis: str
+    scenes: List[SceneOutline] = Field(..., description="Ordered scene-by-scene outline of the whole movie")
+
+
+class SceneScript(BaseModel):
+    script: str = Field(..., description="The full scene with descriptions, character actions, dialogue and emojis")
+
+
+async def generate_skeleton(prompt: str, scene_count: int) -> MovieSkeleton:
+    """Phase 1: everything except the screenplay itself, plus an outline to write it from."""
+    messages = build_messages(prompt)
+    messages.append({
+        "role": "user",
+        "content": f"Do not write the full script yet. Instead of plot_summary, return an outline of exactly "
+                   f"{scene_count} scenes in story order, each with a scene heading and a short summary.",
+    })
+    return await skeleton_client().create(
+        response_model=MovieSkeleton,
+        messages=messages,
+        temperature=0.8,
+    )
+
+
+def _story_context(skeleton: MovieSkeleton) -> str:
+    characters = "\n".join(
+        f"- {role.capitalize()}: {character.name} {character.emoji} - {character.description}"
+        for role, character in (("hero", skeleton.hero), ("heroine", skeleton.heroine),
+                                ("comedian", skeleton.comedian), ("villain", skeleton.villain))
+    )
+    outline = "\n".join(f"{i}. {scene.heading}: {scene.summary}" for i, scene in enumerate(skeleton.scenes, 1))
+    return f"""
+        Title: {skeleton.title} - {skeleton.tagline}
+        Setting: {skeleton.setting}
+        Time period: {skeleton.time_period}
+        Universe: {skeleton.universe}
+        Main theme: {skeleton.main_theme}
+        Conflict: {skeleton.conflict}
+        Twist: {skeleton.twist}
+        Climax: {skeleton.climax}
+
+        Characters:
+{characters}
+
+        Scene outline:
+{outline}
+    """
+
+
+async def generate_scene(context: str, number: int, scene: SceneOutline, semaphore: asyncio.Semaphore) -> str:
+    """Phase 2: write one scene; every scene shares the same characters, setting and outline."""
+    async with semaphore:
+        response = await scene_client().create(
+            response_model=SceneScript,
+            messages=[
+                {
+                    "role": "system",
+                    "content": """
+                        You are a visionary Tamil cinema scriptwriter writing one scene of a larger screenplay.
+                        Stay consistent with the characters, setting and outline you are given, and use emojis to add visual flair.
+                    """,
+                },
+                {"role": "user", "content": context},
+                {
+                    "role": "user",
+                    "content": f"Write scene {number}: {scene.heading}\n{scene.summary}\n\n"
+                               f"Include vivid scene descriptions, character actions, realistic dialogue and emotional beats. "
+                               f"Write only this scene.",
+                },
+            ],
+            temperature=0.8,
+        )
+    return response.script
+
+
+async def generate_tamil_movie_plot_parallel(prompt: str, scene_count: int = 8, concurrency: int = 4) -> TamilMoviePlot:
+    skeleton = await generate_skeleton(prompt, scene_count)
+    context = _story_context(skeleton)
+    semaphore = asyncio.Semaphore(concurrency)
+    # One failed scene shouldn't throw away the ones that were written; it keeps its outline instead.
+    scripts = await asyncio.gather(*(
+        generate_scene(context, number, scene, semaphore)
+        for number, scene in enumerate(skeleton.scenes, 1)
+    ), return_exceptions=True)
+    failed = [number for number, script in enumerate(scripts, 1) if isinstance(script, BaseException)]
+    if failed and len(failed) == len(scripts):
+        raise scripts[0]
+    for number in failed:
+        console.print(f"⚠️ Scene {number} failed ({scripts[number - 1]}); keeping its outline.", style="yellow")
+    plot_summary = "\n\n".join(
+        f"🎬 Scene {number}: {scene.heading}\n\n"
+        f"{f'[Not written] {scene.summary}' if isinstance(script, BaseException) else script}"
+        for number, (scene, script) in enumerate(zip(skeleton.scenes, scripts), 1)
+    )
+    return TamilMoviePlot(**skeleton.model_dump(exclude={"scenes"}), plot_summary=plot_summary)
+
+
+def generate_plot(prompt: str, scene_count: int = 8, concurrency: int = 4):
+    try:
+        return asyncio.run(generate_tamil_movie_plot_parallel(prompt, scene_count, concurrency))
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+
+def benchmark(prompt: str, scene_count: int = 8, concurrency: int = 4, runs: int = 1) -> dict:
+    """Compare wall-clock time and script length of the single-call and two-phase generators."""
+    results = {}
+    for name, generate in (
+        ("single call", lambda: generate_tamil_movie_plot(prompt)),
+        (f"skeleton + {concurrency} parallel", lambda: generate_plot(prompt, scene_count, concurrency)),
+    ):
+        times, lengths = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            movie_plot = generate()
+            times.append(time.perf_counter() - start)
+            lengths.append(len(movie_plot.plot_summary) if movie_plot else 0)
+        results[name] = {"seconds": sum(times) / runs, "plot_summary_chars": sum(lengths) / runs}
+
+    table = Table(title=f"⏱️ Plot generation benchmark ({runs} run(s))", header_style="bold blue")
+    table.add_column("Generator", style="cyan")
+    table.add_column("Wall time (s)", justify="right", style="green")
+    table.add_column("Script length (chars)", justify="right", style="yellow")
+    for name, result in results.items():
+        table.add_row(name, f"{result['seconds']:.2f}", f"{result['plot_summary_chars']:.0f}")
+    console.print(table)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Tamil movie plot with scenes written in parallel")
+    parser.add_argument("--scenes", type=int, default=8, help="Number of scenes in the outline")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max scenes generated at once")
+    parser.add_argument("--benchmark", action="store_true", help="Compare against the single-call generator")
+    parser.add_argument("--runs", type=int, default=1, help="Benchmark runs per generator")
+    args = parser.parse_args()
+
+    user_prompt = DEFAULT_PROMPT
+
+    if args.benchmark:
+        benchmark(user_prompt, args.scenes, args.concurrency, args.runs)
+    else:
+        start = time.perf_counter()
+        movie_plot = generate_plot(user_prompt, args.scenes, args.concurrency)
+        if movie_plot:
+            console.print(build_plot_view(movie_plot))
+            console.print(f"⏱️ Total: {time.perf_counter() - start:.2f}s", style="dim")
+        else:
+            console.print("Failed to generate a movie plot.", style="bold red")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
-import instructor
+import os
+import time
+import argparse
+from functools import lru_cache
 from pydantic import BaseModel
-from openai import OpenAI
 from dotenv import load_dotenv
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
+from common.providers import get_instructor_client
+
 load_dotenv()
 
+console = Console()
+
+DEFAULT_PROMPT = "Create an innovative and exciting Tamil movie plot. Feel free to incorporate any themes, settings, or concepts you think would make for a thrilling story. Make it colorful, emotional, and unforgettable!"
+
 
 class Character(BaseModel):
     name: str
@@ -35,10 +44,12 @@ class TamilMoviePlot(BaseModel):
     genre_emojis: str
 
 
-client = instructor.from_openai(OpenAI())
+@lru_cache(maxsize=None)
+def client():
+    return get_instructor_client("plot")
 
 
-def generate_tamil_movie_plot(prompt):
+def build_messages(prompt):
     detailed_prompt = """
         Create a detailed Tamil movie script that includes the following elements, written in a scene-by-scene format, with vivid descriptions, dialogue, and appropriate emojis:
 
@@ -96,10 +107,13 @@ def generate_tamil_movie_plot(prompt):
             "content": prompt,
         },
     ]
+    return messages
+
 
+def generate_tamil_movie_plot(prompt):
+    messages = build_messages(prompt)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = client().create(
             response_model=TamilMoviePlot,
             messages=messages,
             temperature=0.8,
@@ -110,47 +124,99 @@ def generate_tamil_movie_plot(prompt):
         return None
 
 
-# Example usage
-user_prompt = "Create an innovative and exciting Tamil movie plot. Feel free to incorporate any themes, settings, or concepts you think would make for a thrilling story. Make it colorful, emotional, and unforgettable!"
-movie_plot = generate_tamil_movie_plot(user_prompt)
+def stream_tamil_movie_plot(prompt):
+    """Generate a plot with partial structured output, rendering fields live as they complete.
+
+    Returns the final plot together with time-to-first-content and total time in seconds.
+    """
+    messages = build_messages(prompt)
+    start = time.perf_counter()
+    first_content = None
+    movie_plot = None
+    try:
+        partial_plots = client().create_partial(
+            response_model=TamilMoviePlot,
+            messages=messages,
+            temperature=0.8,
+        )
+        with Live(build_plot_view(None), console=console, refresh_per_second=8, vertical_overflow="visible") as live:
+            for movie_plot in partial_plots:
+                if first_content is None and movie_plot.title:
+                    first_content = time.perf_counter() - start
+                live.update(build_plot_view(movie_plot))
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None, None, None
+    return movie_plot, first_content, time.perf_counter() - start
+
+
+def _character_cell(character):
+    if character is None:
+        return "…", "…"
+    name = f"{character.name or '…'} {character.emoji or ''}".strip()
+    return name, character.description or "…"
+
 
-if movie_plot:
-    console = Console()
+def build_plot_view(movie_plot):
+    """Build the console view of a (possibly partial) plot; missing fields show as placeholders."""
+    def get(field):
+        return getattr(movie_plot, field, None)
 
-    title = Text(f"🎬 {movie_plot.title}", style="bold magenta")
-    tagline = Text(f"✨ {movie_plot.tagline}", style="italic cyan")
-    
-    console.print(Panel(f"{title}\n{tagline}", expand=False))
+    title = Text(f"🎬 {get('title') or '…'}", style="bold magenta")
+    tagline = Text(f"✨ {get('tagline') or '…'}", style="italic cyan")
 
     character_table = Table(title="👥 Characters", show_header=True, header_style="bold blue")
     character_table.add_column("Role", style="dim", width=12)
     character_table.add_column("Name", style="cyan")
     character_table.add_column("Description", style="green")
-    
-    character_table.add_row("Hero", f"{movie_plot.hero.name} {movie_plot.hero.emoji}", movie_plot.hero.description)
-    character_table.add_row("Heroine", f"{movie_plot.heroine.name} {movie_plot.heroine.emoji}", movie_plot.heroine.description)
-    character_table.add_row("Comedian", f"{movie_plot.comedian.name} {movie_plot.comedian.emoji}", movie_plot.comedian.description)
-    character_table.add_row("Villain", f"{movie_plot.villain.name} {movie_plot.villain.emoji}", movie_plot.villain.description)
-    
-    console.print(character_table)
+
+    for role in ("hero", "heroine", "comedian", "villain"):
+        character_table.add_row(role.capitalize(), *_character_cell(get(role)))
 
     details_table = Table(show_header=False, show_edge=False, pad_edge=False)
     details_table.add_column("Attribute", style="bold yellow")
     details_table.add_column("Value")
-    
-    details_table.add_row("🌍 Setting", movie_plot.setting)
-    details_table.add_row("⏳ Time Period", movie_plot.time_period)
-    details_table.add_row("🌌 Universe", movie_plot.universe)
-    details_table.add_row("🎨 Main Theme", movie_plot.main_theme)
-    details_table.add_row("💥 Conflict", movie_plot.conflict)
-    details_table.add_row("🌪️ Twist", movie_plot.twist)
-    details_table.add_row("🏆 Climax", movie_plot.climax)
-    
-    console.print(details_table)
-
-    console.print(Panel(movie_plot.plot_summary, title="📜 Plot Summary", expand=False))
-    
-    console.print(f"\nGenre: {movie_plot.genre_emojis}", style="bold")
-else:
-    console = Console()
-    console.print("Failed to generate a movie plot.", style="bold red")
\ No newline at end of file
+
+    details_table.add_row("🌍 Setting", get("setting") or "…")
+    details_table.add_row("⏳ Time Period", get("time_period") or "…")
+    details_table.add_row("🌌 Universe", get("universe") or "…")
+    details_table.add_row("🎨 Main Theme", get("main_theme") or "…")
+    details_table.add_row("💥 Conflict", get("conflict") or "…")
+    details_table.add_row("🌪️ Twist", get("twist") or "…")
+    details_table.add_row("🏆 Climax", get("climax") or "…")
+
+    return Group(
+        Panel(f"{title}\n{tagline}", expand=False),
+        character_table,
+        details_table,
+        Panel(get("plot_summary") or "…", title="📜 Plot Summary", expand=False),
+        Text(f"\nGenre: {get('genre_emojis') or '…'}", style="bold"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Tamil movie plot")
+    parser.add_argument("--stream", action="store_true", help="Render fields live as they are generated")
+    args = parser.parse_args()
+
+    # Example usage
+    user_prompt = DEFAULT_PROMPT
+
+    if args.stream:
+        movie_plot, first_content, total = stream_tamil_movie_plot(user_prompt)
+        if movie_plot:
+            first_content_text = f"{first_content:.2f}s" if first_content is not None else "n/a"
+            console.print(f"⏱️ Time to first content: {first_content_text} | Total: {total:.2f}s", style="dim")
+    else:
+        start = time.perf_counter()
+        movie_plot = generate_tamil_movie_plot(user_prompt)
+        if movie_plot:
+            console.print(build_plot_view(movie_plot))
+            console.print(f"⏱️ Total: {time.perf_counter() - start:.2f}s", style="dim")
+
+    if not movie_plot:
+        console.print("Failed to generate a movie plot.", style="bold red")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+import argparse
+import statistics
+from rich.console import Console
+from rich.table import Table
+from ollama_local_models.tool_router import route_tools
+from ollama_local_models.travel_tools import registry, offline_chat
+from ollama_local_models.ollama_local_llm_extraction import MODEL, USER_PROMPT
+
+console = Console()
+
+# (prompt, tools a correct answer needs)
+CASES = [
+    (USER_PROMPT, {"get_comprehensive_weather_info", "get_air_quality_and_pollen_info", "get_travel_advisories",
+                   "get_local_events", "get_restaurant_recommendations"}),
+    ("Wie wird das Wetter nächste Woche in Berlin, und was sollte ich anziehen?",
+     {"get_comprehensive_weather_info"}),
+    ("Any good restaurants near Union Square in San Francisco for a client dinner?",
+     {"get_restaurant_recommendations"}),
+    ("¿Hay alertas de viaje para Ciudad de México y cómo está la calidad del aire?",
+     {"get_travel_advisories", "get_air_quality_and_pollen_info"}),
+    ("Quels événements de networking à Paris la semaine prochaine ?",
+     {"get_local_events"}),
+    # "essential" must not pull in restaurants via "essen".
+    ("Which essential documents do I need, and is a visa required for Japan?",
+     {"get_travel_advisories"}),
+]
+
+# Router-only cases (no model call) with words that contain a short keyword without meaning it.
+ROUTER_CASES = [
+    ("Do I need a visa for Buenos Aires?", {"get_travel_advisories"}),
+    ("Is the rooftop show worth it, or will there be rain showers in Lisbon?",
+     {"get_local_events", "get_comprehensive_weather_info"}),
+    ("Any restaurants with a lawn for an outdoor lunch in Austin?", {"get_restaurant_recommendations"}),
+    ("Is it safe to walk around Lima at night, and which local laws should I know?", {"get_travel_advisories"}),
+    ("What should I pack for Oslo in March, and is the airport far from the center?",
+     {"get_comprehensive_weather_info"}),
+    ("Wie hoch ist die Pollenbelastung in München, und gibt es ein Konzert am Samstag?",
+     {"get_air_quality_and_pollen_info", "get_local_events"}),
+    ("Où manger près du Louvre, et quelle est la qualité de l'air ?",
+     {"get_restaurant_recommendations", "get_air_quality_and_pollen_info"}),
+    ("¿Qué ropa llevo a Madrid y hay algún evento cultural?",
+     {"get_comprehensive_weather_info", "get_local_events"}),
+]
+
+# The router has to keep this precision on CASES + ROUTER_CASES; the tests and this script check it.
+MIN_ROUTER_PRECISION = 0.9
+
+
+def router_accuracy(cases=None) -> dict:
+    """Precision and recall of the tools the router selects, micro-averaged over labelled prompts."""
+    cases = CASES + ROUTER_CASES if cases is None else cases
+    selected = expected_total = correct = 0
+    for prompt, expected in cases:
+        sent = {tool["function"]["name"] for tool in route_tools(prompt, registry.schemas)[0]}
+        selected += len(sent)
+        expected_total += len(expected)
+        correct += len(sent & expected)
+    return {"cases": len(cases), "precision": correct / selected, "recall": correct / expected_total}
+
+
+def run_case(chat, prompt: str, expected: set, prune: bool) -> dict:
+    tools = route_tools(prompt, registry.schemas)[0] if prune else registry.schemas
+    response = chat(model=MODEL, messages=[{"role": "user", "content": prompt}], tools=tools)
+    called = {call["function"]["name"] for call in response["message"].get("tool_calls") or []}
+    sent = {tool["function"]["name"] for tool in tools}
+    return {
+        "tools_sent": len(tools),
+        "schema_chars": len(json.dumps(tools)),
+        "router_precision": len(sent & expected) / len(sent),
+        "router_recall": len(sent & expected) / len(expected),
+        "call_recall": len(called & expected) / len(expected),
+        "prompt_eval_count": response.get("prompt_eval_count"),
+        "prompt_eval_ms": response["prompt_eval_duration"] / 1e6 if response.get("prompt_eval_duration") else None,
+    }
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return statistics.mean(values) if values else None
+
+
+def benchmark(chat, runs: int = 3) -> dict:
+    """Prompt-eval cost and tool-call recall with and without pruning, averaged over all cases.
+
+    Ollama reuses the cached prefix of the previous prompt, so the two modes are interleaved per
+    case and the one going first flips every run; an untimed first pass loads the model.
+    """
+    for prompt, expected in CASES:
+        for prune in (False, True):
+            run_case(chat, prompt, expected, prune)
+
+    results = {False: [], True: []}
+    for run in range(runs):
+        order = (False, True) if run % 2 == 0 else (True, False)
+        for prompt, expected in CASES:
+            for prune in order:
+                results[prune].append(run_case(chat, prompt, expected, prune))
+    summary = {"pruned" if prune else "all tools": {key: _mean([result[key] for result in mode_results])
+                                                    for key in mode_results[0]}
+               for prune, mode_results in sorted(results.items())}
+
+    table = Table(title=f"⏱️ Tool routing benchmark ({len(CASES)} prompts x {runs})", header_style="bold blue")
+    table.add_column("Mode", style="cyan")
+    for column in ("Tools sent", "Schema chars", "Prompt tokens", "Prompt eval (ms)", "Router precision",
+                   "Router recall", "Call recall"):
+        table.add_column(column, justify="right", style="green")
+    for mode, result in summary.items():
+        table.add_row(
+            mode,
+            f"{result['tools_sent']:.1f}",
+            f"{result['schema_chars']:.0f}",
+            f"{result['prompt_eval_count']:.0f}" if result["prompt_eval_count"] is not None else "-",
+            f"{result['prompt_eval_ms']:.0f}" if result["prompt_eval_ms"] is not None else "-",
+            f"{result['router_precision']:.0%}",
+            f"{result['router_recall']:.0%}",
+            f"{result['call_recall']:.0%}",
+        )
+    console.print(table)
+    accuracy = router_accuracy()
+    console.print(f"Router on {accuracy['cases']} labelled prompts: precision {accuracy['precision']:.0%}, "
+                  f"recall {accuracy['recall']:.0%}", style="bold")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark relevance-based tool pruning")
+    parser.add_argument("--offline", action="store_true", help="Use a scripted stand-in for ollama.chat")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per prompt and mode")
+    args = parser.parse_args()
+
+    if args.offline:
+        chat = offline_chat
+    else:
+        import ollama
+        chat = ollama.chat
+    benchmark(chat, args.runs)
+    if router_accuracy()["precision"] < MIN_ROUTER_PRECISION:
+        raise SystemExit(f"Router precision fell below {MIN_ROUTER_PRECISION:.0%}")
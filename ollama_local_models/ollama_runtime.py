@@ -0,0 +1,112 @@
+import os
+import time
+import asyncio
+import argparse
+from typing import List, Optional
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+def response_metrics(response, wall_seconds: float) -> dict:
+    """Timing fields Ollama reports on every response (nanoseconds), converted to ms and tokens/s."""
+    eval_count = response.get("eval_count") or 0
+    eval_ns = response.get("eval_duration") or 0
+    return {
+        "wall_ms": wall_seconds * 1000,
+        "load_ms": (response.get("load_duration") or 0) / 1e6,
+        "prompt_tokens": response.get("prompt_eval_count") or 0,
+        "prompt_eval_ms": (response.get("prompt_eval_duration") or 0) / 1e6,
+        "eval_tokens": eval_count,
+        "eval_tokens_per_second": eval_count / (eval_ns / 1e9) if eval_ns else 0.0,
+    }
+
+
+class OllamaRuntime:
+    """A warm Ollama model: preloaded once, kept resident, and shared by concurrent requests.
+
+    ``parallel`` should match the server's ``OLLAMA_NUM_PARALLEL``; extra requests queue
+    here instead of inside Ollama, so a burst can't evict the model or time out.
+    """
+
+    def __init__(self, model: str = "llama3.1", host: Optional[str] = None, keep_alive=DEFAULT_KEEP_ALIVE,
+                 parallel: Optional[int] = None):
+        self.model = model
+        self.keep_alive = keep_alive
+        # Imported here so --offline runs, which never build a runtime, don't need the ollama package.
+        from ollama import AsyncClient
+        self.client = AsyncClient(host=host)
+        self.parallel = parallel or int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+        self._slots = asyncio.Semaphore(self.parallel)
+        self.metrics: List[dict] = []
+        self.load_metrics: Optional[dict] = None
+
+    async def preload(self) -> dict:
+        """Load the model into memory without generating anything (an empty prompt)."""
+        start = time.perf_counter()
+        response = await self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+        self.load_metrics = response_metrics(response, time.perf_counter() - start)
+        return self.load_metrics
+
+    async def chat(self, messages: List[dict], **kwargs):
+        async with self._slots:
+            start = time.perf_counter()
+            response = await self.client.chat(model=self.model, messages=messages, keep_alive=self.keep_alive, **kwargs)
+            self.metrics.append(response_metrics(response, time.perf_counter() - start))
+        return response
+
+    async def chat_many(self, conversations: List[List[dict]], **kwargs) -> list:
+        return await asyncio.gather(*(self.chat(messages, **kwargs) for messages in conversations))
+
+    async def unload(self) -> None:
+        await self.client.generate(model=self.model, prompt="", keep_alive=0)
+
+    def report(self, title: str = "Ollama request metrics") -> None:
+        table = Table(title=f"⏱️ {title} ({self.model})", header_style="bold blue")
+        for column in ("#", "Wall (ms)", "Load (ms)", "Prompt tokens", "Prompt eval (ms)", "Eval tokens", "Eval tok/s"):
+            table.add_column(column, justify="right", style="green" if column != "#" else "cyan")
+        rows = ([("preload", self.load_metrics)] if self.load_metrics else []) + \
+               [(str(i), metrics) for i, metrics in enumerate(self.metrics, 1)]
+        for label, metrics in rows:
+            table.add_row(label, f"{metrics['wall_ms']:.0f}", f"{metrics['load_ms']:.0f}",
+                          str(metrics["prompt_tokens"]), f"{metrics['prompt_eval_ms']:.0f}",
+                          str(metrics["eval_tokens"]), f"{metrics['eval_tokens_per_second']:.1f}")
+        console.print(table)
+
+
+async def demo(host: Optional[str], requests: int, parallel: Optional[int], cold: bool) -> None:
+    from ollama_local_models.ollama_local_llm_extraction import MODEL, USER_PROMPT
+
+    runtime = OllamaRuntime(MODEL, host=host, parallel=parallel)
+    if cold:
+        await runtime.unload()
+    else:
+        with console.status(f"[bold green]Preloading {MODEL}..."):
+            await runtime.preload()
+
+    start = time.perf_counter()
+    await runtime.chat_many([[{"role": "user", "content": USER_PROMPT}] for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+
+    runtime.report("cold start" if cold else "warm runtime")
+    console.print(f"{requests} request(s) in {elapsed:.2f}s with parallelism {runtime.parallel}", style="bold")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preloaded, kept-alive Ollama runtime with concurrent requests")
+    parser.add_argument("--host", default=None, help="Ollama host (default: OLLAMA_HOST or localhost:11434)")
+    parser.add_argument("--requests", type=int, default=4, help="Concurrent chat requests to send")
+    parser.add_argument("--parallel", type=int, default=None, help="Max in-flight requests (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--cold", action="store_true", help="Unload first and skip preloading, for comparison")
+    parser.add_argument("--stub", action="store_true", help="Run against a local stub server instead of Ollama")
+    args = parser.parse_args()
+
+    host = args.host
+    if args.stub:
+        from ollama_local_models.stub_ollama_server import start_stub_server
+        server = start_stub_server(port=11435, time_scale=0.25)
+        host = "http://127.0.0.1:11435"
+    asyncio.run(demo(host, args.requests, args.parallel, args.cold))
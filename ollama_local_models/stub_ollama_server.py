@@ -0,0 +1,164 @@
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Rough CPU-only llama3.1 8B numbers, so the stub behaves like the real hosts.
+DEFAULT_LOAD_SECONDS = 3.0
+DEFAULT_PROMPT_TOKENS_PER_SECOND = 60.0
+DEFAULT_EVAL_TOKENS_PER_SECOND = 8.0
+DEFAULT_KEEP_ALIVE_SECONDS = 300.0
+
+
+def parse_keep_alive(value) -> float:
+    """Seconds from an Ollama keep_alive value: a number, "30s"/"5m"/"1h", or negative for forever."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_SECONDS
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return DEFAULT_KEEP_ALIVE_SECONDS
+    number = float(match.group(1))
+    if number < 0:
+        return float("inf")
+    return number * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+class StubModelHost:
+    """Simulated model residency, prompt evaluation and generation with Ollama-like timings."""
+
+    def __init__(self, load_seconds: float, prompt_rate: float, eval_rate: float, parallel: int,
+                 time_scale: float = 1.0):
+        self.load_seconds = load_seconds
+        self.prompt_rate = prompt_rate
+        self.eval_rate = eval_rate
+        self.time_scale = time_scale
+        self.slots = threading.Semaphore(parallel)
+        self.lock = threading.Lock()
+        self.expires = {}  # model -> monotonic time it gets unloaded
+
+    def _sleep(self, seconds: float) -> None:
+        time.sleep(seconds * self.time_scale)
+
+    def run(self, model: str, prompt_text: str, keep_alive) -> dict:
+        started = time.perf_counter()
+        load_duration = 0.0
+        keep_seconds = parse_keep_alive(keep_alive)
+        if not prompt_text and keep_seconds == 0:
+            # An unload request: Ollama drops the model without loading it first.
+            with self.lock:
+                self.expires.pop(model, None)
+            return self._response(model, started, "unload", 0.0, 0, 0.0, 0, 0.0)
+        with self.lock:
+            now = time.monotonic()
+            if self.expires.get(model, 0) <= now:
+                self._sleep(self.load_seconds)
+                load_duration = self.load_seconds
+            # Resident while requests are in flight; keep_alive applies once this one finishes.
+            self.expires[model] = float("inf")
+        with self.slots:
+            prompt_tokens = max(1, len(prompt_text) // 4) if prompt_text else 0
+            prompt_seconds = prompt_tokens / self.prompt_rate
+            eval_tokens = 24 if prompt_text else 0
+            eval_seconds = eval_tokens / self.eval_rate
+            self._sleep(prompt_seconds + eval_seconds)
+        with self.lock:
+            if keep_seconds == 0:
+                self.expires.pop(model, None)
+            else:
+                self.expires[model] = time.monotonic() + keep_seconds
+        return self._response(model, started, "stop" if prompt_text else "load", load_duration,
+                              prompt_tokens, prompt_seconds, eval_tokens, eval_seconds)
+
+    @staticmethod
+    def _response(model: str, started: float, done_reason: str, load_duration: float, prompt_tokens: int,
+                  prompt_seconds: float, eval_tokens: int, eval_seconds: float) -> dict:
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": True,
+            "done_reason": done_reason,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": int(load_duration * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int(eval_seconds * 1e9),
+        }
+
+    def running_models(self) -> list:
+        now = time.monotonic()
+        with self.lock:
+            return [{"name": model, "model": model} for model, expires in self.expires.items() if expires > now]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    host: StubModelHost = None
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/ps":
+            self._send_json({"models": self.host.running_models()})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = request.get("model", "llama3.1")
+        if self.path == "/api/chat":
+            messages = request.get("messages") or []
+            prompt_text = "".join(str(message.get("content", "")) for message in messages)
+            prompt_text += json.dumps(request.get("tools") or "")
+            result = self.host.run(model, prompt_text if messages else "", request.get("keep_alive"))
+            result["message"] = {"role": "assistant",
+                                 "content": f"(stub) {model} answered {len(messages)} message(s)." if messages else ""}
+        elif self.path == "/api/generate":
+            prompt_text = request.get("prompt") or ""
+            result = self.host.run(model, prompt_text, request.get("keep_alive"))
+            result["response"] = f"(stub) {model} completion." if prompt_text else ""
+        else:
+            self._send_json({"error": "not found"}, 404)
+            return
+        self._send_json(result)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port: int = 11435, load_seconds: float = DEFAULT_LOAD_SECONDS,
+                      prompt_rate: float = DEFAULT_PROMPT_TOKENS_PER_SECOND,
+                      eval_rate: float = DEFAULT_EVAL_TOKENS_PER_SECOND, parallel: int = 4,
+                      time_scale: float = 1.0) -> ThreadingHTTPServer:
+    """Start the stub in a background thread and return the server (call ``shutdown()`` to stop)."""
+    handler = type("BoundStubHandler", (StubHandler,), {
+        "host": StubModelHost(load_seconds, prompt_rate, eval_rate, parallel, time_scale),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama HTTP API")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--load-seconds", type=float, default=DEFAULT_LOAD_SECONDS)
+    parser.add_argument("--parallel", type=int, default=4, help="Like OLLAMA_NUM_PARALLEL")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.load_seconds, parallel=args.parallel)
+    print(f"Stub Ollama server listening on http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
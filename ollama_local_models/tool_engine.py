@@ -0,0 +1,186 @@
+import json
+import time
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ToolError(Exception):
+    """Raised when a tool call names an unknown tool or has invalid arguments."""
+
+
+_JSON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+def _coerce(value: Any, expected_type: str) -> Any:
+    """Undo the usual local-model slip of sending numbers and booleans as strings."""
+    if not isinstance(value, str):
+        return value
+    try:
+        if expected_type == "integer":
+            return int(value)
+        if expected_type == "number":
+            return float(value)
+    except ValueError:
+        return value
+    if expected_type == "boolean" and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def validate_value(value: Any, schema: dict, path: str) -> Any:
+    """Validate (and lightly coerce) a value against the JSON-schema subset our tools use."""
+    expected_type = schema.get("type")
+    if expected_type:
+        value = _coerce(value, expected_type)
+        python_type = _JSON_TYPES[expected_type]
+        # bool is an int subclass, so don't let True pass as an integer.
+        if not isinstance(value, python_type) or (expected_type in ("integer", "number") and isinstance(value, bool)):
+            raise ToolError(f"'{path}' must be of type {expected_type}, got {value!r}")
+    if "enum" in schema and value not in schema["enum"]:
+        raise ToolError(f"'{path}' must be one of {schema['enum']}, got {value!r}")
+    if "minimum" in schema and value < schema["minimum"]:
+        raise ToolError(f"'{path}' must be >= {schema['minimum']}, got {value!r}")
+    if "maximum" in schema and value > schema["maximum"]:
+        raise ToolError(f"'{path}' must be <= {schema['maximum']}, got {value!r}")
+    if schema.get("format") == "date":
+        try:
+            date.fromisoformat(value)
+        except ValueError:
+            raise ToolError(f"'{path}' must be a date in YYYY-MM-DD format, got {value!r}")
+    if expected_type == "array" and "items" in schema:
+        value = [validate_value(item, schema["items"], f"{path}[{i}]") for i, item in enumerate(value)]
+    if expected_type == "object":
+        value = validate_arguments(value, schema, path)
+    return value
+
+
+def validate_arguments(arguments: dict, schema: dict, path: str = "arguments") -> dict:
+    """Validate tool-call arguments against an object schema and return the cleaned arguments.
+
+    Properties the schema doesn't declare are dropped rather than passed to the tool.
+    """
+    properties = schema.get("properties", {})
+    missing = [name for name in schema.get("required", []) if arguments.get(name) is None]
+    if missing:
+        raise ToolError(f"Missing required {path}: {', '.join(missing)}")
+    return {
+        name: validate_value(value, properties[name], f"{path}.{name}" if path != "arguments" else name)
+        for name, value in arguments.items()
+        if name in properties and value is not None
+    }
+
+
+def normalize_arguments(arguments: dict) -> str:
+    """Cache key for arguments: key order, case, whitespace and list order don't matter."""
+    def normalize(value):
+        if isinstance(value, str):
+            return " ".join(value.split()).casefold()
+        if isinstance(value, list):
+            return sorted((normalize(item) for item in value), key=json.dumps)
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        return value
+
+    return json.dumps(normalize(arguments), sort_keys=True)
+
+
+class ToolRegistry:
+    """Registry of callable tools with their JSON schemas and a per-tool TTL result cache."""
+
+    def __init__(self, default_ttl: float = 300.0):
+        self.default_ttl = default_ttl
+        self.tools: Dict[str, dict] = {}
+        self._functions: Dict[str, Callable[..., Any]] = {}
+        self._ttls: Dict[str, float] = {}
+        self._cache: Dict[tuple, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def register(self, schema: dict, ttl: Optional[float] = None):
+        """Decorator registering a function under the name in its ``{'type': 'function', ...}`` schema."""
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            name = schema["function"]["name"]
+            self.tools[name] = schema
+            self._functions[name] = function
+            self._ttls[name] = self.default_ttl if ttl is None else ttl
+            return function
+        return decorator
+
+    @property
+    def schemas(self) -> List[dict]:
+        return list(self.tools.values())
+
+    def validate(self, name: str, arguments: dict) -> dict:
+        if name not in self.tools:
+            raise ToolError(f"Unknown tool: {name}")
+        return validate_arguments(arguments or {}, self.tools[name]["function"]["parameters"])
+
+    def call(self, name: str, arguments: dict) -> Any:
+        arguments = self.validate(name, arguments)
+        key = (name, normalize_arguments(arguments))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                self.cache_hits += 1
+                return cached[1]
+            self.cache_misses += 1
+        result = self._functions[name](**arguments)
+        with self._lock:
+            self._cache[key] = (now + self._ttls[name], result)
+        return result
+
+    def execute(self, tool_calls: List[dict], max_workers: int = 8) -> List[dict]:
+        """Run independent tool calls concurrently; results come back in call order.
+
+        Each result is ``{"name", "arguments", "result"}`` or, on failure, ``{"name", "arguments", "error"}``
+        so the error can be shown to the model instead of aborting the conversation.
+        """
+        def run(call: dict) -> dict:
+            name = call["function"]["name"]
+            arguments = call["function"]["arguments"]
+            try:
+                return {"name": name, "arguments": arguments, "result": self.call(name, arguments)}
+            except Exception as e:
+                return {"name": name, "arguments": arguments, "error": str(e)}
+
+        if not tool_calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tool_calls))) as executor:
+            return list(executor.map(run, tool_calls))
+
+
+def run_tool_conversation(chat: Callable[..., Any], model: str, messages: List[dict], registry: ToolRegistry,
+                          max_rounds: int = 3, on_tool_results: Optional[Callable[[List[dict]], None]] = None,
+                          tools: Optional[List[dict]] = None, **chat_kwargs):
+    """Chat until the model stops calling tools, executing each round of tool calls in between.
+
+    ``chat`` is ``ollama.chat`` or anything with the same signature. ``tools`` restricts the
+    schemas sent to the model (default: every registered tool). Returns the final response.
+    """
+    messages = list(messages)
+    tools = registry.schemas if tools is None else tools
+    response = chat(model=model, messages=messages, tools=tools, **chat_kwargs)
+    for _ in range(max_rounds):
+        tool_calls = response["message"].get("tool_calls")
+        if not tool_calls:
+            break
+        results = registry.execute(tool_calls)
+        if on_tool_results:
+            on_tool_results(results)
+        messages.append(response["message"])
+        for result in results:
+            content = result["result"] if "result" in result else {"error": result["error"]}
+            messages.append({"role": "tool", "content": json.dumps(content, ensure_ascii=False)})
+        response = chat(model=model, messages=messages, tools=tools, **chat_kwargs)
+    return response
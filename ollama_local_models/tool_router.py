@@ -0,0 +1,103 @@
+import re
+import copy
+import unicodedata
+from typing import Dict, List, Tuple
+
+# Keywords per tool in English, German, French and Spanish. A plain keyword matches the
+# word itself or the word plus an inflectional ending ("dress", "dresses", "dressed", but not
+# "dressage"). Keywords of SHORT_KEYWORD_LENGTH letters or fewer only match the whole word,
+# since endings turn them into unrelated words ("law" -> "lawn", "show" -> "shower", "aire" ->
+# "Aires"), so plurals that matter are listed separately. A keyword ending in "*" is a stem
+# matching any word that starts with it, for truncated roots and German compounds ("wetter*"
+# also matches "Wetterbericht").
+TOOL_KEYWORDS: Dict[str, List[str]] = {
+    "get_comprehensive_weather_info": [
+        "weather", "forecast", "temperat*", "rain", "snow", "climat*", "cloth", "dress", "pack", "packing",
+        "wetter*", "vorhersage", "regen", "schnee*", "klima", "kleidung", "anzieh*",
+        "meteo*", "temps", "pluie", "neige", "vetement",
+        "clima", "tiempo", "lluvia", "nieve", "ropa",
+    ],
+    "get_air_quality_and_pollen_info": [
+        "air", "pollen*", "allerg*", "smog", "pollution", "asthma*",
+        "luft*", "heuschnupfen", "feinstaub*",
+        "qualite",
+        "aire", "polen", "alergi*", "contaminacion",
+    ],
+    "get_travel_advisories": [
+        "advisor*", "safe", "safety", "visa", "entry", "passport", "warning", "vaccin*", "law", "laws",
+        "reisehinweis*", "reisewarnung*", "sicherheit*", "einreise*", "impf*", "gesetz*",
+        "securite", "avertissement", "passeport",
+        "alerta", "seguridad", "pasaporte", "advertencia",
+    ],
+    "get_local_events": [
+        "event", "concert", "festival", "conference", "network", "meetup", "exhibit*", "show", "shows", "cultur*",
+        "veranstaltung*", "konzert*", "netzwerk*", "ausstellung*", "kultur*", "konferenz*", "messe",
+        "evenement", "spectacle",
+        "evento", "concierto", "exposicion",
+    ],
+    "get_restaurant_recommendations": [
+        "restaurant", "dinner", "lunch", "breakfast", "eat", "food", "cuisine", "dining",
+        "essen", "abendessen", "mittagessen", "kundentreff*", "kueche", "lokal",
+        "diner", "dejeuner", "manger",
+        "restaurante", "cena", "almuerzo", "comida", "comer",
+    ],
+}
+
+# Endings a plain keyword may take: plurals, verb forms and German/French/Spanish inflections.
+INFLECTIONS = {"", "s", "es", "e", "en", "n", "er", "ern", "ers", "ing", "ings", "ed"}
+SHORT_KEYWORD_LENGTH = 4
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> List[str]:
+    """Casefold, transliterate umlauts and strip accents, then split into words."""
+    text = text.casefold().replace("ä", "ae").replace("ö", "oe").replace("ü", "ue").replace("ß", "ss")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _WORD.findall(text)
+
+
+def _matches(word: str, keyword: str) -> bool:
+    if keyword.endswith("*"):
+        return word.startswith(keyword[:-1])
+    if len(keyword) <= SHORT_KEYWORD_LENGTH:
+        return word == keyword
+    return word.startswith(keyword) and word[len(keyword):] in INFLECTIONS
+
+
+def score_tools(message: str, tool_names: List[str]) -> Dict[str, int]:
+    """Number of words in ``message`` matching each tool's keyword stems."""
+    words = normalize_text(message)
+    scores = {}
+    for name in tool_names:
+        stems = TOOL_KEYWORDS.get(name, [])
+        scores[name] = sum(1 for word in words if any(_matches(word, stem) for stem in stems))
+    return scores
+
+
+def compact_tool(tool: dict) -> dict:
+    """Shrink a tool schema: first sentence of the description, no per-property descriptions.
+
+    Types, enums, formats, bounds and required fields are kept, since the model needs
+    them to produce valid arguments.
+    """
+    tool = copy.deepcopy(tool)
+    function = tool["function"]
+    function["description"] = function["description"].split(",")[0].split(".")[0]
+    for schema in function["parameters"].get("properties", {}).values():
+        schema.pop("description", None)
+    return tool
+
+
+def route_tools(message: str, tools: List[dict], min_score: int = 1, compact: bool = True) -> Tuple[List[dict], Dict[str, int]]:
+    """Select the tools relevant to ``message``.
+
+    Falls back to all tools when nothing matches, so an unusual phrasing costs
+    prompt tokens instead of a missed tool call.
+    """
+    scores = score_tools(message, [tool["function"]["name"] for tool in tools])
+    selected = [tool for tool in tools if scores[tool["function"]["name"]] >= min_score] or tools
+    if compact:
+        selected = [compact_tool(tool) for tool in selected]
+    return selected, scores
@@ -0,0 +1,228 @@
+import json
+import random
+from datetime import date, timedelta
+from typing import List, Optional
+from ollama_local_models.tool_engine import ToolRegistry
+
+WEATHER_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'get_comprehensive_weather_info',
+        'description': 'Get detailed weather information including current conditions, forecast, and climate data',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'city': {'type': 'string', 'description': 'The name of the city'},
+                'country': {'type': 'string', 'description': 'The country where the city is located'},
+                'start_date': {'type': 'string', 'format': 'date',
+                               'description': 'Start date of the trip (YYYY-MM-DD)'},
+                'end_date': {'type': 'string', 'format': 'date',
+                             'description': 'End date of the trip (YYYY-MM-DD)'},
+                'units': {'type': 'string', 'enum': ['metric', 'imperial'],
+                          'description': 'The unit system for measurements'},
+                'include_hourly': {'type': 'boolean', 'description': 'Include hourly forecast data'},
+                'include_alerts': {'type': 'boolean', 'description': 'Include weather alerts and warnings'},
+            },
+            'required': ['city', 'country', 'start_date', 'end_date'],
+        },
+    },
+}
+
+AIR_QUALITY_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'get_air_quality_and_pollen_info',
+        'description': 'Get current air quality and pollen information for a city',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'city': {'type': 'string', 'description': 'The name of the city'},
+                'country': {'type': 'string', 'description': 'The country where the city is located'},
+                'include_forecast': {'type': 'boolean',
+                                     'description': 'Include air quality and pollen forecast'},
+                'forecast_days': {'type': 'integer', 'minimum': 1, 'maximum': 7,
+                                  'description': 'Number of forecast days'},
+            },
+            'required': ['city', 'country'],
+        },
+    },
+}
+
+TRAVEL_ADVISORIES_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'get_travel_advisories',
+        'description': 'Get current travel advisories and safety information for a destination',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'city': {'type': 'string', 'description': 'The name of the city'},
+                'country': {'type': 'string', 'description': 'The country where the city is located'},
+                'advisory_types': {'type': 'array', 'items': {'type': 'string',
+                                                              'enum': ['safety', 'health', 'entry_requirements',
+                                                                       'local_laws']},
+                                   'description': 'Types of advisories to include'},
+            },
+            'required': ['city', 'country'],
+        },
+    },
+}
+
+LOCAL_EVENTS_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'get_local_events',
+        'description': 'Get information about local events in a city during a specific date range',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'city': {'type': 'string', 'description': 'The name of the city'},
+                'start_date': {'type': 'string', 'format': 'date', 'description': 'Start date (YYYY-MM-DD)'},
+                'end_date': {'type': 'string', 'format': 'date', 'description': 'End date (YYYY-MM-DD)'},
+                'event_types': {'type': 'array', 'items': {'type': 'string',
+                                                           'enum': ['business', 'cultural', 'networking',
+                                                                    'entertainment']},
+                                'description': 'Types of events to include'},
+                'max_results': {'type': 'integer', 'minimum': 1, 'maximum': 50,
+                                'description': 'Maximum number of events to return'},
+            },
+            'required': ['city', 'start_date', 'end_date'],
+        },
+    },
+}
+
+RESTAURANTS_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'get_restaurant_recommendations',
+        'description': 'Get restaurant recommendations in a specific area of a city',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'city': {'type': 'string', 'description': 'The name of the city'},
+                'area': {'type': 'string', 'description': 'Specific area or district in the city'},
+                'cuisine_types': {'type': 'array', 'items': {'type': 'string'},
+                                  'description': 'Types of cuisine to consider'},
+                'price_range': {'type': 'string', 'enum': ['$', '$$', '$$$', '$$$$'],
+                                'description': 'Price range of restaurants'},
+                'suitable_for': {'type': 'array', 'items': {'type': 'string',
+                                                            'enum': ['business_meetings', 'groups',
+                                                                     'quiet_conversation', 'quick_meal']},
+                                 'description': 'Suitability factors'},
+                'min_rating': {'type': 'number', 'minimum': 0, 'maximum': 5,
+                               'description': 'Minimum rating of restaurants'},
+                'max_results': {'type': 'integer', 'minimum': 1, 'maximum': 20,
+                                'description': 'Maximum number of recommendations'},
+            },
+            'required': ['city', 'area'],
+        },
+    },
+}
+
+registry = ToolRegistry(default_ttl=600.0)
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic randomness per argument set, so stub answers are stable between runs."""
+    return random.Random(json.dumps(parts, sort_keys=True, default=str))
+
+
+def _dates(start_date: str, end_date: str) -> List[date]:
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    return [start + timedelta(days=i) for i in range(max((end - start).days, 0) + 1)]
+
+
+# Local stub implementations. They return realistic-looking data without any network
+# access, so the whole tool-calling loop can be exercised offline.
+
+@registry.register(WEATHER_TOOL, ttl=1800.0)
+def get_comprehensive_weather_info(city: str, country: str, start_date: str, end_date: str, units: str = "metric",
+                                   include_hourly: bool = False, include_alerts: bool = False) -> dict:
+    rng = _rng(city, country, start_date, end_date)
+    forecast = []
+    for day in _dates(start_date, end_date):
+        high_c = rng.randint(8, 24)
+        high, low = (high_c, high_c - rng.randint(4, 9)) if units == "metric" \
+            else (round(high_c * 9 / 5 + 32), round((high_c - 6) * 9 / 5 + 32))
+        forecast.append({"date": day.isoformat(), "high": high, "low": low,
+                         "conditions": rng.choice(["sunny", "partly cloudy", "cloudy", "light rain"])})
+    result = {"city": city, "country": country, "units": units, "forecast": forecast}
+    if include_hourly:
+        result["hourly"] = "Hourly data is not available from the stub."
+    if include_alerts:
+        result["alerts"] = []
+    return result
+
+
+@registry.register(AIR_QUALITY_TOOL, ttl=900.0)
+def get_air_quality_and_pollen_info(city: str, country: str, include_forecast: bool = False,
+                                    forecast_days: int = 3) -> dict:
+    rng = _rng(city, country)
+    levels = ["low", "moderate", "high"]
+    result = {"city": city, "aqi": rng.randint(15, 80),
+              "pollen": {"tree": rng.choice(levels), "grass": rng.choice(levels), "ragweed": rng.choice(levels)}}
+    if include_forecast:
+        result["forecast"] = [{"day": i + 1, "pollen_overall": rng.choice(levels)} for i in range(forecast_days)]
+    return result
+
+
+@registry.register(TRAVEL_ADVISORIES_TOOL, ttl=3600.0)
+def get_travel_advisories(city: str, country: str, advisory_types: Optional[List[str]] = None) -> dict:
+    advisories = {
+        "safety": "Exercise normal security precautions.",
+        "health": "No special health precautions beyond routine vaccinations.",
+        "entry_requirements": "Check visa or electronic travel authorization requirements before departure.",
+        "local_laws": "Smoking is prohibited in enclosed public places.",
+    }
+    selected = advisory_types or list(advisories)
+    return {"city": city, "country": country, "advisories": {kind: advisories[kind] for kind in selected}}
+
+
+@registry.register(LOCAL_EVENTS_TOOL, ttl=3600.0)
+def get_local_events(city: str, start_date: str, end_date: str, event_types: Optional[List[str]] = None,
+                     max_results: int = 5) -> dict:
+    rng = _rng(city, start_date, end_date)
+    kinds = event_types or ["business", "cultural", "networking", "entertainment"]
+    days = _dates(start_date, end_date)
+    events = [{"name": f"{city} {rng.choice(kinds).capitalize()} Meetup #{i + 1}",
+               "type": rng.choice(kinds), "date": rng.choice(days).isoformat()}
+              for i in range(max_results)]
+    return {"city": city, "events": sorted(events, key=lambda event: event["date"])}
+
+
+@registry.register(RESTAURANTS_TOOL, ttl=3600.0)
+def get_restaurant_recommendations(city: str, area: str, cuisine_types: Optional[List[str]] = None,
+                                   price_range: str = "$$$", suitable_for: Optional[List[str]] = None,
+                                   min_rating: float = 4.0, max_results: int = 5) -> dict:
+    rng = _rng(city, area)
+    cuisines = cuisine_types or ["Steakhouse", "Italian", "Japanese", "Canadian"]
+    restaurants = [{"name": f"{area} {rng.choice(cuisines)} House {i + 1}", "cuisine": rng.choice(cuisines),
+                    "price_range": price_range, "rating": round(rng.uniform(min_rating, 5.0), 1),
+                    "suitable_for": suitable_for or ["business_meetings"]}
+                   for i in range(max_results)]
+    return {"city": city, "area": area, "restaurants": restaurants}
+
+
+def offline_chat(model: str, messages: List[dict], tools: Optional[List[dict]] = None, **kwargs) -> dict:
+    """Stand-in for ``ollama.chat`` that calls every offered tool once, then summarises the results."""
+    if messages[-1]["role"] != "tool":
+        start = date.today() + timedelta(days=7)
+        end = start + timedelta(days=4)
+        example_arguments = {
+            "get_comprehensive_weather_info": {"city": "Toronto", "country": "Canada", "start_date": start.isoformat(),
+                                               "end_date": end.isoformat(), "units": "metric"},
+            "get_air_quality_and_pollen_info": {"city": "Toronto", "country": "Canada", "include_forecast": True},
+            "get_travel_advisories": {"city": "Toronto", "country": "Canada"},
+            "get_local_events": {"city": "Toronto", "start_date": start.isoformat(), "end_date": end.isoformat(),
+                                 "event_types": ["business", "networking", "cultural"]},
+            "get_restaurant_recommendations": {"city": "Toronto", "area": "Financial District",
+                                               "suitable_for": ["business_meetings"]},
+        }
+        tool_calls = [{"function": {"name": tool["function"]["name"],
+                                    "arguments": example_arguments[tool["function"]["name"]]}}
+                      for tool in tools or [] if tool["function"]["name"] in example_arguments]
+        return {"message": {"role": "assistant", "content": "", "tool_calls": tool_calls}}
+
+    tool_results = [json.loads(message["content"]) for message in messages if message["role"] == "tool"]
+    summary = "\n".join(f"- {json.dumps(result, ensure_ascii=False)[:160]}" for result in tool_results)
+    return {"message": {"role": "assistant", "content": f"(offline) Tool results:\n{summary}", "tool_calls": None}}
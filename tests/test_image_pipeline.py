@@ -0,0 +1,26 @@
+from PIL import Image
+
+from vision.image_pipeline import decode_image, fit_size, list_images, prepare_image, resize_image
+
+
+def test_fit_size_keeps_aspect_ratio_and_never_upscales():
+    assert fit_size((4000, 3000), (800, 800)) == (800, 600)
+    assert fit_size((1000, 4000), (800, 800)) == (200, 800)
+    assert fit_size((640, 480), (800, 800)) == (640, 480)
+
+
+def test_draft_decode_stays_above_the_target(tmp_path):
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (4000, 3000), (120, 80, 40)).save(path)
+    decoded = decode_image(str(path), (800, 800))
+    assert 800 <= decoded.width < 4000 and 600 <= decoded.height < 3000
+    assert resize_image(str(path), (800, 800)).size == (800, 600)
+
+
+def test_converts_alpha_and_palette_images_for_jpeg(tmp_path):
+    Image.new("RGBA", (1200, 300), (0, 0, 255, 128)).save(tmp_path / "alpha.png")
+    Image.new("P", (100, 100)).save(tmp_path / "palette.gif")
+    (tmp_path / "notes.txt").write_text("skip me")
+    assert list_images(str(tmp_path)) == ["alpha.png", "palette.gif"]
+    assert resize_image(str(tmp_path / "alpha.png"), (800, 800)).mode == "RGB"
+    assert prepare_image(str(tmp_path / "palette.gif")).startswith("data:image/jpeg;base64,")
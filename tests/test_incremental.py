@@ -0,0 +1,70 @@
+import os
+
+from vision.incremental import MANIFEST_FILENAME, Manifest, run_incremental
+
+EXTENSIONS = {".png"}
+
+
+def write(path, content, mtime=None):
+    path.write_bytes(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def run(directory, fail=()):
+    seen = []
+
+    def process(files):
+        seen.extend(files)
+        return [file for file in files if file not in fail]
+
+    run_incremental(str(directory), EXTENSIONS, process)
+    return seen
+
+
+def test_only_new_or_changed_files_are_processed(tmp_path):
+    write(tmp_path / "a.png", b"a")
+    write(tmp_path / "b.png", b"b")
+    write(tmp_path / "notes.txt", b"ignored")
+    assert run(tmp_path) == ["a.png", "b.png"]
+    assert run(tmp_path) == []
+    write(tmp_path / "b.png", b"b2")
+    write(tmp_path / "c.png", b"c")
+    assert run(tmp_path) == ["b.png", "c.png"]
+
+
+def test_touched_file_with_same_content_is_not_reprocessed_or_rehashed(tmp_path, monkeypatch):
+    write(tmp_path / "a.png", b"a", mtime=1_000_000)
+    run(tmp_path)
+    write(tmp_path / "a.png", b"a", mtime=2_000_000)
+    assert run(tmp_path) == []
+    # The refreshed stat was saved, so the next run doesn't even read the file.
+    def no_reads(path):
+        raise AssertionError(f"{path} was hashed again")
+
+    monkeypatch.setattr("vision.incremental.file_digest", no_reads)
+    assert run(tmp_path) == []
+    manifest = Manifest(str(tmp_path / MANIFEST_FILENAME))
+    assert manifest.entries["a.png"]["mtime"] == 2_000_000 * 10 ** 9
+
+
+def test_failed_files_are_retried_on_the_next_run(tmp_path):
+    write(tmp_path / "a.png", b"a")
+    write(tmp_path / "bad.png", b"bad")
+    assert run(tmp_path, fail={"bad.png"}) == ["a.png", "bad.png"]
+    assert run(tmp_path) == ["bad.png"]
+
+
+def test_file_rewritten_during_processing_stays_changed(tmp_path):
+    write(tmp_path / "a.png", b"a", mtime=1_000_000)
+    manifest = Manifest(str(tmp_path / MANIFEST_FILENAME))
+    changed = manifest.changed_files(str(tmp_path), EXTENSIONS)
+    write(tmp_path / "a.png", b"a-rewritten", mtime=1_000_100)
+    manifest.mark(str(tmp_path), changed)
+    assert manifest.changed_files(str(tmp_path), EXTENSIONS) == ["a.png"]
+
+
+def test_settling_files_are_left_for_a_later_scan(tmp_path):
+    write(tmp_path / "a.png", b"a")
+    manifest = Manifest(str(tmp_path / MANIFEST_FILENAME))
+    assert manifest.changed_files(str(tmp_path), EXTENSIONS, settle_seconds=60) == []
@@ -0,0 +1,53 @@
+from common.llm_cache import LLMCache, cache_key
+
+
+def test_cache_key_ignores_dict_order_and_hashes_images():
+    image = "data:image/jpeg;base64," + "A" * 1000
+    a = cache_key("openai:gpt-4o", [{"role": "user", "content": image}], temperature=0, schema={"a": 1, "b": 2})
+    b = cache_key("openai:gpt-4o", [{"content": image, "role": "user"}], temperature=0, schema={"b": 2, "a": 1})
+    assert a == b
+    assert a != cache_key("openai:gpt-4o", [{"role": "user", "content": image}], temperature=0.5)
+
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("missing") is None
+    cache.put("key", "value")
+    assert cache.get("key") == "value"
+
+
+def test_total_is_tracked_across_replacements_and_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path)
+    cache.put("a", "x" * 10)
+    cache.put("a", "x" * 4)
+    cache.put("b", "y" * 6)
+    assert cache._total == 10
+    assert LLMCache(path)._total == 10
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    cache.put("old", "o" * 10)
+    cache.put("hit", "h" * 10)
+    cache.put("new", "n" * 10)
+    cache.get("old")  # a pending hit must still count when evicting
+    cache.put("newest", "z" * 10)
+    assert cache.get("hit") is None
+    assert [cache.get(key) is not None for key in ("old", "new", "newest")] == [True, True, True]
+    assert cache._total == 30
+
+
+def test_hits_are_written_back_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr("common.llm_cache.TOUCH_BATCH", 3)
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    for key in "abc":
+        cache.put(key, "value")
+    cache.get("a")
+    cache.get("b")
+    assert set(cache._touched) == {"a", "b"}
+    cache.get("c")
+    assert not cache._touched
+    cache.get("a")
+    cache.flush()
+    assert not cache._touched
@@ -0,0 +1,48 @@
+import asyncio
+import socket
+
+import pytest
+
+from ollama_local_models.ollama_runtime import OllamaRuntime
+from ollama_local_models.stub_ollama_server import start_stub_server
+
+pytest.importorskip("ollama")
+
+
+@pytest.fixture
+def stub_host():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = start_stub_server(port=port, load_seconds=0.2, parallel=2, time_scale=0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_preload_then_chat_many_runs_warm(stub_host):
+    async def run():
+        runtime = OllamaRuntime("llama3.1", host=stub_host, parallel=2)
+        load = await runtime.preload()
+        responses = await runtime.chat_many([[{"role": "user", "content": f"question {i}"}] for i in range(3)])
+        return runtime, load, responses
+
+    runtime, load, responses = asyncio.run(run())
+    assert load["load_ms"] > 0 and load["eval_tokens"] == 0
+    assert len(responses) == 3
+    assert all("(stub) llama3.1" in response["message"]["content"] for response in responses)
+    assert len(runtime.metrics) == 3
+    assert all(metrics["load_ms"] == 0 for metrics in runtime.metrics)
+    assert all(metrics["eval_tokens"] == 24 and metrics["eval_tokens_per_second"] > 0 for metrics in runtime.metrics)
+    runtime.report()
+
+
+def test_unload_makes_the_next_request_cold(stub_host):
+    async def run():
+        runtime = OllamaRuntime("llama3.1", host=stub_host)
+        await runtime.preload()
+        await runtime.unload()
+        await runtime.chat([{"role": "user", "content": "hello"}])
+        return runtime
+
+    assert asyncio.run(run()).metrics[0]["load_ms"] > 0
@@ -0,0 +1,53 @@
+from PIL import Image, ImageDraw
+
+from vision.image_pipeline import preprocess_directory
+from vision.reply_cache import ReplyCache, dhash, fingerprint, hamming_distance
+
+
+def make_chat(path, bubbles):
+    img = Image.new("RGB", (540, 1000), (236, 229, 221))
+    draw = ImageDraw.Draw(img)
+    y = 40
+    for width, height, right in bubbles:
+        x = 520 - width if right else 20
+        draw.rounded_rectangle((x, y, x + width, y + height), 12, fill=(220, 248, 198) if right else (255, 255, 255))
+        draw.rectangle((x + 12, y + 12, x + width - 24, y + 24), fill=(60, 60, 60))
+        y += height + 30
+    img.save(path, quality=90)
+    return img
+
+
+def test_near_duplicates_are_close_and_different_chats_are_not(tmp_path):
+    original = make_chat(tmp_path / "a.jpg", [(300, 80, False), (250, 120, True), (400, 60, False)])
+    original.resize((405, 750)).save(tmp_path / "a_small.jpg", quality=60)
+    make_chat(tmp_path / "b.jpg", [(200, 140, True), (420, 90, True), (150, 200, False)])
+    a, a_small, b = (dhash(str(tmp_path / name)) for name in ("a.jpg", "a_small.jpg", "b.jpg"))
+    assert hamming_distance(a, a_small) <= 20 < hamming_distance(a, b)
+
+
+def test_workers_hash_the_image_they_decode(tmp_path):
+    make_chat(tmp_path / "a.jpg", [(300, 80, False), (250, 120, True)])
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    results = {file: (data_url, error, key)
+               for file, data_url, error, key in preprocess_directory(str(tmp_path), workers=1,
+                                                                      fingerprint=fingerprint)}
+    data_url, error, (image_hash, digest) = results["a.jpg"]
+    assert data_url.startswith("data:image/jpeg;base64,") and error is None
+    assert hamming_distance(image_hash, dhash(str(tmp_path / "a.jpg"))) <= 20
+    assert results["broken.png"][0] is None and results["broken.png"][2] is None
+
+
+def test_lookup_counts_exact_near_and_misses_and_persists(tmp_path):
+    path = str(tmp_path / "replies.sqlite")
+    cache = ReplyCache(path, threshold=4)
+    cache.store(0b1111, '{"replies": []}', source="a.jpg", digest="abc")
+    assert cache.lookup(0, digest="abc") == '{"replies": []}'
+    assert cache.lookup(0b1111) is not None
+    assert cache.lookup(0b0111) is not None
+    assert cache.lookup(1 << 200) is None
+    assert (cache.exact_hits, cache.near_hits, cache.misses) == (2, 1, 1)
+    cache.close()
+
+    reopened = ReplyCache(path, threshold=4)
+    assert reopened.find(0b1110) == 0b1111
+    assert reopened.find(0, digest="abc") == 0b1111
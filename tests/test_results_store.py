@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from vision.results_store import ResultStore, SQLiteBackend, compact, open_backend, summarize
+
+
+def details(name, result, percentage, subjects):
+    return {"candidate_name": name, "division": "First" if percentage >= 60 else "Second", "result": result,
+            "percentage": percentage, "subjects": [{"name": subject, "marks": marks} for subject, marks in subjects]}
+
+
+def test_store_writes_batches_and_summarizes(tmp_path):
+    with ResultStore(str(tmp_path), backend="sqlite", batch_size=2) as store:
+        store.add("a.pdf", details("A", "PASS", 72.0, [("Maths", 80), ("Physics", 64)]), digest="a1")
+        store.add("b.pdf", details("B", "PASS", 55.0, [("Maths", 50)]), digest="b1")
+        store.add("c.pdf", details("C", "FAIL", 30.0, [("Maths", 20)]), digest="c1")
+        store.flush()
+        assert (store.written, store.batches) == (3, 2)
+
+    summary = summarize(str(tmp_path))
+    assert summary["backend"] == "sqlite" and summary["marksheets"] == 3
+    assert summary["by_result"][0] == {"group": "PASS", "candidates": 2, "mean": 63.5, "min": 55.0, "max": 72.0}
+    maths = next(row for row in summary["by_subject"] if row["group"] == "Maths")
+    assert (maths["candidates"], maths["min"], maths["max"]) == (3, 20, 80)
+
+
+def test_rerun_file_replaces_its_row_and_subjects(tmp_path):
+    with ResultStore(str(tmp_path), backend="sqlite") as store:
+        store.add("a.pdf", details("A", "FAIL", 30.0, [("Maths", 20), ("Physics", 40)]), digest="old")
+    with ResultStore(str(tmp_path), backend="sqlite") as store:
+        store.add("a.pdf", details("A", "PASS", 70.0, [("Maths", 70)]), digest="new")
+
+    backend = SQLiteBackend(str(tmp_path))
+    try:
+        assert backend.count() == 1
+        assert [row["group"] for row in backend.subject_stats()] == ["Maths"]
+        assert backend.group_stats("result")[0]["group"] == "PASS"
+        with pytest.raises(ValueError):
+            backend.group_stats("percentage; DROP TABLE marksheets")
+    finally:
+        backend.close()
+    assert compact(str(tmp_path))["marksheets"] == 1
+
+
+def test_partial_batch_is_written_after_flush_seconds(tmp_path):
+    store = ResultStore(str(tmp_path), backend="sqlite", batch_size=100, flush_seconds=0.05)
+    try:
+        store.add("a.pdf", details("A", "PASS", 70.0, []))
+        deadline = time.monotonic() + 5
+        while store.written == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.batches == 1
+    finally:
+        store.close()
+
+
+def test_write_errors_surface_on_the_next_call(tmp_path):
+    store = ResultStore(str(tmp_path), backend="sqlite")
+    store.add("a.pdf", {"subjects": [{"name": "Maths"}]})  # no marks: flatten() fails in the writer
+    with pytest.raises(RuntimeError, match="writer failed"):
+        store.flush()
+    with pytest.raises(RuntimeError):
+        store.close()
+
+
+def test_auto_backend_keeps_an_existing_sqlite_store(tmp_path):
+    SQLiteBackend(str(tmp_path)).close()
+    backend = open_backend(str(tmp_path))
+    assert backend.name == "sqlite"
+    backend.close()
@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+from ollama_local_models.tool_engine import (ToolError, ToolRegistry, normalize_arguments, run_tool_conversation,
+                                             validate_arguments)
+from ollama_local_models.travel_tools import AIR_QUALITY_TOOL, RESTAURANTS_TOOL, WEATHER_TOOL, offline_chat, registry
+
+WEATHER = WEATHER_TOOL["function"]["parameters"]
+AIR_QUALITY = AIR_QUALITY_TOOL["function"]["parameters"]
+RESTAURANTS = RESTAURANTS_TOOL["function"]["parameters"]
+
+
+def tool(name, **properties):
+    return {"type": "function", "function": {"name": name, "parameters": {"type": "object", "properties": properties}}}
+
+
+def call(name, **arguments):
+    return {"function": {"name": name, "arguments": arguments}}
+
+
+def test_validate_arguments_coerces_strings_and_drops_unknown_properties():
+    arguments = validate_arguments({"city": "Toronto", "country": "Canada", "include_forecast": "True",
+                                    "forecast_days": "3", "mood": "sunny"}, AIR_QUALITY)
+    assert arguments == {"city": "Toronto", "country": "Canada", "include_forecast": True, "forecast_days": 3}
+    assert validate_arguments({"city": "Toronto", "area": "Downtown", "min_rating": "4.5"},
+                              RESTAURANTS)["min_rating"] == 4.5
+
+
+@pytest.mark.parametrize("arguments, message", [
+    ({"city": "Toronto"}, "Missing required arguments: country"),
+    ({"city": "Toronto", "country": "Canada", "forecast_days": 9}, "'forecast_days' must be <= 7"),
+    ({"city": "Toronto", "country": "Canada", "forecast_days": True}, "'forecast_days' must be of type integer"),
+    ({"city": "Toronto", "country": "Canada", "include_forecast": "maybe"}, "must be of type boolean"),
+])
+def test_validate_arguments_rejects_invalid_calls(arguments, message):
+    with pytest.raises(ToolError, match=message):
+        validate_arguments(arguments, AIR_QUALITY)
+
+
+def test_validate_arguments_checks_dates_enums_and_array_items():
+    base = {"city": "Toronto", "country": "Canada", "start_date": "2024-05-01", "end_date": "2024-05-03"}
+    with pytest.raises(ToolError, match="YYYY-MM-DD"):
+        validate_arguments({**base, "end_date": "May 3rd"}, WEATHER)
+    with pytest.raises(ToolError, match="must be one of"):
+        validate_arguments({**base, "units": "kelvin"}, WEATHER)
+    with pytest.raises(ToolError, match=r"suitable_for\[1\]"):
+        validate_arguments({"city": "Toronto", "area": "Downtown", "suitable_for": ["groups", "dancing"]},
+                           RESTAURANTS)
+
+
+def test_cache_hits_on_normalized_arguments_until_the_ttl_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("ollama_local_models.tool_engine.time.monotonic", lambda: now[0])
+    tools = ToolRegistry()
+    calls = []
+
+    @tools.register(tool("lookup", city={"type": "string"}, tags={"type": "array", "items": {"type": "string"}}),
+                    ttl=60.0)
+    def lookup(city, tags=()):
+        calls.append(city)
+        return len(calls)
+
+    assert normalize_arguments({"city": " New  York", "tags": ["b", "a"]}) == \
+        normalize_arguments({"tags": ["A", "B"], "city": "new york"})
+    assert tools.call("lookup", {"city": "New York", "tags": ["a", "b"]}) == 1
+    assert tools.call("lookup", {"tags": ["B", "A"], "city": " new  york "}) == 1
+    assert (tools.cache_hits, tools.cache_misses) == (1, 1)
+    now[0] += 61
+    assert tools.call("lookup", {"city": "New York", "tags": ["a", "b"]}) == 2
+
+
+def test_execute_runs_calls_concurrently_and_reports_errors_in_order():
+    tools = ToolRegistry()
+    barrier = threading.Barrier(3, timeout=5)
+
+    @tools.register(tool("wait", n={"type": "integer"}))
+    def wait(n):
+        barrier.wait()  # only returns once all three calls are running at the same time
+        return n * 2
+
+    results = tools.execute([call("wait", n=1), call("missing"), call("wait", n="2"), call("wait", n=3)])
+    assert [result.get("result") for result in results] == [2, None, 4, 6]
+    assert results[1]["error"] == "Unknown tool: missing"
+
+
+def test_run_tool_conversation_with_offline_chat():
+    seen = []
+    offered = [WEATHER_TOOL, RESTAURANTS_TOOL]
+    response = run_tool_conversation(offline_chat, "llama3.1", [{"role": "user", "content": "Trip to Toronto"}],
+                                     registry, tools=offered, on_tool_results=seen.append)
+    assert [[result["name"] for result in results] for results in seen] == \
+        [["get_comprehensive_weather_info", "get_restaurant_recommendations"]]
+    assert all("result" in result for result in seen[0])
+    assert response["message"]["content"].startswith("(offline) Tool results:")
+
+
+def test_run_tool_conversation_stops_after_max_rounds():
+    tools = ToolRegistry()
+    tools.register(tool("ping"))(lambda: "pong")
+    requests = []
+
+    def always_calls_tools(model, messages, tools, **kwargs):
+        requests.append(len(messages))
+        return {"message": {"role": "assistant", "content": "", "tool_calls": [call("ping")]}}
+
+    response = run_tool_conversation(always_calls_tools, "llama3.1", [{"role": "user", "content": "hi"}], tools,
+                                     max_rounds=2)
+    assert requests == [1, 3, 5]
+    assert response["message"]["tool_calls"]
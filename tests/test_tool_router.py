@@ -0,0 +1,50 @@
+import pytest
+
+from ollama_local_models.benchmark_tool_routing import MIN_ROUTER_PRECISION, router_accuracy
+from ollama_local_models.tool_router import compact_tool, normalize_text, route_tools, score_tools
+from ollama_local_models.travel_tools import WEATHER_TOOL, registry
+
+ALL_TOOLS = [tool["function"]["name"] for tool in registry.schemas]
+
+
+def selected(message):
+    return {tool["function"]["name"] for tool in route_tools(message, registry.schemas)[0]}
+
+
+def test_normalize_text_folds_umlauts_and_accents():
+    assert normalize_text("Nächste Woche: Straße, événement, contaminación") == \
+        ["naechste", "woche", "strasse", "evenement", "contaminacion"]
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Do I need a visa for Buenos Aires?", {"get_travel_advisories"}),
+    ("Any restaurants with a lawn for lunch?", {"get_restaurant_recommendations"}),
+    ("Is there a show tonight, or just rain showers?", {"get_local_events", "get_comprehensive_weather_info"}),
+    ("Which essential documents and visa do I need?", {"get_travel_advisories"}),
+])
+def test_short_keywords_only_match_whole_words(message, expected):
+    assert selected(message) == expected
+
+
+def test_inflections_and_stems_still_match():
+    scores = score_tools("Dresses for the Wetterbericht, and which conferences?", ALL_TOOLS)
+    assert scores["get_comprehensive_weather_info"] == 2
+    assert scores["get_local_events"] == 1
+
+
+def test_falls_back_to_every_tool_when_nothing_matches():
+    assert selected("Tell me something about Toronto.") == set(ALL_TOOLS)
+
+
+def test_compact_tool_keeps_what_the_model_needs_for_valid_arguments():
+    compact = compact_tool(WEATHER_TOOL)["function"]
+    assert compact["description"] == "Get detailed weather information including current conditions"
+    assert compact["parameters"]["required"] == WEATHER_TOOL["function"]["parameters"]["required"]
+    assert compact["parameters"]["properties"]["units"] == {"type": "string", "enum": ["metric", "imperial"]}
+    assert "description" in WEATHER_TOOL["function"]["parameters"]["properties"]["units"]
+
+
+def test_router_precision_and_recall_on_the_labelled_prompts():
+    accuracy = router_accuracy()
+    assert accuracy["precision"] >= MIN_ROUTER_PRECISION
+    assert accuracy["recall"] == 1.0
@@ -1,15 +1,20 @@
 import os
 import base64
-import instructor
-from openai import OpenAI
-from pypdf import PdfReader
-from pdf2image import convert_from_path
+import argparse
+from functools import lru_cache
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from rich.console import Console
 from rich.panel import Panel
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeRemainingColumn
 from rich.table import Table
+from vision.incremental import MANIFEST_FILENAME, Manifest, file_digest, run_incremental, watch_directory
+from vision.results_store import ResultStore, compact, summarize
+
+from common.llm_cache import cache_report
+from common.llm_gateway import gateway_report
+from common.providers import get_instructor_client
 
 # Initialize Rich console
 console = Console()
@@ -18,13 +23,18 @@ console = Console()
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-openai_client = OpenAI()
-client = instructor.from_openai(openai_client)
 
+@lru_cache(maxsize=None)
+def client():
+    return get_instructor_client("marksheet")
+
+
+def convert_pdf_to_images(pdf_path: str, image_root: str = "marksheet_docs_image", out: Console = console) -> List[str]:
+    from pypdf import PdfReader
+    from pdf2image import convert_from_path
 
-def convert_pdf_to_images(pdf_path: str) -> List[str]:
     if not os.path.exists(pdf_path):
-        console.print(Panel(f"[bold red]PDF file not found:[/bold red] {pdf_path}", title="Error"))
+        out.print(Panel(f"[bold red]PDF file not found:[/bold red] {pdf_path}", title="Error"))
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
     try:
         pdf_reader = PdfReader(pdf_path)
@@ -32,18 +42,18 @@ def convert_pdf_to_images(pdf_path: str) -> List[str]:
         total_pages = len(pdf_reader.pages)
         pdf_filename = os.path.splitext(os.path.basename(pdf_path))[0]
 
-        console.print(Panel(f"[bold blue]Converting PDF[/bold blue] '{pdf_path}' to images. Total pages: {total_pages}",
+        out.print(Panel(f"[bold blue]Converting PDF[/bold blue] '{pdf_path}' to images. Total pages: {total_pages}",
                             title="PDF Conversion"))
 
-        image_dir = f"marksheet_docs_image/{pdf_filename}"
+        image_dir = os.path.join(image_root, pdf_filename)
         os.makedirs(image_dir, exist_ok=True)
 
-        with console.status("[bold green]Converting PDF pages...") as status:
+        with out.status("[bold green]Converting PDF pages...") as status:
             for page_number in range(total_pages):
                 status.update(f"Processing page {page_number + 1}/{total_pages}")
                 page_image = \
                     convert_from_path(pdf_path, dpi=100, first_page=page_number + 1, last_page=page_number + 1)[0]
-                image_filename = f"{image_dir}/{pdf_filename}_page_{page_number + 1}.jpg"
+                image_filename = os.path.join(image_dir, f"{pdf_filename}_page_{page_number + 1}.jpg")
 
                 page_image = page_image.convert("RGB")
                 page_image.save(image_filename, format="JPEG", quality=85)
@@ -52,11 +62,11 @@ def convert_pdf_to_images(pdf_path: str) -> List[str]:
                     image_base64 = base64.b64encode(image_file.read()).decode('utf-8')
                     base64_images.append(f"data:image/jpeg;base64,{image_base64}")
 
-        console.print(Panel(f"[bold green]Successfully converted[/bold green] {total_pages} pages to images",
+        out.print(Panel(f"[bold green]Successfully converted[/bold green] {total_pages} pages to images",
                             title="Conversion Complete"))
         return base64_images
     except Exception as e:
-        console.print(Panel(f"[bold red]Error converting PDF[/bold red] '{pdf_path}' to images: {str(e)}",
+        out.print(Panel(f"[bold red]Error converting PDF[/bold red] '{pdf_path}' to images: {str(e)}",
                             title="Conversion Error"))
         raise
 
@@ -86,7 +96,7 @@ class MarksheetDetails(BaseModel):
 
 # ... (keep the convert_pdf_to_images function as is) ...
 
-def extract_marksheet_details(encoded_images: List[str]) -> MarksheetDetails:
+def extract_marksheet_details(encoded_images: List[str], out: Console = console) -> MarksheetDetails:
     detailed_prompt = """
         Analyze the 12th marksheet_docs PDF and extract the following information:
         1. Candidate's full name
@@ -120,24 +130,23 @@ def extract_marksheet_details(encoded_images: List[str]) -> MarksheetDetails:
     ]
 
     try:
-        console.print(
+        out.print(
             Panel("[bold blue]Sending request to OpenAI API for marksheet_docs extraction.[/bold blue]",
                   title="API Request"))
-        with console.status("[bold yellow]Extracting marksheet_docs details...") as status:
-            response = client.chat.completions.create(
-                model="gpt-4o",
+        with out.status("[bold yellow]Extracting marksheet_docs details...") as status:
+            response = client().create(
                 seed=946,
                 tool_choice="auto",
                 response_model=MarksheetDetails,
                 messages=messages,
                 temperature=0.0,
             )
-        console.print(
+        out.print(
             Panel("[bold green]Successfully extracted marksheet_docs details.[/bold green]", title="Extraction Complete"))
 
         return response
     except Exception as e:
-        console.print(
+        out.print(
             Panel(f"[bold red]Error extracting marksheet_docs details:[/bold red] {str(e)}", title="Extraction Error"))
         raise
 
@@ -165,42 +174,132 @@ def display_result(file: str, result: MarksheetDetails):
                         subtitle="12th Marksheet"))
 
 
-def process_files(directory: str):
-    results = []
-    try:
-        files = os.listdir(directory)
-    except Exception as e:
-        console.print(
-            Panel(f"[bold red]Error reading directory[/bold red] '{directory}': {str(e)}", title="Directory Error"))
-        raise
+def process_files(directory: str, files: Optional[List[str]] = None, store: Optional[ResultStore] = None,
+                  quiet: bool = False, image_root: str = "marksheet_docs_image",
+                  digests: Optional[Dict[str, str]] = None):
+    """Extract every PDF in ``directory``; results also go to ``store`` if given.
 
-    for file in files:
-        file_path = os.path.join(directory, file)
-        file_extension = os.path.splitext(file)[1].lower()
-
-        if file_extension == ".pdf":
+    With ``quiet``, per-file panels and result tables are replaced by a single progress bar.
+    Page images are written under ``image_root``. ``digests`` are content hashes already
+    computed for ``files`` (by the manifest), so the store doesn't hash them again.
+    """
+    results = []
+    if files is None:
+        try:
+            files = os.listdir(directory)
+        except Exception as e:
+            console.print(
+                Panel(f"[bold red]Error reading directory[/bold red] '{directory}': {str(e)}", title="Directory Error"))
+            raise
+    pdf_files = [file for file in files if os.path.splitext(file)[1].lower() == ".pdf"]
+
+    # Per-call consoles instead of toggling the shared one, so concurrent calls (the pipeline
+    # worker runs jobs on several threads) don't silence each other.
+    out = Console(quiet=True) if quiet else console
+    progress = Progress(TextColumn("[bold blue]Extracting marksheets"), BarColumn(), MofNCompleteColumn(),
+                        TimeRemainingColumn(), console=Console(), disable=not quiet)
+    task = progress.add_task("extract", total=len(pdf_files))
+    with progress:
+        for file in pdf_files:
+            file_path = os.path.join(directory, file)
             try:
-                console.print(Panel(f"[bold blue]Processing file:[/bold blue] {file}", title="File Processing"))
-                encoded_images = convert_pdf_to_images(file_path)
-                result = extract_marksheet_details(encoded_images)
-                display_result(file, result)
+                out.print(Panel(f"[bold blue]Processing file:[/bold blue] {file}", title="File Processing"))
+                encoded_images = convert_pdf_to_images(file_path, image_root, out)
+                result = extract_marksheet_details(encoded_images, out)
+                if not quiet:
+                    display_result(file, result)
+                if store is not None:
+                    digest = (digests or {}).get(file) or file_digest(file_path)
+                    store.add(os.path.abspath(file_path), result.model_dump(), digest)
                 results.append({"file": file, "result": result})
             except Exception as e:
-                console.print(
-                    Panel(f"[bold red]Failed to process file[/bold red] '{file}': {str(e)}", title="Processing Error"))
-                continue
+                (progress.console if quiet else console).print(
+                    Panel(f"[bold red]Failed to process file[/bold red] '{file}': {str(e)}",
+                          title="Processing Error"))
+            progress.advance(task)
     return results
 
 
+def display_summary(summary: dict):
+    console.print(Panel(f"[bold green]{summary['marksheets']}[/bold green] marksheets stored ({summary['backend']})",
+                        title="Results Store"))
+    for title, key, label in (("By Result", "by_result", "Result"), ("By Division", "by_division", "Division"),
+                              ("By Subject (marks)", "by_subject", "Subject")):
+        table = Table(title=title, show_header=True, header_style="bold magenta")
+        table.add_column(label, style="cyan")
+        for column in ("Candidates", "Mean", "Min", "Max"):
+            table.add_column(column, justify="right", style="green")
+        for row in summary[key]:
+            table.add_row(str(row["group"]), str(row["candidates"]), f"{row['mean']:.2f}",
+                          f"{row['min']:g}", f"{row['max']:g}")
+        console.print(table)
+
+
 def main():
-    pdf_directory = "./marksheet_docs"
+    parser = argparse.ArgumentParser(description="Extract details from 12th marksheet PDFs")
+    parser.add_argument("directory", nargs="?",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "marksheet_docs"))
+    parser.add_argument("--incremental", action="store_true", help="Only process new or changed PDFs")
+    parser.add_argument("--watch", action="store_true", help="Keep running and process PDFs as they arrive")
+    parser.add_argument("--interval", type=float, default=5.0, help="Polling interval for --watch in seconds")
+    parser.add_argument("--store", default="marksheet_results", help="Directory of the columnar results store")
+    parser.add_argument("--no-store", action="store_true", help="Don't keep the extracted results")
+    parser.add_argument("--backend", choices=("auto", "parquet", "sqlite"), default="auto",
+                        help="Results store format (auto: Parquet if pyarrow is installed, else SQLite)")
+    parser.add_argument("--quiet", action="store_true", help="Show a progress bar instead of a table per file")
+    parser.add_argument("--summary", action="store_true", help="Only print aggregates over the results store")
+    parser.add_argument("--compact", action="store_true", help="Only merge the results store's part files")
+    args = parser.parse_args()
+
+    if args.summary or args.compact:
+        if not os.path.isdir(args.store):
+            console.print(Panel(f"[bold red]No results store at[/bold red] '{args.store}'", title="Results Store"))
+            return
+        if args.compact:
+            with console.status("[bold green]Compacting results store..."):
+                stats = compact(args.store, args.backend)
+            console.print(Panel(f"[bold green]{stats['marksheets']}[/bold green] marksheets in "
+                                f"{stats['parts_after']} part(s), was {stats['parts_before']} ({stats['backend']})",
+                                title="Results Store"))
+        if args.summary:
+            display_summary(summarize(args.store, args.backend))
+        return
+
+    pdf_directory = args.directory
+    store = None if args.no_store else ResultStore(args.store, args.backend)
+
+    manifest = Manifest(os.path.join(pdf_directory, MANIFEST_FILENAME)) if args.watch or args.incremental else None
+
+    def process(files: List[str]) -> List[str]:
+        digests = {file: manifest.pending[file]["sha256"] for file in files if file in manifest.pending}
+        processed = [entry["file"] for entry in process_files(pdf_directory, files, store, args.quiet,
+                                                              digests=digests)]
+        if store is not None:
+            # The manifest marks these as done once this returns, so their rows must be on disk first.
+            store.flush()
+        return processed
+
     try:
-        results = process_files(pdf_directory)
+        if args.watch:
+            watch_directory(pdf_directory, {".pdf"}, process, interval=args.interval, manifest=manifest)
+        elif args.incremental:
+            run_incremental(pdf_directory, {".pdf"}, process, manifest)
+        else:
+            results = process_files(pdf_directory, store=store, quiet=args.quiet)
+        if store is not None:
+            store.close()
+            console.print(Panel(f"[bold green]Stored[/bold green] {store.written} marksheets in '{args.store}' "
+                                f"({store.backend.name}, {store.batches} batches)", title="Results Store"))
         console.print(Panel("[bold green]Processing completed successfully.[/bold green]", title="Process Complete"))
+        cache_report()
+        gateway_report()
 
     except Exception as e:
         console.print(
             Panel(f"[bold red]An error occurred during processing:[/bold red] {str(e)}", title="Processing Error"))
+    finally:
+        if store is not None and store.thread.is_alive():
+            store.close()  # still flush what was extracted before the error
 
 
 if __name__ == "__main__":
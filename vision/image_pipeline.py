@@ -0,0 +1,193 @@
+import os
+import io
+import time
+import base64
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+from rich.console import Console
+from rich.table import Table
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+console = Console()
+
+SUPPORTED_IMAGE_FORMATS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp"}
+
+# Decode at roughly twice the target size, then let a real filter do the last step.
+# This is the same trade-off Pillow's own thumbnail() makes with reducing_gap=2.0.
+REDUCING_GAP = 2.0
+
+
+def list_images(directory: str) -> List[str]:
+    """Return the supported image files in a directory, sorted by name."""
+    return sorted(
+        file for file in os.listdir(directory)
+        if os.path.splitext(file)[1].lower() in SUPPORTED_IMAGE_FORMATS
+    )
+
+
+def pick_resample_filter(scale: float) -> "Image.Resampling":
+    """Pick a resampling filter for the remaining downscale factor.
+
+    Large reductions are dominated by filter support size, so a cheap filter is
+    used there; LANCZOS is only worth its cost for the final small reduction.
+    """
+    from PIL import Image
+    if scale >= 3.0:
+        return Image.Resampling.BOX
+    if scale >= 1.5:
+        return Image.Resampling.BILINEAR
+    return Image.Resampling.LANCZOS
+
+
+def fit_size(size: tuple[int, int], max_size: tuple[int, int]) -> tuple[int, int]:
+    """The largest size with the same aspect ratio as ``size`` that fits in ``max_size``."""
+    scale = min(max_size[0] / size[0], max_size[1] / size[1])
+    if scale >= 1.0:
+        return size
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def decode_image(image_path: str, max_size: tuple[int, int]) -> "Image.Image":
+    """Open and decode an image, letting JPEG decode directly at a reduced scale.
+
+    For JPEG files ``draft`` makes libjpeg downscale in the DCT domain (1/2, 1/4 or 1/8),
+    so a 12 MP photo never gets fully decoded. Other formats use integer ``reduce``.
+    """
+    # Pillow is imported on first use (in each pool process), not when the module loads.
+    from PIL import Image, UnidentifiedImageError
+    try:
+        # Closed on return: derived images own their pixels, and ``copy()`` covers the case with none.
+        with Image.open(image_path) as src:
+            # Draft and reduce toward the aspect-fit target, as thumbnail() does; the bounding
+            # box alone would keep a 4:3 photo from reducing at all.
+            target = fit_size(src.size, max_size)
+            if target != src.size:
+                src.draft(None, (int(target[0] * REDUCING_GAP), int(target[1] * REDUCING_GAP)))
+            src.load()
+            img = src
+            factor = int(min(img.width / target[0], img.height / target[1]) / REDUCING_GAP)
+            if factor >= 2:
+                img = img.reduce(factor)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            return img.copy() if img is src else img
+    except UnidentifiedImageError:
+        raise ValueError(f"Unrecognized image format or corrupted image file: {image_path}")
+    except FileNotFoundError:
+        raise ValueError(f"Image file not found: {image_path}")
+    except Exception as e:
+        raise ValueError(f"An unexpected error occurred while processing the image: {e}")
+
+
+def fit_image(img: "Image.Image", max_size: tuple[int, int]) -> "Image.Image":
+    """Resize a decoded image to fit ``max_size`` while maintaining aspect ratio."""
+    new_size = fit_size(img.size, max_size)
+    if new_size == img.size:
+        return img
+    return img.resize(new_size, pick_resample_filter(img.width / new_size[0]))
+
+
+def resize_image(image_path: str, max_size: tuple[int, int]) -> "Image.Image":
+    """Decode and resize the image to the given maximum size while maintaining aspect ratio."""
+    return fit_image(decode_image(image_path, max_size), max_size)
+
+
+def encode_image(img: "Image.Image", quality: int = 75) -> str:
+    """Encode an image as a JPEG data URL, base64-encoding straight from the buffer."""
+    with io.BytesIO() as img_buffer:
+        img.save(img_buffer, format="JPEG", quality=quality)
+        base64_img = base64.b64encode(img_buffer.getbuffer()).decode("ascii")
+    return f"data:image/jpeg;base64,{base64_img}"
+
+
+def prepare_image(image_path: str, max_size: tuple[int, int] = (800, 800)) -> str:
+    """Full preprocessing for one image: decode, resize and encode as a data URL."""
+    return encode_image(resize_image(image_path, max_size))
+
+
+def _prepare_image_safe(args: tuple[str, tuple[int, int], Optional[Callable]]) -> tuple[Optional[str], Optional[str], Any]:
+    image_path, max_size, fingerprint = args
+    try:
+        img = resize_image(image_path, max_size)
+        key = fingerprint(image_path, img) if fingerprint is not None else None
+        return encode_image(img), None, key
+    except ValueError as e:
+        return None, str(e), None
+
+
+def preprocess_directory(directory: str, max_size: tuple[int, int] = (800, 800),
+                         workers: Optional[int] = None,
+                         files: Optional[List[str]] = None,
+                         mp_context=None,
+                         fingerprint: Optional[Callable[[str, "Image.Image"], Any]] = None
+                         ) -> List[tuple[str, Optional[str], Optional[str], Any]]:
+    """Preprocess every image in a directory (or only ``files``) in a process pool.
+
+    ``fingerprint(path, img)``, a module-level function so it can be pickled, runs in the
+    workers on the already decoded image. Multithreaded callers should pass a ``spawn``
+    ``mp_context``; the default fork start method on Linux can deadlock there.
+    Returns ``(file, data_url, error, fingerprint)`` tuples in directory order; exactly one of
+    ``data_url`` and ``error`` is set, and the fingerprint is ``None`` unless one was requested.
+    """
+    if files is None:
+        files = list_images(directory)
+    if not files:
+        return []
+    jobs = [(os.path.join(directory, file), max_size, fingerprint) for file in files]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        results = list(executor.map(_prepare_image_safe, jobs, chunksize=max(1, len(jobs) // 32)))
+    return [(file, *result) for file, result in zip(files, results)]
+
+
+def _legacy_prepare_image(image_path: str, max_size: tuple[int, int]) -> str:
+    """The original full-decode + LANCZOS thumbnail + copy path, kept for benchmarking."""
+    from PIL import Image
+    with Image.open(image_path) as img:
+        if img.mode == 'RGBA':
+            img = img.convert('RGB')
+        img.thumbnail(max_size, Image.LANCZOS)
+        resized = img.copy()
+    with io.BytesIO() as img_buffer:
+        resized.save(img_buffer, format='JPEG')
+        img_buffer.seek(0)
+        return base64.b64encode(img_buffer.read()).decode('utf-8')
+
+
+def benchmark_pipeline(directory: str, max_size: tuple[int, int] = (800, 800), repeat: int = 3) -> dict:
+    """Measure ms per image for each preprocessing stage and print a summary table."""
+    files = [os.path.join(directory, file) for file in list_images(directory)]
+    if not files:
+        console.print(f"[yellow]⚠️ No images found in {directory}.[/yellow]")
+        return {}
+
+    totals = {"decode": 0.0, "resize": 0.0, "encode": 0.0, "legacy": 0.0}
+    for _ in range(repeat):
+        for path in files:
+            start = time.perf_counter()
+            img = decode_image(path, max_size)
+            decoded = time.perf_counter()
+            img = fit_image(img, max_size)
+            resized = time.perf_counter()
+            encode_image(img)
+            encoded = time.perf_counter()
+            _legacy_prepare_image(path, max_size)
+            legacy = time.perf_counter()
+
+            totals["decode"] += decoded - start
+            totals["resize"] += resized - decoded
+            totals["encode"] += encoded - resized
+            totals["legacy"] += legacy - encoded
+
+    runs = repeat * len(files)
+    ms_per_image = {stage: total * 1000 / runs for stage, total in totals.items()}
+    ms_per_image["total"] = ms_per_image["decode"] + ms_per_image["resize"] + ms_per_image["encode"]
+
+    table = Table(title=f"⏱️ Preprocessing benchmark ({len(files)} images x {repeat})", border_style="cyan")
+    table.add_column("Stage", style="cyan")
+    table.add_column("ms / image", justify="right", style="green")
+    for stage in ("decode", "resize", "encode", "total", "legacy"):
+        table.add_row(stage, f"{ms_per_image[stage]:.2f}")
+    console.print(table)
+    return ms_per_image
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from rich.console import Console
+
+console = Console()
+
+MANIFEST_FILENAME = ".manifest.json"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Index of already processed files keyed by file name: (size, mtime, content hash).
+
+    Size and mtime are checked first so unchanged files are never re-read; the
+    content hash only decides for files whose stat changed (e.g. a re-copied file).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        # Size, mtime and hash of each changed file as scanned, recorded by mark() once it is processed.
+        self.pending: Dict[str, dict] = {}
+        # Files that failed in this session, by mtime, so watch mode doesn't retry them in a loop.
+        self.failed: Dict[str, int] = {}
+        # Entries whose stat was refreshed in memory and not saved yet.
+        self.dirty = False
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def changed_files(self, directory: str, extensions: Iterable[str], settle_seconds: float = 0.0) -> List[str]:
+        """Return new or modified files in ``directory``, sorted by name.
+
+        Files modified less than ``settle_seconds`` ago are left for a later scan,
+        so files that are still being copied in are not picked up half-written.
+        """
+        extensions = {extension.lower() for extension in extensions}
+        now = time.time()
+        changed = []
+        for file in sorted(os.listdir(directory)):
+            if os.path.splitext(file)[1].lower() not in extensions:
+                continue
+            path = os.path.join(directory, file)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime < settle_seconds or self.failed.get(file) == stat.st_mtime_ns:
+                continue
+            entry = self.entries.get(file)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+                continue
+            try:
+                digest = file_digest(path)
+            except FileNotFoundError:
+                continue
+            if entry and entry["sha256"] == digest:
+                # Touched or re-copied without changing content: just refresh the stat.
+                entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+                self.dirty = True
+                continue
+            self.pending[file] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest}
+            changed.append(file)
+        return changed
+
+    def mark(self, directory: str, files: Iterable[str]) -> None:
+        """Record ``files`` as processed at the size, mtime and hash ``changed_files()`` saw.
+
+        Not the current ones: a file rewritten while it was being processed must still
+        look changed on the next scan.
+        """
+        for file in files:
+            scanned = self.pending.pop(file, None)
+            if scanned is not None and os.path.exists(os.path.join(directory, file)):
+                self.entries[file] = scanned
+            else:
+                # Deleted or renamed since it was processed (common under --watch); a renamed
+                # file shows up again under its new name.
+                self.entries.pop(file, None)
+        self.save()
+
+    def mark_failed(self, directory: str, files: Iterable[str]) -> None:
+        for file in files:
+            scanned = self.pending.pop(file, None)
+            if scanned is not None and os.path.exists(os.path.join(directory, file)):
+                self.failed[file] = scanned["mtime"]
+            else:
+                self.failed.pop(file, None)
+                self.entries.pop(file, None)
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def run_incremental(directory: str, extensions: Iterable[str], process: Callable[[List[str]], List[str]],
+                    manifest: Optional[Manifest] = None, settle_seconds: float = 0.0) -> List[str]:
+    """Process only new or changed files once; ``process`` returns the files that succeeded."""
+    if manifest is None:
+        manifest = Manifest(os.path.join(directory, MANIFEST_FILENAME))
+    changed = manifest.changed_files(directory, extensions, settle_seconds)
+    if not changed:
+        # Save refreshed stats even so, or later runs would hash the touched files again.
+        if manifest.dirty:
+            manifest.save()
+        return []
+    console.print(f"[bold blue]{len(changed)} new or changed file(s) to process.[/bold blue]")
+    processed = process(changed)
+    manifest.mark(directory, processed)
+    manifest.mark_failed(directory, set(changed) - set(processed))
+    return processed
+
+
+def _start_inotify_wakeups(directory: str, wakeup: threading.Event):
+    """Wake the watch loop on filesystem events via watchdog (inotify on Linux), if installed."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class WakeupHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if not event.src_path.endswith((MANIFEST_FILENAME, f"{MANIFEST_FILENAME}.tmp")):
+                wakeup.set()
+
+    observer = Observer()
+    observer.schedule(WakeupHandler(), directory, recursive=False)
+    observer.start()
+    return observer
+
+
+def watch_directory(directory: str, extensions: Iterable[str], process: Callable[[List[str]], List[str]],
+                    interval: float = 5.0, settle_seconds: float = 2.0, manifest: Optional[Manifest] = None) -> None:
+    """Keep processing files as they arrive until interrupted with Ctrl+C.
+
+    Uses filesystem notifications when watchdog is available and falls back to
+    polling every ``interval`` seconds otherwise. Either way the manifest scan
+    decides what to process, so events only serve as a wake-up.
+    """
+    if manifest is None:
+        manifest = Manifest(os.path.join(directory, MANIFEST_FILENAME))
+    wakeup = threading.Event()
+    observer = _start_inotify_wakeups(directory, wakeup)
+    mode = "filesystem events" if observer else f"polling every {interval:g}s"
+    console.print(f"[bold green]👀 Watching[/bold green] '{directory}' ({mode}). Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            run_incremental(directory, extensions, process, manifest, settle_seconds)
+            wakeup.wait(timeout=interval)
+            if wakeup.is_set():
+                wakeup.clear()
+                # Let a burst of events (a multi-file copy) land before rescanning.
+                time.sleep(settle_seconds)
+    except KeyboardInterrupt:
+        console.print("[bold yellow]Stopped watching.[/bold yellow]")
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
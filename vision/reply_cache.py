@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import tempfile
+from typing import TYPE_CHECKING, Dict, List, Optional
+from vision.image_pipeline import decode_image, fit_image
+from vision.incremental import file_digest
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Hash images from a small draft decode; a 16x16 dHash looks at a 17x16 grid.
+HASH_SIZE = 16
+HASH_DECODE_SIZE = (64, 64)
+
+# Max differing bits (out of 256) for two screenshots to count as the same image.
+# On a sample of 40 synthetic chats from one app layout, re-saves, recompression, 3/4 downscales
+# and 4 px crops stayed within 13 bits, while different chats were never closer than 35.
+# A 64-bit hash could not separate the two (re-saves up to 7 bits, different chats down to 4).
+DEFAULT_HAMMING_THRESHOLD = 20
+
+
+def image_dhash(img: "Image.Image", hash_size: int = HASH_SIZE) -> int:
+    """Compute a ``hash_size``² bit difference hash (dHash) of a decoded image.
+
+    Each bit says whether a pixel is brighter than its right-hand neighbour on a
+    small grayscale thumbnail, so re-saves, recompression and slight crops keep
+    most bits intact. The image is brought down to ``HASH_DECODE_SIZE`` first, so a
+    draft decode and a full-size one hash the same.
+    """
+    from PIL import Image
+
+    img = fit_image(img, HASH_DECODE_SIZE)
+    img = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = img.tobytes()
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def dhash(image_path: str, hash_size: int = HASH_SIZE) -> int:
+    """dHash of an image file, from a small draft decode."""
+    return image_dhash(decode_image(image_path, HASH_DECODE_SIZE), hash_size)
+
+
+def fingerprint(image_path: str, img: "Image.Image") -> tuple[int, str]:
+    """Cache key parts for an image the preprocessing workers already decoded: (dHash, content digest)."""
+    return image_dhash(img), file_digest(image_path)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def calibrate(image_paths: List[str], threshold: int = DEFAULT_HAMMING_THRESHOLD) -> dict:
+    """Hamming distances for near-duplicates of each image vs. between different images.
+
+    Near-duplicates are made the way screenshots get re-shared: recompressed, downscaled to 3/4
+    and cropped by a few pixels. A good threshold sits between the two ranges; the counts say
+    how many pairs ``threshold`` gets wrong either way.
+    """
+    from PIL import Image
+
+    originals, near = [], []
+    with tempfile.TemporaryDirectory() as scratch:
+        for index, path in enumerate(image_paths):
+            image_hash = dhash(path)
+            originals.append(image_hash)
+            with Image.open(path) as src:
+                img = src.convert("RGB")
+            variants = [
+                lambda target: img.save(target, quality=60),
+                lambda target: img.resize((img.width * 3 // 4, img.height * 3 // 4)).save(target),
+                lambda target: img.crop((0, 4, img.width, img.height - 4)).save(target),
+            ]
+            for number, make in enumerate(variants):
+                target = os.path.join(scratch, f"{index}_{number}.jpg")
+                make(target)
+                near.append(hamming_distance(image_hash, dhash(target)))
+    different = [hamming_distance(a, b) for i, a in enumerate(originals) for b in originals[i + 1:]]
+    return {"images": len(originals), "near_max": max(near, default=None),
+            "different_min": min(different, default=None), "threshold": threshold,
+            "near_missed": sum(distance > threshold for distance in near), "near_pairs": len(near),
+            "different_matched": sum(distance <= threshold for distance in different),
+            "different_pairs": len(different)}
+
+
+class ReplyCache:
+    """Persistent perceptual-hash index mapping screenshots to their generated replies.
+
+    Entries live in SQLite and are mirrored in memory for the Hamming-distance scan.
+    Byte-identical files match on their content digest before any hash comparison.
+    Cached values are the JSON of a ``GeneratedReplies`` model.
+    """
+
+    def __init__(self, path: str = ".reply_cache.sqlite", threshold: int = DEFAULT_HAMMING_THRESHOLD):
+        self.threshold = threshold
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS replies "
+            "(image_hash TEXT PRIMARY KEY, content_sha256 TEXT, source TEXT, replies TEXT NOT NULL)"
+        )
+        self.entries: Dict[int, str] = {}
+        self.digests: Dict[str, int] = {}
+        for image_hash, digest, replies in self.connection.execute(
+                "SELECT image_hash, content_sha256, replies FROM replies"):
+            self.entries[int(image_hash, 16)] = replies
+            if digest:
+                self.digests[digest] = int(image_hash, 16)
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def find(self, image_hash: int, digest: Optional[str] = None) -> Optional[int]:
+        """Return the closest stored hash within the threshold, without touching the stats."""
+        if digest is not None and digest in self.digests:
+            return self.digests[digest]
+        if image_hash in self.entries:
+            return image_hash
+        best_hash, best_distance = None, self.threshold + 1
+        for stored_hash in self.entries:
+            distance = hamming_distance(image_hash, stored_hash)
+            if distance < best_distance:
+                best_hash, best_distance = stored_hash, distance
+        return best_hash
+
+    def lookup(self, image_hash: int, digest: Optional[str] = None) -> Optional[str]:
+        """Return cached replies JSON for a near-duplicate image, recording a hit or miss."""
+        match = self.find(image_hash, digest)
+        if match is None:
+            self.misses += 1
+            return None
+        if match == image_hash or (digest is not None and self.digests.get(digest) == match):
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+        return self.entries[match]
+
+    def store(self, image_hash: int, replies_json: str, source: str = "", digest: Optional[str] = None) -> None:
+        self.entries[image_hash] = replies_json
+        if digest is not None:
+            self.digests[digest] = image_hash
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO replies (image_hash, content_sha256, source, replies) "
+                "VALUES (?, ?, ?, ?)",
+                (f"{image_hash:064x}", digest, source, replies_json),
+            )
+
+    @property
+    def lookups(self) -> int:
+        return self.exact_hits + self.near_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.near_hits) / self.lookups if self.lookups else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self.entries),
+        }
+
+    def close(self) -> None:
+        self.connection.close()
+
@@ -0,0 +1,380 @@
+import os
+import time
+import queue
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BATCH_SIZE = 500
+# A partial batch is written this long after its first marksheet, which bounds what a crash can
+# lose. Slow runs write small parts (each is a file); compact() merges them. --incremental and
+# --watch also flush after every scan.
+DEFAULT_FLUSH_SECONDS = 30.0
+
+SQLITE_FILENAME = "results.sqlite"
+
+# One row per marksheet; subjects are flattened into their own table, keyed by marksheet_id.
+# The id is derived from the file's path and content, so re-running a file replaces its row.
+MARKSHEET_COLUMNS = ("marksheet_id", "file", "processed_at", "candidate_name", "division", "result", "percentage",
+                     "subject_count", "total_marks")
+SUBJECT_COLUMNS = ("marksheet_id", "position", "subject", "marks")
+
+
+def _marksheet_id(file: str, digest: Optional[str]) -> str:
+    return hashlib.sha256(f"{file}\0{digest or ''}".encode("utf-8")).hexdigest()[:32]
+
+
+def flatten(file: str, details: dict, processed_at: float, digest: Optional[str] = None) -> Tuple[dict, List[dict]]:
+    """A ``MarksheetDetails.model_dump()`` as one marksheet row and its subject rows."""
+    marksheet_id = _marksheet_id(file, digest)
+    subjects = [{"marksheet_id": marksheet_id, "position": position, "subject": subject["name"],
+                 "marks": subject["marks"]}
+                for position, subject in enumerate(details.get("subjects") or [])]
+    marksheet = {
+        "marksheet_id": marksheet_id,
+        "file": file,
+        "processed_at": processed_at,
+        "candidate_name": details.get("candidate_name"),
+        "division": details.get("division"),
+        "result": details.get("result"),
+        "percentage": details.get("percentage"),
+        "subject_count": len(subjects),
+        "total_marks": sum(subject["marks"] for subject in subjects),
+    }
+    return marksheet, subjects
+
+
+class ParquetBackend:
+    """Append-only Parquet: every batch becomes a new part file under ``marksheets/`` and ``subjects/``.
+
+    A re-run file appends a second row, so reads keep only the latest ``processed_at`` per file.
+    """
+
+    name = "parquet"
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+
+        self.path = path
+        self.schemas = {
+            "marksheets": pa.schema([("marksheet_id", pa.string()), ("file", pa.string()),
+                                     ("processed_at", pa.float64()), ("candidate_name", pa.string()),
+                                     ("division", pa.string()), ("result", pa.string()),
+                                     ("percentage", pa.float64()), ("subject_count", pa.int32()),
+                                     ("total_marks", pa.int64())]),
+            "subjects": pa.schema([("marksheet_id", pa.string()), ("position", pa.int32()),
+                                   ("subject", pa.string()), ("marks", pa.int64())]),
+        }
+        for table in self.schemas:
+            os.makedirs(os.path.join(path, table), exist_ok=True)
+        self.sequence = 0
+
+    def write(self, marksheets: List[dict], subjects: List[dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.sequence += 1
+        part = f"part-{time.time_ns()}-{os.getpid()}-{self.sequence:05d}.parquet"
+        for table, rows in (("subjects", subjects), ("marksheets", marksheets)):
+            if not rows:
+                continue
+            # Written under a temporary name and renamed, so readers never see a half-written part.
+            target = os.path.join(self.path, table, part)
+            pq.write_table(pa.Table.from_pylist(rows, schema=self.schemas[table]), f"{target}.tmp",
+                           compression="zstd")
+            os.replace(f"{target}.tmp", target)
+
+    def parts(self, table: str = "marksheets") -> List[str]:
+        """Part file names of ``table`` in write order."""
+        return sorted(name for name in os.listdir(os.path.join(self.path, table)) if name.endswith(".parquet"))
+
+    def _read(self, table: str, columns: List[str], parts: Optional[List[str]] = None):
+        import pyarrow.dataset as ds
+
+        directory = os.path.join(self.path, table)
+        parts = self.parts(table) if parts is None else [name for name in parts
+                                                          if os.path.exists(os.path.join(directory, name))]
+        files = [os.path.join(directory, name) for name in parts]
+        return ds.dataset(files, schema=self.schemas[table], format="parquet").to_table(columns=columns)
+
+    def _latest(self, columns: List[str], parts: Optional[List[str]] = None):
+        """Marksheet rows from the most recent run of each file."""
+        import pyarrow as pa
+
+        table = self._read("marksheets", list(dict.fromkeys(["file", "processed_at", *columns])), parts)
+        latest = table.group_by("file").aggregate([("processed_at", "max")])
+        latest = pa.table({"file": latest["file"], "processed_at": latest["processed_at_max"]})
+        return table.join(latest, keys=["file", "processed_at"], join_type="inner").select(columns)
+
+    def _latest_subjects(self, columns: List[str], parts: Optional[List[str]] = None):
+        """Subject rows of the marksheets ``_latest`` keeps."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        table = self._read("subjects", list(dict.fromkeys(["marksheet_id", "position", *columns])), parts)
+        table = table.append_column("row", pa.array(range(table.num_rows), pa.int64()))
+        table = table.join(self._latest(["marksheet_id", "subject_count"], parts), keys="marksheet_id",
+                           join_type="inner").sort_by("row")  # joins don't keep the parts' write order
+        # An unchanged file that was re-run wrote its subjects again under the same id: the last part
+        # wins, and positions past the latest subject count are left over from an earlier run.
+        table = table.filter(pc.less(table["position"], table["subject_count"]))
+        others = [column for column in columns if column not in ("marksheet_id", "position")]
+        grouped = table.group_by(["marksheet_id", "position"], use_threads=False).aggregate(
+            [(column, "last") for column in others])
+        return grouped.rename_columns([name[:-len("_last")] if name.endswith("_last") else name
+                                       for name in grouped.column_names]).select(columns)
+
+    def count(self) -> int:
+        return self._latest(["marksheet_id"]).num_rows
+
+    def group_stats(self, column: str) -> List[dict]:
+        grouped = self._latest([column, "percentage"]).group_by(column).aggregate(
+            [("percentage", "count"), ("percentage", "mean"), ("percentage", "min"), ("percentage", "max")])
+        return sorted(({"group": row[column], "candidates": row["percentage_count"],
+                        "mean": row["percentage_mean"], "min": row["percentage_min"], "max": row["percentage_max"]}
+                       for row in grouped.to_pylist()), key=lambda row: -row["candidates"])
+
+    def subject_stats(self) -> List[dict]:
+        grouped = self._latest_subjects(["subject", "marks"]).group_by("subject").aggregate(
+            [("marks", "count"), ("marks", "mean"), ("marks", "min"), ("marks", "max")])
+        return sorted(({"group": row["subject"], "candidates": row["marks_count"], "mean": row["marks_mean"],
+                        "min": row["marks_min"], "max": row["marks_max"]}
+                       for row in grouped.to_pylist()), key=lambda row: -row["candidates"])
+
+    def compact(self) -> None:
+        """Merge the part files into one per table, keeping only the rows reads would use.
+
+        Safe while a writer is running: only parts listed at the start are replaced, and the
+        merged part sorts right after the newest of them, so later parts still win.
+        """
+        import pyarrow.parquet as pq
+
+        # A batch writes its subjects part before its marksheets part, so every part listed here
+        # is complete in both tables.
+        parts = self.parts("marksheets")
+        if len(parts) < 2:
+            return
+        merged = {"marksheets": self._latest(list(self.schemas["marksheets"].names), parts),
+                  "subjects": self._latest_subjects(list(self.schemas["subjects"].names), parts)}
+        name = f"{parts[-1][:-len('.parquet')]}-compacted.parquet"
+        for table in ("subjects", "marksheets"):
+            target = os.path.join(self.path, table, name)
+            pq.write_table(merged[table].cast(self.schemas[table]), f"{target}.tmp", compression="zstd")
+            os.replace(f"{target}.tmp", target)
+        # Marksheets first: a subjects part without its marksheets part is never read.
+        for table in ("marksheets", "subjects"):
+            for part in parts:
+                try:
+                    os.remove(os.path.join(self.path, table, part))
+                except FileNotFoundError:
+                    pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """The same two tables in one SQLite file, for installs without pyarrow."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        # Written from the store's writer thread, read from whichever thread asks for stats.
+        self.connection = sqlite3.connect(os.path.join(path, SQLITE_FILENAME), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS marksheets (
+                marksheet_id TEXT PRIMARY KEY, file TEXT, processed_at REAL, candidate_name TEXT,
+                division TEXT, result TEXT, percentage REAL, subject_count INTEGER, total_marks INTEGER);
+            CREATE TABLE IF NOT EXISTS subjects (
+                marksheet_id TEXT, position INTEGER, subject TEXT, marks INTEGER,
+                PRIMARY KEY (marksheet_id, position));
+            CREATE INDEX IF NOT EXISTS subjects_by_name ON subjects (subject);
+            CREATE INDEX IF NOT EXISTS marksheets_by_file ON marksheets (file);
+        """)
+
+    def write(self, marksheets: List[dict], subjects: List[dict]) -> None:
+        """Upsert: a re-run file replaces its earlier row and subjects instead of adding new ones."""
+        subjects_by_id: Dict[str, List[tuple]] = {}
+        for row in subjects:
+            subjects_by_id.setdefault(row["marksheet_id"], []).append(tuple(row[column] for column in SUBJECT_COLUMNS))
+        with self.lock, self.connection:
+            for row in marksheets:
+                self.connection.execute(
+                    "DELETE FROM subjects WHERE marksheet_id IN (SELECT marksheet_id FROM marksheets WHERE file = ?)",
+                    (row["file"],))
+                self.connection.execute("DELETE FROM marksheets WHERE file = ?", (row["file"],))
+                self.connection.execute(f"INSERT INTO marksheets VALUES ({', '.join('?' * len(MARKSHEET_COLUMNS))})",
+                                        tuple(row[column] for column in MARKSHEET_COLUMNS))
+                self.connection.executemany(f"INSERT INTO subjects VALUES ({', '.join('?' * len(SUBJECT_COLUMNS))})",
+                                            subjects_by_id.get(row["marksheet_id"], []))
+
+    def _query(self, sql: str) -> List[dict]:
+        with self.lock:
+            rows = self.connection.execute(sql).fetchall()
+        return [dict(zip(("group", "candidates", "mean", "min", "max"), row)) for row in rows]
+
+    def count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM marksheets").fetchone()[0]
+
+    def group_stats(self, column: str) -> List[dict]:
+        if column not in MARKSHEET_COLUMNS:
+            raise ValueError(f"Unknown column '{column}'")
+        return self._query(f"SELECT {column}, COUNT(percentage), AVG(percentage), MIN(percentage), MAX(percentage) "
+                           f"FROM marksheets GROUP BY {column} ORDER BY COUNT(percentage) DESC")
+
+    def subject_stats(self) -> List[dict]:
+        return self._query("SELECT subject, COUNT(marks), AVG(marks), MIN(marks), MAX(marks) "
+                           "FROM subjects GROUP BY subject ORDER BY COUNT(marks) DESC")
+
+    def parts(self, table: str = "marksheets") -> List[str]:
+        return [SQLITE_FILENAME]
+
+    def compact(self) -> None:
+        """Rows are already upserted in place; this only reclaims the space of replaced ones."""
+        with self.lock:
+            self.connection.execute("VACUUM")
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def open_backend(path: str, backend: str = "auto"):
+    """Parquet when pyarrow is installed, SQLite otherwise; ``auto`` keeps using an existing SQLite store."""
+    if backend == "auto":
+        if os.path.exists(os.path.join(path, SQLITE_FILENAME)):
+            backend = "sqlite"
+        else:
+            try:
+                import pyarrow  # noqa: F401
+                backend = "parquet"
+            except ImportError:
+                backend = "sqlite"
+    if backend == "parquet":
+        return ParquetBackend(path)
+    if backend == "sqlite":
+        return SQLiteBackend(path)
+    raise ValueError(f"Unknown results store backend '{backend}'")
+
+
+class ResultStore:
+    """Appends extracted marksheets to a columnar store in batches, from a background thread.
+
+    ``add()`` only queues the result, so extraction never waits on serialization or disk.
+    A batch is written once it holds ``batch_size`` marksheets, ``flush_seconds`` after its
+    first marksheet arrived, on ``flush()`` or on ``close()``.
+    """
+
+    def __init__(self, path: str = "marksheet_results", backend: str = "auto",
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_seconds: float = DEFAULT_FLUSH_SECONDS):
+        self.backend = open_backend(path, backend)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue: queue.Queue = queue.Queue(maxsize=batch_size * 4)  # backpressure if the disk falls behind
+        self.written = 0
+        self.batches = 0
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+        self.thread.start()
+
+    def add(self, file: str, details: dict, digest: Optional[str] = None) -> None:
+        """Queue one extracted marksheet (``MarksheetDetails.model_dump()``).
+
+        ``digest`` is the file's content hash; with it, a changed file gets a new ``marksheet_id``.
+        """
+        if self.error is not None:
+            raise RuntimeError(f"Results store writer failed: {self.error}") from self.error
+        self.queue.put((file, details, time.time(), digest))
+
+    def flush(self) -> None:
+        """Block until everything queued so far is written; re-raise a write error if there was one."""
+        written = threading.Event()
+        self.queue.put(written)
+        written.wait()
+        if self.error is not None:
+            raise RuntimeError(f"Results store writer failed: {self.error}") from self.error
+
+    def _write_loop(self) -> None:
+        closing = False
+        while not closing:
+            batch = []
+            deadline = None
+            flushed = None
+            while len(batch) < self.batch_size:
+                try:
+                    # No timeout while the batch is empty: an idle store never writes a part.
+                    item = self.queue.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                if isinstance(item, threading.Event):
+                    flushed = item
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if not batch or self.error is not None:
+                if flushed is not None:
+                    flushed.set()
+                continue
+            marksheets, subjects = [], []
+            try:
+                for file, details, processed_at, digest in batch:
+                    marksheet, rows = flatten(file, details, processed_at, digest)
+                    marksheets.append(marksheet)
+                    subjects.extend(rows)
+                self.backend.write(marksheets, subjects)
+                self.written += len(marksheets)
+                self.batches += 1
+            except Exception as e:
+                self.error = e  # reported by the next add(), flush() or close()
+            if flushed is not None:
+                flushed.set()
+
+    def close(self) -> None:
+        """Flush what is queued, stop the writer and re-raise a write error if there was one."""
+        self.queue.put(None)
+        self.thread.join()
+        self.backend.close()
+        if self.error is not None:
+            raise RuntimeError(f"Results store writer failed: {self.error}") from self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def summarize(path: str = "marksheet_results", backend: str = "auto") -> Dict[str, object]:
+    """Aggregates over every stored marksheet, read straight from the columns."""
+    store = open_backend(path, backend)
+    try:
+        return {
+            "backend": store.name,
+            "marksheets": store.count(),
+            "by_result": store.group_stats("result"),
+            "by_division": store.group_stats("division"),
+            "by_subject": store.subject_stats(),
+        }
+    finally:
+        store.close()
+
+
+def compact(path: str = "marksheet_results", backend: str = "auto") -> Dict[str, object]:
+    """Merge the store's part files (Parquet) or reclaim replaced rows (SQLite)."""
+    store = open_backend(path, backend)
+    try:
+        before = len(store.parts())
+        store.compact()
+        return {"backend": store.name, "parts_before": before, "parts_after": len(store.parts()),
+                "marksheets": store.count()}
+    finally:
+        store.close()
@@ -1,21 +1,29 @@
 import os
-import base64
-import io
-from typing import List
-import instructor
-from openai import OpenAI
+import argparse
+from functools import lru_cache
+from typing import List, Optional
 from pydantic import BaseModel, Field
-from PIL import Image, UnidentifiedImageError
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from vision.image_pipeline import SUPPORTED_IMAGE_FORMATS, list_images, prepare_image, preprocess_directory, benchmark_pipeline
+from vision.reply_cache import ReplyCache, calibrate, fingerprint, DEFAULT_HAMMING_THRESHOLD
+from vision.incremental import run_incremental, watch_directory
+
+from common.providers import get_instructor_client
 
 load_dotenv()
 
 console = Console()
 
 
+# Built on first use, so importing this module (e.g. into the pipeline worker) stays cheap.
+@lru_cache(maxsize=None)
+def replies_client():
+    return get_instructor_client("screenshot_replies")
+
+
 class Reply(BaseModel):
     reply: str
 
@@ -24,36 +32,13 @@ class GeneratedReplies(BaseModel):
     replies: List[Reply]
 
 
-def resize_image(image_path: str, max_size: tuple[int, int]) -> Image:
-    """Resize the image to the given maximum size while maintaining aspect ratio."""
-    try:
-        with Image.open(image_path) as img:
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            img.thumbnail(max_size, Image.LANCZOS)
-            return img.copy()
-    except UnidentifiedImageError:
-        raise ValueError(f"Unrecognized image format or corrupted image file: {image_path}")
-    except FileNotFoundError:
-        raise ValueError(f"Image file not found: {image_path}")
-    except Exception as e:
-        raise ValueError(f"An unexpected error occurred while processing the image: {e}")
-
-
-def generate_reply(image_path: str, max_size: tuple[int, int] = (800, 800)) -> GeneratedReplies:
-    """Generate replies from the provided image after resizing it to the specified size."""
-    resized_img = resize_image(image_path, max_size)
-    with io.BytesIO() as img_buffer:
-        resized_img.save(img_buffer, format='JPEG')
-        img_buffer.seek(0)
-        base64_img = base64.b64encode(img_buffer.read()).decode('utf-8')
-
+def request_replies(data_url: str) -> GeneratedReplies:
+    """Generate replies for an already preprocessed image data URL."""
     content = [
-        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}}
+        {"type": "image_url", "image_url": {"url": data_url}}
     ]
 
-    response = instructor.from_openai(OpenAI()).chat.completions.create(
-        model="gpt-4o-mini",
+    response = replies_client().create(
         response_model=GeneratedReplies,
         messages=[
             {"role": "user",
@@ -64,33 +49,127 @@ def generate_reply(image_path: str, max_size: tuple[int, int] = (800, 800)) -> G
     return response
 
 
-def process_screenshots(directory: str, max_size: tuple[int, int] = (800, 800)) -> None:
-    supported_image_formats = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp"}
-    files = os.listdir(directory)
+def generate_reply(image_path: str, max_size: tuple[int, int] = (800, 800)) -> GeneratedReplies:
+    """Generate replies from the provided image after resizing it to the specified size."""
+    return request_replies(prepare_image(image_path, max_size))
+
+
+def display_replies(file: str, result: GeneratedReplies) -> None:
+    if result and result.replies:
+        table = Table(title=f"💬 Generated Replies for {file}", show_header=False, border_style="cyan")
+        for i, reply in enumerate(result.replies, 1):
+            table.add_row(f"[green]Reply {i}:[/green] {reply.reply}")
+        console.print(table)
+    else:
+        console.print(f"[yellow]⚠️ No replies generated for {file}.[/yellow]")
+
+
+def display_cache_summary(cache: ReplyCache) -> None:
+    stats = cache.summary()
+    table = Table(title="🗂️ Reply Cache", show_header=False, border_style="cyan")
+    table.add_row("Images", str(stats["lookups"]))
+    table.add_row("Exact hits", str(stats["exact_hits"]))
+    table.add_row("Near-duplicate hits", str(stats["near_hits"]))
+    table.add_row("API calls", str(stats["misses"]))
+    table.add_row("Hit rate", f"{stats['hit_rate']:.1%}")
+    console.print(table)
+
+
+def display_calibration(stats: dict) -> None:
+    table = Table(title=f"🎯 dHash distances ({stats['images']} screenshots)", show_header=False, border_style="cyan")
+    table.add_row("Re-shared copies, max", str(stats["near_max"]))
+    table.add_row("Different screenshots, min", str(stats["different_min"]))
+    table.add_row("Threshold", str(stats["threshold"]))
+    table.add_row("Copies above threshold", f"{stats['near_missed']}/{stats['near_pairs']}")
+    table.add_row("Different pairs within threshold", f"{stats['different_matched']}/{stats['different_pairs']}")
+    console.print(table)
+    if stats["near_missed"] or stats["different_matched"]:
+        console.print("[yellow]⚠️ The threshold doesn't separate these; pass --threshold between the two.[/yellow]")
+
+
+def process_screenshots(directory: str, max_size: tuple[int, int] = (800, 800), workers: Optional[int] = None,
+                        cache: Optional[ReplyCache] = None, files: Optional[List[str]] = None,
+                        mp_context=None) -> List[str]:
+    """Generate replies for the screenshots in ``directory`` (or only ``files``) and return the ones that succeeded.
+
+    ``mp_context`` is passed on to the preprocessing process pool.
+    """
+    if files is None:
+        files = list_images(directory)
+    processed = []
+    # The workers hash each image from the decode they already do for the API request.
+    with console.status("[bold green]Preprocessing images..."):
+        prepared = {file: (data_url, error, key)
+                    for file, data_url, error, key in preprocess_directory(
+                        directory, max_size, workers, files=files, mp_context=mp_context,
+                        fingerprint=fingerprint if cache is not None else None)}
 
     for file in files:
-        file_path = os.path.join(directory, file)
-        file_extension = os.path.splitext(file)[1].lower()
-        if file_extension in supported_image_formats:
-            console.print(Panel(f"📸 Processing Image: {file}", style="bold magenta"))
-            try:
-                result = generate_reply(file_path, max_size)
-                if result and result.replies:
-                    table = Table(title=f"💬 Generated Replies for {file}", show_header=False, border_style="cyan")
-                    for i, reply in enumerate(result.replies, 1):
-                        table.add_row(f"[green]Reply {i}:[/green] {reply.reply}")
-                    console.print(table)
-                else:
-                    console.print(f"[yellow]⚠️ No replies generated for {file}.[/yellow]")
-            except Exception as e:
-                console.print(f"[red]❌ Failed to process {file}: {e}[/red]")
-            console.print("---")
+        console.print(Panel(f"📸 Processing Image: {file}", style="bold magenta"))
+        try:
+            data_url, error, key = prepared[file]
+            cached = cache.lookup(*key) if key is not None else None
+            if cached is not None:
+                console.print("[dim]♻️ Served from reply cache[/dim]")
+                display_replies(file, GeneratedReplies.model_validate_json(cached))
+                processed.append(file)
+            else:
+                if error:
+                    raise ValueError(error)
+                result = request_replies(data_url)
+                if key is not None and result and result.replies:
+                    image_hash, digest = key
+                    cache.store(image_hash, result.model_dump_json(), source=file, digest=digest)
+                display_replies(file, result)
+                processed.append(file)
+        except Exception as e:
+            console.print(f"[red]❌ Failed to process {file}: {e}[/red]")
+        console.print("---")
+
+    if cache is not None:
+        display_cache_summary(cache)
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate chat replies for screenshots")
+    parser.add_argument("directory", nargs="?",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshots"))
+    parser.add_argument("--workers", type=int, default=None, help="Preprocessing processes (default: CPU count)")
+    parser.add_argument("--benchmark", action="store_true", help="Only benchmark image preprocessing")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Compare hash distances of re-shared copies vs. different screenshots")
+    parser.add_argument("--cache", default=".reply_cache.sqlite", help="Perceptual-hash reply cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Call the API for every image")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_HAMMING_THRESHOLD,
+                        help="Max Hamming distance for near-duplicate images")
+    parser.add_argument("--incremental", action="store_true", help="Only process new or changed screenshots")
+    parser.add_argument("--watch", action="store_true", help="Keep running and process screenshots as they arrive")
+    parser.add_argument("--interval", type=float, default=5.0, help="Polling interval for --watch in seconds")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_pipeline(args.directory)
+    elif args.calibrate:
+        display_calibration(calibrate([os.path.join(args.directory, file) for file in list_images(args.directory)],
+                                      args.threshold))
+    else:
+        console.print(Panel("🤖 Chat Assistant Demo", style="bold blue"))
+        reply_cache = None if args.no_cache else ReplyCache(args.cache, threshold=args.threshold)
+
+        def process(files: List[str]) -> List[str]:
+            return process_screenshots(args.directory, workers=args.workers, cache=reply_cache, files=files)
+
+        if args.watch:
+            watch_directory(args.directory, SUPPORTED_IMAGE_FORMATS, process, interval=args.interval)
+        elif args.incremental:
+            run_incremental(args.directory, SUPPORTED_IMAGE_FORMATS, process)
         else:
-            continue
+            process(list_images(args.directory))
+        if reply_cache is not None:
+            reply_cache.close()
+        console.print(Panel("✅ Demo Completed", style="bold green"))
 
 
 if __name__ == "__main__":
-    screenshots_directory = "./screenshots"
-    console.print(Panel("🤖 Chat Assistant Demo", style="bold blue"))
-    process_screenshots(screenshots_directory)
-    console.print(Panel("✅ Demo Completed", style="bold green"))
+    main()